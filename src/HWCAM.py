@@ -38,185 +38,18 @@ from matplotlib.figure import Figure
 import datetime
 import os
 import traceback
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import freeze_support
 
 # 内部ライブラリ
 from cam_generic_lib import *
 from dxf_file import *
+from toolpath_builder import *
+from cam_core import *
 from messeage_window import *
 from cam_global import *
 from error_log import *
 
-#======================================================================================================================================
-#            クラスの実装
-#======================================================================================================================================
-
-#######################################################################################################################################
-###############    configクラス   ここから　　　#########################################################################################
-
-#【説明】
-#　CAMで使用する設定値を格納するクラスである．
-#
-#【親クラス】
-#　なし
-#
-#【メンバ変数】
-#   変数名          型              説明
-#   FILENAME_XY     string          デフォルトで読み込むXYのdxfファイル名（起動時にのみ変更）
-#   FILENAME_UV     string          デフォルトで読み込むUVのdxfファイル名（起動時にのみ変更）
-#   OX              float           切り出しの始点座標
-#   OY              float           切り出しの始点座標
-#   EX              float           切り出しの終点座標
-#   EY              float           切り出しの終点座標
-#   DELTA_LENGTH    float           G Codeの点群の間隔
-#   OFFSET_DIST     float           オフセット距離
-#   CUTSPEED        float           カット速度
-#   XY_DIST         float           XY断面とマシン駆動面との距離
-#   UV_DIST         float           UV断面とマシン駆動面との距離
-#   WORK_LENGTH     float           ワークの長さ（XY-UV断面距離）
-#   MACH_DIST       float           マシン駆動面の距離
-#   HEADER          string          Gコードの書き出し文字列
-#   x_str           string          G01でのX軸名称
-#   y_str           string          G01でのY軸名称
-#   u_str           string          G01でのU軸名称
-#   v_str           string          G01でのV軸名称
-#   offset_function object          オフセット距離の算出に使用する関数オブジェクト
-#
-#【実装メソッド】
-#   __init__()
-#   【引数】 なし
-#   【戻り値】　なし
-#   【機能】 メンバ変数をデフォルト値に設定する
-#
-#   load_config(string file_path)
-#   【引数】 file_path
-#   【戻り値】　なし
-#   【機能】 file_pathで与えられるcsvファイルを開き、csvファイルから読み込んだ値をメンバ変数に設定する。問題があればデフォルト値を設定する
-#
-#   load_offset_func(string　file_path)
-#   【引数】　string　file_path
-#   【戻り値】　なし
-#   【機能】 file_pathで与えられるcsvファイルを開き、csvファイルから読み込んだ値からoffset_functionを更新する。問題があればデフォルト値を設定する
-
-
-class Config:
-    def __init__(self):
-        self.FILENAME_XY = "ファイル名を入力して下さい。"
-        self.FILENAME_UV = "ファイル名を入力して下さい。"
-        self.OX = 0.0
-        self.OY = 0.0
-        self.EX = 0.0
-        self.EY = 0.0
-        self.DELTA_LENGTH = 1.0
-        self.XY_OFFSET_DIST = 0.0
-        self.UV_OFFSET_DIST = 0.0
-        self.CUTSPEED = 200
-        self.XY_DIST = 25.0
-        self.UV_DIST = 50.0
-        self.CS_DEF = "Center"
-        self.CNC_CS_DEF = "XY"
-        self.MACH_DIST = 500
-        self.OFFSET_X = 0
-        self.OFFSET_Y = 0
-        self.ROTATE = 0
-        self.HEADER = "T1\nG17 G49 G54 G80 G90 G94 G21 G40 G64\n"
-        self.X_STR = 'X'
-        self.Y_STR = 'Y'
-        self.U_STR = 'Z'
-        self.V_STR = 'A'
-        self.REFINE = False
-        self.REMOVE_COLLISION = False
-        x_data = [1,1000]
-        y_data = [0,0]
-        self.offset_function = generate_offset_function(x_data, y_data)
-        
-    def load_config(self, file_path):
-        try:
-            config_file = np.genfromtxt(file_path, delimiter = ",", skip_header = 1, dtype = str, encoding="shift-jis")
-            config_data = config_file[:,2]
-            self.FILENAME_XY = config_data[0]
-            self.FILENAME_UV = config_data[1]
-            self.OX = float(config_data[2])
-            self.OY = float(config_data[3])
-            self.EX = float(config_data[4])
-            self.EY = float(config_data[5])
-            self.DELTA_LENGTH = float(config_data[6])
-            self.XY_OFFSET_DIST = float(config_data[7])
-            self.UV_OFFSET_DIST = float(config_data[8])
-            self.CUTSPEED = float(config_data[9])
-            self.CS_DEF = str(config_data[10])
-            self.CNC_CS_DEF = str(config_data[11])
-            self.XY_DIST = float(config_data[12])
-            self.UV_DIST = float(config_data[13])
-            self.MACH_DIST = float(config_data[14])
-            self.OFFSET_X = float(config_data[15])
-            self.OFFSET_Y = float(config_data[16])
-            self.ROTATE = float(config_data[17])           
-            self.HEADER = config_data[18].replace("\\n", "\n")
-            self.X_STR = str(config_data[19])
-            self.Y_STR = str(config_data[20])
-            self.U_STR = str(config_data[21])
-            self.V_STR = str(config_data[22])
-            if str(config_data[23]) == "ON":
-                self.REMOVE_COLLISION = True
-            else:
-                self.REMOVE_COLLISION = False
-                
-            if str(config_data[24]) == "ON":
-                self.REFINE = True
-            else:
-                self.REFINE = False            
-            
-            self.MESSEAGE = "設定ファイルの読み込み成功\n"
-            
-        except:
-            traceback.print_exc()
-            output_log(traceback.format_exc())
-            self.FILENAME_XY = "ファイル名を入力して下さい。"
-            self.FILENAME_UV = "ファイル名を入力して下さい。"
-            self.OX = 0.0
-            self.OY = 0.0
-            self.EX = 0.0
-            self.EY = 0.0
-            self.DELTA_LENGTH = 1.0
-            self.XY_OFFSET_DIST = 0.0
-            self.UV_OFFSET_DIST = 0.0
-            self.CUTSPEED = 200
-            self.CS_DEF = "Center"
-            self.CNC_CS_DEF = "XY"
-            self.XY_DIST = 25.0
-            self.UV_DIST = 50.0
-            self.MACH_DIST = 500
-            self.OFFSET_X = 0
-            self.OFFSET_Y = 0
-            self.ROTATE = 0
-            self.HEADER = "T1\nG17 G49 G54 G80 G90 G94 G21 G40 G64\n"
-            self.X_STR = 'X'
-            self.Y_STR = 'Y'
-            self.U_STR = 'Z'
-            self.V_STR = 'A'
-            self.REFINE = False
-            self.REMOVE_COLLISION = False
-            self.MESSEAGE = "設定ファイルの読み込み失敗\n"
-            pass          
-
-    def load_offset_func(self, file_path):
-        try:
-            offset_function_file = np.genfromtxt(file_path, delimiter = ",", skip_header = 1, dtype = str, encoding="shift-jis")
-            x_data = offset_function_file[0,3:]
-            y_data = offset_function_file[1,3:]
-            x_data = x_data.astype(float)
-            y_data = y_data.astype(float)
-            self.offset_function = generate_offset_function(x_data, y_data)
-            self.MESSEAGE = "%sの読み込み成功\n"%file_path
-        except:
-            traceback.print_exc()
-            output_log(traceback.format_exc())
-            x_data = [1,1000]
-            y_data = [0,0]
-            self.offset_function = generate_offset_function(x_data, y_data)
-            self.MESSEAGE = "溶け量ファイルの読み込み失敗\n"
-
-
 #======================================================================================================================================
 #            ボタンにより呼び出される関数
 #======================================================================================================================================
@@ -250,6 +83,13 @@ class Config:
 #   【引数】　dxf_obj, entry, messeage_window
 #   【戻り値】　なし
 #   【機能】 Entryに入力されたファイル名称をdxf_obj.load_fileにより読み込む．file_chkをコールし，読み取り可否をmesseage_windowに通知する．
+#           line_listを指定した場合は，dxfファイルを読み込まずに，読み込み済みのline_listをdxf_objに設定する．
+#
+#   load_file_concurrent(DxfFile dxf_obj0, tk.Entry entry0, DxfFile dxf_obj1, tk.Entry entry1, tk.BooleanVar is_spline_refine, messeage_window messeage_window, ProcessPoolExecutor executor)
+#   【引数】　dxf_obj0, entry0, dxf_obj1, entry1, is_spline_refine, messeage_window, executor
+#   【戻り値】　なし
+#   【機能】 entry0, entry1に入力されたXY面，UV面のdxfファイルを，load_dxf_lines_concurrentによりexecutorで並列に読み込む．
+#           両方の読み込みが終わった後，load_fileによりdxf_obj0, dxf_obj1とテーブルに反映する．並列に読み込めない場合は，順に読み込む．
 #　　　　　　　　
 #   xy_uv_link(tk.BooleanVar is_xy_uv_link, SuperTable xy_table, SuperTable uv_table, messeage_window  messeage_window)
 #   【引数】 is_xy_uv_link, xy_table, uv_table, messeage_window
@@ -296,41 +136,26 @@ class Config:
 #   【戻り値】　なし
 #   【機能】 dxf_obj.reverse_allをコールし，カット順を逆転させる．結果をmesseage_windowに表示する．
 #
-#   Replace_G01_code(g_code_str, x_str, y_str, u_str, v_str)
-#   【引数】g_code_str, x_str, y_str, u_str, v_str
-#   【戻り値】g_code_str
-#   【機能】g_code_strのX,Y,U,Vの座標文字をX_str, y_str, u_str, V_strで指定されるものに置換する
-#
-#   make_offset_path(x_array, y_array, u_array, v_array, z_xy, z_uv, z_mach)
-#   【引数】x_array, y_array, u_array, v_array, z_xy, z_uv, z_mach
-#   【戻り値】new_x, new_y, new_u, new_v
-#   【機能】ワーク上のXY, UV座標点列（x_array, y_array, u_array, v_array）から、マシン駆動面上の座標点列を作成し、出力する
-#
-#   get_offset_and_cut_speed(length_xy, length_uv, z_xy, z_uv, z_mach, cut_speed, offset_function)
-#   【引数】length_XY, length_uv, z_xy, z_uv, z_mach, cut_speed, offset_function
-#   【戻り値】offset_XY_Work, offset_UV_Work, cutspeed_XY_Work, cutspeed_UV_Work, cutspeed_XY_Mech, cutspeed_UV_Mech
-#   【機能】(1) XY断面の線長とUV断面の線長から、ワークの中間点での線長を算出する
-#          (2) ワークの中間点でのカット速度が、CutSpeedとするとして、(1)の線長比から、XY、UV断面でのカット速度(cutspeed_XY_Work, cutspeed_UV_Work)を算出する
-#          (3) offset_functionを用いて、XY、UV断面のカット速度における溶け量を推定し、これをキャンセルするようにオフセット量（offset_XY_Work, offset_UV_Work）を設定する。
-#              ※マシン駆動面上での座標点列作成は、その他の線郡と同様に、gen_g_code側にて行う
-#          (4) ワーク端面（XY面, UV面）とマシン駆動面との距離（Z_XY, z_uv, Z_Mach）から、cutspeed_XY_Work, cutspeed_UV_Workを実現するマシン駆動面速度（cutspeed_XY_Mech, cutspeed_UV_Mech）を算出する
+#   set_cut_speed(dxf_obj0, dxf_obj1, xy_dist_entry, uv_dist_entry, mach_dist_entry, cut_speed_entry, cut_speed_def_cb)
+#   【引数】dxf_obj0, dxf_obj1, xy_dist_entry, uv_dist_entry, mach_dist_entry, cut_speed_entry, cut_speed_def_cb
+#   【戻り値】なし
+#   【機能】Entry, Comboboxから値を取得し、cam_core.apply_cut_speedにより線ごとのカット速度を設定する
 #
 #   set_offset_dist_from_function(dxf_obj0, dxf_obj1, xy_dist_entry, uv_dist_entry, mach_dist_entry, cut_speed_entry, offset_function, messeage_window)
 #   【引数】dxf_obj0, dxf_obj1, xy_dist_entry, uv_dist_entry, mach_dist_entry, cut_speed_entry, offset_function, messeage_window
 #   【戻り値】なし
-#   【機能】dxf_obj0, dxf_obj1の対応する線から、XY断面の線長、UV断面の線長を取得し、get_offset_and_cut_speedにより線ごとにオフセット距離、カット速度を取得する
-#          取得したオフセット距離、カット速度を線（line Object）に設定し、オフセット距離を更新する
+#   【機能】Entry, Comboboxから値を取得し、cam_core.apply_offset_functionにより線ごとにオフセット距離、カット速度を設定する
+#          オフセット距離、カット速度の計算（get_cutspeed）は、cam_coreにて行う
 #
 #   gen_g_code(DxfFile　dxf_obj0, DxfFile　dxf_obj1, tk.Entry entry_ox, tk.Entry entry_oy, tk.Entry entry_ex, tk.Entry entry_ey, tk.Entry cut_speed_entry, tk.Entry entry_dl, str header, messeage_window messeage_window)
 #   【引数】 dxf_obj0, dxf_obj1, entry_ox, entry_oy, entry_ex, entry_ey, cut_speed_entry, entry_dl, header, messeage_window
 #   【戻り値】　なし
-#   【機能】　gコードを生成する．始点をentry_ox, entry_oyから，終点をentry_ex, entry_eyから読み取る．カット速度をentry_CSから読み取る．分割距離をentry_dlから読み取る．gコードの書き出しをheaderとする．
-#　　　　　　　　1. dxf_obj0, dxf_obj1のline_num_listにて0以上の値を取得し，a_line_num_list0,a_line_num_list1に格納する．
-#　　　　　　　　2. a_line_num_list0,a_line_num_list1のライン数が一致しているかを確認する．
-#　　　　　　　　3. a_line_num_list0,a_line_num_list1のラインを順にgコード化する．各ラインについてget_length()にてライン長を取得し，N=get_length()/dlから分割数を決定する
-#　　　　　　　　4. 各ラインについてgenerate_arc_length_pointsをコールし，等間隔点列x, y, u, vを取得する．
-#　　　　　　　　5. gen_g_code_line_str(x, y, u, v)をコールし，x, y, u, vからgコードを生成する．
-#　　　　　　　　6. 各ラインのgコードを結合し，保存する．保存名は 「dxf_obj0.filename,dxf_obj1.filename,日付.nc」とする．　
+#   【機能】　gコードを生成する．始点をentry_ox, entry_oyから，終点をentry_ex, entry_eyから読み取る．カット速度をentry_CSから読み取る．分割距離をentry_dlから読み取る．
+#　　　　　　　　1. set_cut_speedにより，線ごとのカット速度を設定する．
+#　　　　　　　　2. cam_core.check_mach_distにより，XY面距離，UV面距離が駆動面距離を超えていないかを確認する．
+#　　　　　　　　3. cam_core.generate_g_codeにより，カットパスを作成し，gコードをファイルへ逐次書き込む．保存名は 「dxf_obj0.filename,dxf_obj1.filename,日付.nc」とする．
+#　　　　　　　　4. 生成結果をmesseage_windowに表示する．
+#            Config, get_cutspeed, iter_g_codeなど，GUIによらない処理はcam_coreに実装する．
 #
 #   path_chk(tk.Frame Root, DxfFile　dxf_obj0, DxfFile　dxf_obj1, tk.Entry entry_ox, tk.Entry entry_oy, tk.Entry entry_ex, tk.Entry entry_ey, tk.Entry mach_dist_entry, tk.Entry entry_dl, messeage_window messeage_window)
 #   【引数】 Root, dxf_obj0, dxf_obj1, entry_ox, entry_oy, entry_ex, entry_ey, mach_dist_entry, entry_dl, messeage_window
@@ -421,7 +246,7 @@ def open_dxf_explorer(dxf_obj, entry, is_spline_refine, messeage_window):
     load_file(dxf_obj, entry, is_spline_refine, messeage_window)
 
 
-def load_file(dxf_obj, entry, is_spline_refine, messeage_window):
+def load_file(dxf_obj, entry, is_spline_refine, messeage_window, line_list = None):
     filename = entry.get()
     is_refine = is_spline_refine.get()
     
@@ -432,7 +257,7 @@ def load_file(dxf_obj, entry, is_spline_refine, messeage_window):
         ry = dxf_obj.ry
         sita = dxf_obj.sita
         
-        dxf_obj.load_file(filename, is_refine)
+        dxf_obj.load_file(filename, is_refine, line_list)
         dxf_obj.offset_origin(ox, oy)
         dxf_obj.rotate(sita, rx, ry)
         dxf_obj.update(keep_view = False)
@@ -446,6 +271,30 @@ def load_file(dxf_obj, entry, is_spline_refine, messeage_window):
     if file_chk(filename) == -1:        
         messeage_window.set_messeage("%sを読み込めません。ファイルが存在することを確認して下さい。\n"%filename)  
    
+
+def load_file_concurrent(dxf_obj0, entry0, dxf_obj1, entry1, is_spline_refine, messeage_window, executor):
+    filename0 = entry0.get()
+    filename1 = entry1.get()
+    
+    # どちらかのファイルが読み込めない場合は、ファイルごとに読み込み、読み取り可否を通知する
+    if not((file_chk(filename0) == 1) and (file_chk(filename1) == 1)):
+        load_file(dxf_obj0, entry0, is_spline_refine, messeage_window)
+        load_file(dxf_obj1, entry1, is_spline_refine, messeage_window)
+        return
+    
+    try:
+        # XY面とUV面の解析・リファインを並列に実行し、両方が終わるまで待つ
+        line_list0, line_list1 = load_dxf_lines_concurrent([filename0, filename1], is_spline_refine.get(), executor)
+    except:
+        traceback.print_exc()
+        output_log(traceback.format_exc())
+        messeage_window.set_messeage("XY面とUV面を並列に読み込めませんでした。順に読み込みます。\n")
+        line_list0 = None
+        line_list1 = None
+    
+    load_file(dxf_obj0, entry0, is_spline_refine, messeage_window, line_list0)
+    load_file(dxf_obj1, entry1, is_spline_refine, messeage_window, line_list1)
+    
     
 def xy_uv_link(is_xy_uv_link, xy_table, uv_table, messeage_window):
     if is_xy_uv_link.get():
@@ -626,120 +475,9 @@ def set_offset_dist(dxf_obj, entry, x_dxf_obj, x_entry, is_xy_uv_link, is_remove
         pass
 
 def remove_collision(dxf_obj, name, messeage_window):
-    self_collision_list = dxf_obj.remove_self_collision()
-    collision_line_list = dxf_obj.remove_line_collision()
-
-    if len(self_collision_list) > 0:
-        for num in self_collision_list:
-            messeage_window.set_messeage("%sの%s番目の線で自己交差を修正しました。形状に問題がないかをチェックしてください。\n"%(name, num))
-    if len(collision_line_list) > 0:
-        for nums in collision_line_list:
-            messeage_window.set_messeage("%sの%s本目と%s本目の線で自己交差を修正しました。形状に問題がないかをチェックしてください。\n"%(name, nums[0], nums[1]))            
-
-
-def replace_g_code(g_code_str, x_str, y_str, u_str, v_str):
-    
-    if ('G' in g_code_str) and ('X' in g_code_str) and ('Y' in g_code_str) and ('U' in g_code_str) and ('V' in g_code_str):
-        new_g_code_str = g_code_str
-        new_g_code_str = new_g_code_str.replace('X', x_str)
-        new_g_code_str = new_g_code_str.replace('Y', y_str)
-        new_g_code_str = new_g_code_str.replace('U', u_str)
-        new_g_code_str = new_g_code_str.replace('V', v_str)
-        return new_g_code_str
-
-    else:
-        return g_code_str
-
-def make_offset_path(x_array, y_array, u_array, v_array, z_xy, z_uv, z_mach):
-    
-    new_x = []
-    new_y = []
-    new_u = []
-    new_v = []
-    
-    z_work_mid = (z_mach - z_xy - z_uv)/2.0 + z_xy
-    l_xy_work = np.abs(z_work_mid - z_xy)
-    l_uv_work = np.abs((z_mach - z_uv) - z_work_mid)
-    l_xy_mach = np.abs(z_work_mid)
-    l_uv_mach = np.abs(z_mach - z_work_mid)
-    
-    if l_xy_work == 0 or l_uv_work == 0:
-        k_xy = 1.0
-        k_uv = 1.0        
-    else:
-        k_xy = l_xy_mach/ l_xy_work
-        k_uv = l_uv_mach/ l_uv_work
-    
-    i = 0
-    while i < len(x_array):
-        xu_mid = (x_array[i] + u_array[i])/ 2.0
-        yv_mid = (y_array[i] + v_array[i])/ 2.0
-        dx = x_array[i] - xu_mid
-        du = u_array[i] - xu_mid
-        dy = y_array[i] - yv_mid
-        dv = v_array[i] - yv_mid
-        
-        new_x.append(dx*k_xy + xu_mid)
-        new_y.append(dy*k_xy + yv_mid)
-        new_u.append(du*k_uv + xu_mid)
-        new_v.append(dv*k_uv + yv_mid)
-
-        i += 1
-    
-    new_x = np.array(new_x)
-    new_y = np.array(new_y)
-    new_u = np.array(new_u)
-    new_v = np.array(new_v)
-    
-    return new_x, new_y, new_u, new_v
-
-
-def get_cutspeed(length_xy, length_uv, z_xy, z_uv, z_mach, cut_speed, cut_speed_def_value):
-    z_work_mid = (z_mach - z_xy - z_uv)/2.0 + z_xy
-    l_xy_work = np.abs(z_work_mid - z_xy)
-    l_uv_work = np.abs((z_mach - z_uv) - z_work_mid)
-    l_xy_mach = np.abs(z_work_mid)
-    l_uv_mach = np.abs(z_mach - z_work_mid)
-    
-    if l_xy_work == 0 or l_uv_work == 0:
-        k_xy = 1.0
-        k_uv = 1.0        
-    else:
-        k_xy = l_xy_mach/ l_xy_work
-        k_uv = l_uv_mach/ l_uv_work
-           
-    length_mid = (length_xy + length_uv)/ 2.0
-    dl_XY = length_xy - length_mid
-    dl_UV = length_uv - length_mid
-    
-    length_XY_Mech = k_xy*dl_XY + length_mid
-    length_UV_Mech = k_uv*dl_UV + length_mid
-
-    if cut_speed_def_value == "XY(Mech)":
-        length_def = length_XY_Mech
-    elif cut_speed_def_value == "XY(Work)":
-        length_def = length_xy
-    elif cut_speed_def_value == "Center":
-        length_def = length_mid
-    elif cut_speed_def_value == "UV(Work)":
-        length_def = length_uv
-    else: # cut_speed_def_value == "UV(Mech)"
-        length_def = length_UV_Mech
-    
-    ratio_XY_Mech = length_XY_Mech/length_def
-    ratio_XY_Work = length_xy/length_def
-    ratio_mid = length_uv/length_def
-    ratio_UV_Work = length_uv/length_def
-    ratio_UV_Mech = length_UV_Mech/length_def
-  
-    cs_xy_mech = cut_speed*ratio_XY_Mech
-    cs_xy_work = cut_speed*ratio_XY_Work
-    cs_mid = cut_speed*ratio_mid
-    cs_uv_work = cut_speed*ratio_UV_Work
-    cs_uv_mech = cut_speed*ratio_UV_Mech
-    
-    return cs_xy_mech, cs_xy_work, cs_mid, cs_uv_work, cs_uv_mech
-
+    messeage_list = remove_section_collision(dxf_obj, name)
+    for messeage in messeage_list:
+        messeage_window.set_messeage(messeage)
 
 
 def set_cut_speed(dxf_obj0, dxf_obj1, xy_dist_entry, uv_dist_entry, mach_dist_entry, cut_speed_entry, cut_speed_def_cb):
@@ -749,38 +487,13 @@ def set_cut_speed(dxf_obj0, dxf_obj1, xy_dist_entry, uv_dist_entry, mach_dist_en
     cut_speed_value = cut_speed_entry.get()   
     cut_speed_def_value = cut_speed_def_cb.get()    
 
-    all_items0 = dxf_obj0.get_item(all=True)
-    all_items1 = dxf_obj1.get_item(all=True)
-    
     try:
         z_xy = float(xy_dist_value)
         z_uv = float(uv_dist_value)
         z_mach = float(mach_dist_value)
         cut_speed = float(cut_speed_value)
-                    
-        if len(all_items0) == len(all_items1):
-            i = 0
-            while i < len(all_items0):
-                line0 = dxf_obj0.line_list[i]
-                line1 = dxf_obj1.line_list[i]
-                
-                line0_length = line0.get_length()
-                line1_length = line1.get_length()
-                
-                cs_xy_mech, cs_xy_work, cs_mid, cs_uv_work, cs_uv_mech = \
-                    get_cutspeed(line0_length, line1_length, z_xy, z_uv, z_mach, \
-                                             cut_speed, cut_speed_def_value)
-                
-                line0.set_cutspeed(cs_xy_work, cs_xy_mech)
-                line1.set_cutspeed(cs_uv_work, cs_uv_mech)
-                i += 1
-
-        else:
-            for line0 in dxf_obj0.line_list:
-                line0.set_cutspeed(cut_speed, cut_speed)
-                
-            for line1 in dxf_obj1.line_list:
-                line1.set_cutspeed(cut_speed, cut_speed)
+        
+        apply_cut_speed(dxf_obj0, dxf_obj1, z_xy, z_uv, z_mach, cut_speed, cut_speed_def_value)
                 
         dxf_obj0.update()
         dxf_obj1.update()
@@ -798,9 +511,6 @@ def set_offset_dist_from_function(dxf_obj0, dxf_obj1, xy_dist_entry, uv_dist_ent
     mach_dist_value = mach_dist_entry.get()
     cut_speed_value = cut_speed_entry.get()   
     cut_speed_def_value = cut_speed_def_cb.get()
-        
-    all_items0 = dxf_obj0.get_item(all=True)
-    all_items1 = dxf_obj1.get_item(all=True)
 
     try:
         z_xy = float(xy_dist_value)
@@ -808,28 +518,8 @@ def set_offset_dist_from_function(dxf_obj0, dxf_obj1, xy_dist_entry, uv_dist_ent
         z_mach = float(mach_dist_value)
         cut_speed = float(cut_speed_value)
                     
-        if len(all_items0) == len(all_items1):
-            i = 0
-            while i < len(all_items0):
-
-                line0 = dxf_obj0.line_list[i]
-                line1 = dxf_obj1.line_list[i]
-                
-                line0_length = line0.get_length()
-                line1_length = line1.get_length()
-                
-                cs_xy_mech, cs_xy_work, cs_mid, cs_uv_work, cs_uv_mech = \
-                    get_cutspeed(line0_length, line1_length, z_xy, z_uv, z_mach, \
-                                             cut_speed, cut_speed_def_value)
-                offset_XY_Work = offset_function(cs_xy_work)
-                offset_UV_Work = offset_function(cs_uv_work)
-                line0.set_offset_dist(offset_XY_Work)
-                line1.set_offset_dist(offset_UV_Work)
-                
-                line0.set_cutspeed(cs_xy_work, cs_xy_mech)
-                line1.set_cutspeed(cs_uv_work, cs_uv_mech)
-                
-                i += 1
+        if len(dxf_obj0.line_list) == len(dxf_obj1.line_list):
+            apply_offset_function(dxf_obj0, dxf_obj1, z_xy, z_uv, z_mach, cut_speed, cut_speed_def_value, offset_function)
             
             if is_remove_collision.get():
                 remove_collision(dxf_obj0, "XY面", messeage_window)
@@ -840,16 +530,17 @@ def set_offset_dist_from_function(dxf_obj0, dxf_obj1, xy_dist_entry, uv_dist_ent
                 
             messeage_window.set_messeage("オフセット値を更新しました。\n")
         else:
-            messeage_window.set_messeage("XY座標とUV座標でライン数が一致しません。XY：%s本，UV：%s本\n"%(len(all_items0),len(all_items1)))
+            messeage_window.set_messeage("XY座標とUV座標でライン数が一致しません。XY：%s本，UV：%s本\n"%(len(dxf_obj0.line_list),len(dxf_obj1.line_list)))
 
     except:
         traceback.print_exc()
         output_log(traceback.format_exc())
         messeage_window.set_messeage("入力値に誤りがあります。オフセット値更新を中止しました。\n")
 
+
 # Ver2.1変更　引数追加，距離別指定可能
 def gen_g_code(dxf_obj0, dxf_obj1, entry_ox, entry_oy, entry_ex, entry_ey, xy_dist_entry, uv_dist_entry, mach_dist_entry, cut_speed_entry, \
-               cut_speed_def_cb, cb_CncCSDef, entry_dl, messeage_window, config):
+               cut_speed_def_cb, cb_CncCSDef, entry_dl, messeage_window, config, toolpath_builder):
     
     set_cut_speed(dxf_obj0, dxf_obj1, xy_dist_entry, uv_dist_entry, mach_dist_entry, cut_speed_entry, cut_speed_def_cb)
     
@@ -864,12 +555,7 @@ def gen_g_code(dxf_obj0, dxf_obj1, entry_ox, entry_oy, entry_ex, entry_ey, xy_di
     cut_speed_value = cut_speed_entry.get()
     CncCsdDef = cb_CncCSDef.get()
     
-    code_line_list = []
-    code_line_list.append(config.HEADER)
-    
     try:
-        temp_error_flg = False
-        
         ox = float(entry_ox_value)
         oy = float(entry_oy_value)
         ex = float(entry_ex_value)
@@ -880,138 +566,22 @@ def gen_g_code(dxf_obj0, dxf_obj1, entry_ox, entry_oy, entry_ex, entry_ey, xy_di
         dl = float(entry_dl_value)
         CS = float(cut_speed_value)
 
-        if z_xy > z_mach:
-            messeage_window.set_messeage("【警告】\nXY面距離が駆動面距離に対して%s mm 長いです。\n入力値を確認してください。\n\n"%(z_xy - z_mach))
-            temp_error_flg = True
-        if z_uv > z_mach:
-            messeage_window.set_messeage("【警告】\nUV面距離が駆動面距離に対して%s mm 長いです。\n入力値を確認してください。\n\n"%(z_uv - z_mach))
-            temp_error_flg = True
-       
-        if dl < 0.1:
-            dl = 0.1
-            
-        #Ver2.0　変更 Gコード出力形式
-        code_line_list.append("G00 X%f Y%f U%f V%f\n"%(ox, oy, ox, oy))
-        
-        all_items0 = dxf_obj0.get_item(all=True)
-        all_items1 = dxf_obj1.get_item(all=True)
-        
-        x_array = np.array([ox])
-        y_array = np.array([oy])
-        u_array = np.array([ox])
-        v_array = np.array([oy])
-        
-        x0 = ox
-        y0 = oy
-        u0 = ox
-        v0 = oy
+        warning_list = check_mach_dist(z_xy, z_uv, z_mach)
+        for warning in warning_list:
+            messeage_window.set_messeage(warning)
         
-        xy_offset_dist = []
-        uv_offset_dist = []
-        
-        if temp_error_flg == False:
-            if len(all_items0) == len(all_items1):
-                i = 0
-                while i < len(all_items1):
-                    line0 = dxf_obj0.line_list[i]
-                    line1 = dxf_obj1.line_list[i]
-                    
-                    line0_length = line0.get_length()
-                    line1_length = line1.get_length()
-    
-                    xy_offset_dist.append(line0.offset_dist)
-                    uv_offset_dist.append(line1.offset_dist)
-                    
-                    n = int(max(line0_length, line1_length)/ dl)
-                    if n < 2:
-                        n = 2
-                    
-                    x, y = generate_arc_length_points(line0, n)
-                    u, v = generate_arc_length_points(line1, n)
-                    cs_xy = line0.cutspeed_mech
-                    cs_uv = line1.cutspeed_mech
-                    
-                    if (i != 0) and (i != len(all_items0)):
-                        # 始点と終点以外は、フィレット補完する
-                        if FILET_INTERPOLATE == True:
-                            l0_x = [x_array[-2], x_array[-1]]
-                            l0_y = [y_array[-2], y_array[-1]]
-                            l1_x = [x[0], x[1]]
-                            l1_y = [y[0], y[1]]
-                            
-                            l0_u = [u_array[-2], u_array[-1]]
-                            l0_v = [v_array[-2], v_array[-1]]
-                            l1_u = [u[0], u[1]]
-                            l1_v = [v[0], v[1]]   
-                            
-                            
-                            x_f, y_f = generate_offset_interporate_point(l0_x, l0_y, l1_x, l1_y, xy_offset_dist[-1], xy_offset_dist[-2])
-                            u_f, v_f = generate_offset_interporate_point(l0_u, l0_v, l1_u, l1_v, uv_offset_dist[-1], uv_offset_dist[-2])        
-                            
-                            if (not(len(x_f) == 0)) and (not(len(u_f) == 0)):
-                                #オフセット面の作成
-                                x_m_f, y_m_f, u_m_f, v_m_f = make_offset_path(x_f, y_f, u_f, v_f, z_xy, z_uv, z_mach)
-                                code_line_list.append(gen_g_code_line_str(x_m_f, y_m_f, u_m_f, v_m_f, x0, y0, u0, v0, cs_xy, cs_uv, CncCsdDef))
-                                x0 = x_m_f[-1]
-                                y0 = y_m_f[-1]
-                                u0 = u_m_f[-1]
-                                v0 = v_m_f[-1]
-                            
-                                x_array = np.concatenate([x_array, x_f], 0)
-                                y_array = np.concatenate([y_array, y_f], 0)
-                                u_array = np.concatenate([u_array, u_f], 0)
-                                v_array = np.concatenate([v_array, v_f], 0)      
-                            else:
-                                x[0] = x_array[-1]
-                                y[0] = y_array[-1]
-                                u[0] = u_array[-1]
-                                v[0] = v_array[-1]                                     
-                        
-                    #オフセット面の作成
-                    x_m, y_m, u_m, v_m = make_offset_path(x, y, u, v, z_xy, z_uv, z_mach)
-                    code_line_list.append(gen_g_code_line_str(x_m, y_m, u_m, v_m, x0, y0, u0, v0, cs_xy, cs_uv, CncCsdDef))
-                    x0 = x_m[-1]
-                    y0 = y_m[-1]
-                    u0 = u_m[-1]
-                    v0 = v_m[-1]                    
-                    
-                    x_array = np.concatenate([x_array, x], 0)
-                    y_array = np.concatenate([y_array, y], 0)
-                    u_array = np.concatenate([u_array, u], 0)
-                    v_array = np.concatenate([v_array, v], 0)
-                    
-                    i += 1
-                #Ver2.0　変更 Gコード出力形式
-                code_line_list.append(gen_g_code_line_str([ex], [ey], [ex], [ey], x0, y0, u0, v0, cs_xy, cs_uv, CncCsdDef))
-                
-                replaced_code_line_list = []
-                for g_code_str in code_line_list:
-                    replaced_code_line_list.append(replace_g_code(g_code_str, config.X_STR, config.Y_STR, config.U_STR, config.V_STR))
-                
-                line = ""
-                for elem in replaced_code_line_list:
-                    line += elem
-                line += "M02"
-                
-                
-                dt_now = datetime.datetime.now()
-                
-                time_str = dt_now.strftime('%Y%m%d_%H%M%S')
-                
-                name0 = os.path.splitext(os.path.basename(dxf_obj0.filename))[0]
-                name1 = os.path.splitext(os.path.basename(dxf_obj1.filename))[0]
-                
-                Output_FileName = "%s,%s,%s_%s.nc"%(name0, name1, CS, time_str)
-                
-                f = open(Output_FileName,'w')
-                f.write(line)
-                f.close()
+        if len(warning_list) == 0:
+            if len(dxf_obj0.line_list) == len(dxf_obj1.line_list):
+                Output_FileName, stats = generate_g_code(dxf_obj0, dxf_obj1, ox, oy, ex, ey, z_xy, z_uv, z_mach, dl, CS, CncCsdDef, \
+                                                         config, toolpath_builder)
                 
+                if (SIMPLIFY_PATH == True) or (ARC_FITTING == True):
+                    messeage_window.set_messeage("点列の間引き・円弧補完により、カット部分の移動指令を%s行から%s行に削減しました。\n"%(stats["n_point"], stats["n_block"]))
                 messeage_window.set_messeage("Gコード生成成功。%sで保存しました。\n"%Output_FileName)
             
             else:
-                messeage_window.set_messeage("XY座標とUV座標でライン数が一致しません。XY：%s本，UV：%s本\n"%(len(all_items0),len(all_items1)))
-        if temp_error_flg == True:
+                messeage_window.set_messeage("XY座標とUV座標でライン数が一致しません。XY：%s本，UV：%s本\n"%(len(dxf_obj0.line_list),len(dxf_obj1.line_list)))
+        else:
             messeage_window.set_messeage("入力値に誤りがあります。Gコード生成を中止しました。\n\n")
     except:
         traceback.print_exc()
@@ -1021,7 +591,7 @@ def gen_g_code(dxf_obj0, dxf_obj1, entry_ox, entry_oy, entry_ex, entry_ey, xy_di
 
 
 def path_chk(Root, dxf_obj0, dxf_obj1, entry_ox, entry_oy, entry_ex, entry_ey, \
-             xy_dist_entry, uv_dist_entry, mach_dist_entry, entry_dl, use3dValue, messeage_window):
+             xy_dist_entry, uv_dist_entry, mach_dist_entry, entry_dl, use3dValue, messeage_window, toolpath_builder):
     is_plot_3d = use3dValue.get()
     
     
@@ -1058,15 +628,6 @@ def path_chk(Root, dxf_obj0, dxf_obj1, entry_ox, entry_oy, entry_ex, entry_ey, \
         z_uv = float(uv_dist_value)
         z_mach = float(mach_dist_value)
         
-        x_array = np.array([ox])
-        y_array = np.array([oy])
-        u_array = np.array([ox])
-        v_array = np.array([oy])
-        length_sum = 0
-        
-        xy_offset_dist = []
-        uv_offset_dist = []
-        
         if dl < 0.1:
             dl = 0.1
         
@@ -1074,96 +635,17 @@ def path_chk(Root, dxf_obj0, dxf_obj1, entry_ox, entry_oy, entry_ex, entry_ey, \
         all_items1 = dxf_obj1.get_item(all=True)
         
         if len(all_items0) == len(all_items1):
-            i = 0
-            while i < len(all_items0):
-
-                line0 = dxf_obj0.line_list[i]
-                line1 = dxf_obj1.line_list[i]
-                
-                line0_length = line0.get_length()
-                line1_length = line1.get_length()
-                
-                length_sum += (line0_length + line1_length)/2.0
-                
-                xy_offset_dist.append(line0.offset_dist)
-                uv_offset_dist.append(line1.offset_dist)
-                
-                n = int(max(line0_length, line1_length)/ dl)
-                if n < 2:
-                    n = 2
-                
-                x, y = generate_arc_length_points(line0, n)
-                u, v = generate_arc_length_points(line1, n)
-                
-                if (i != 0) and (i != len(all_items0)):
-                    if FILET_INTERPOLATE == True:
-                        # 始点と終点以外は、フィレット補完する
-                        l0_x = [x_array[-2], x_array[-1]]
-                        l0_y = [y_array[-2], y_array[-1]]
-                        l1_x = [x[0], x[1]]
-                        l1_y = [y[0], y[1]]
-                        
-                        l0_u = [u_array[-2], u_array[-1]]
-                        l0_v = [v_array[-2], v_array[-1]]
-                        l1_u = [u[0], u[1]]
-                        l1_v = [v[0], v[1]]   
-                        
-                        x_f, y_f = generate_offset_interporate_point(l0_x, l0_y, l1_x, l1_y, xy_offset_dist[-1], xy_offset_dist[-2])
-                        u_f, v_f = generate_offset_interporate_point(l0_u, l0_v, l1_u, l1_v, uv_offset_dist[-1], uv_offset_dist[-2])
-                        
-                        if (not(len(x_f) == 0)) and (not(len(u_f) == 0)):
-                            x_array = np.concatenate([x_array, x_f], 0)
-                            y_array = np.concatenate([y_array, y_f], 0)
-                            u_array = np.concatenate([u_array, u_f], 0)
-                            v_array = np.concatenate([v_array, v_f], 0)    
-                        else:
-                            x[0] = x_array[-1]
-                            y[0] = y_array[-1]
-                            u[0] = u_array[-1]
-                            v[0] = v_array[-1]                    
-                else:
-                    norm_line2line0 = norm(x_array[-1], y_array[-1], x[0], y[0])
-                    norm_line2line1 = norm(u_array[-1], v_array[-1], u[0], v[0])
-                    
-                    if norm_line2line0 > dl  or  norm_line2line1 > dl:
-                        n_interp_line2line = int(max(norm_line2line0, norm_line2line1) / dl)
-                        
-                        if n_interp_line2line < 2:
-                            n_interp_line2line = 2
-                        
-                        xp, yp = refine_line([x_array[-1], x[0]],  [y_array[-1], y[0]], n_interp_line2line)
-                        up, vp = refine_line([u_array[-1], u[0]],  [v_array[-1], v[0]], n_interp_line2line)
-                        x_array = np.concatenate([x_array, xp], 0)
-                        y_array = np.concatenate([y_array, yp], 0)
-                        u_array = np.concatenate([u_array, up], 0)
-                        v_array = np.concatenate([v_array, vp], 0)
-                    
-                
-                x_array = np.concatenate([x_array, x], 0)
-                y_array = np.concatenate([y_array, y], 0)
-                u_array = np.concatenate([u_array, u], 0)
-                v_array = np.concatenate([v_array, v], 0)
-                
-                i += 1
-            
-            norm_line2line0 = norm(x_array[-1], y_array[-1], ex, ey)
-            norm_line2line1 = norm(u_array[-1], v_array[-1], ex, ey)
-            
-            if norm_line2line0 > dl  or  norm_line2line1 > dl:
-                n_interp_line2line = int(max(norm_line2line0, norm_line2line1) / dl)
-                
-                if n_interp_line2line < 2:
-                    n_interp_line2line = 2
-                
-                xp, yp = refine_line([x_array[-1], ex], [y_array[-1], ey], n_interp_line2line)
-                up, vp = refine_line([u_array[-1], ex], [v_array[-1], ey], n_interp_line2line)
-                x_array = np.concatenate([x_array, xp], 0)
-                y_array = np.concatenate([y_array, yp], 0)
-                u_array = np.concatenate([u_array, up], 0)
-                v_array = np.concatenate([v_array, vp], 0)
-            
-            #オフセット面の作成
-            x_m_array, y_m_array, u_m_array, v_m_array = make_offset_path(x_array, y_array, u_array, v_array, z_xy, z_uv, z_mach)
+            # Gコード生成と共通のカットパスを取得する
+            toolpath = toolpath_builder.get_toolpath(dxf_obj0.line_list, dxf_obj1.line_list, ox, oy, ex, ey, dl, z_xy, z_uv, z_mach)
+            length_sum = toolpath.length_sum
+            x_array = toolpath.x_array
+            y_array = toolpath.y_array
+            u_array = toolpath.u_array
+            v_array = toolpath.v_array
+            x_m_array = toolpath.x_m_array
+            y_m_array = toolpath.y_m_array
+            u_m_array = toolpath.u_m_array
+            v_m_array = toolpath.v_m_array
             
             
             if is_plot_3d == True:
@@ -1296,6 +778,8 @@ def rotate_origin(dxf_obj0, dxf_obj1, rotate_entry, messeage_window):
 
 
 if __name__ == "__main__":
+    # Exe化した場合に、dxfファイルを並列に読み込むプロセスから、メインウィンドウが起動しないようにする
+    freeze_support()
 
 
     #======================================================================================================================================
@@ -1309,6 +793,12 @@ if __name__ == "__main__":
     config.load_offset_func("%s\\offset_function.csv"%curdir)
     offset_function_read_messeage = config.MESSEAGE
     
+    # パスチェックとGコード生成で共通して用いるカットパスの作成
+    toolpath_builder = ToolpathBuilder()
+    
+    # XY面とUV面のdxfファイルを並列に読み込むプロセスプール（プロセスは初回の読み込み時に起動し、以降は再利用する）
+    load_executor = ProcessPoolExecutor(max_workers = 2)
+    
     #======================================================================================================================================
     #            rootインスタンスの生成
     #======================================================================================================================================
@@ -1586,6 +1076,11 @@ if __name__ == "__main__":
     load_btn1 = tk.Button(root, text="再読込", command = lambda: load_file(dxf1, filename_entry1, is_spline_refine, message_window))
     load_btn1.place(x=1600, y=70)    
 
+    #【X-Y, U-V dxfファイルの同時読込ボタン】
+    load_both_btn = tk.Button(root, text="XY/UV同時読込", command = lambda: load_file_concurrent(dxf0, filename_entry0, dxf1, filename_entry1, \
+                                                                                          is_spline_refine, message_window, load_executor))
+    load_both_btn.place(x=1060, y=35)
+
 
     #【X-Y用 オフセット距離反映ボタン】
     offset_btn0 = tk.Button(root, text="オフセット量設定", width = 15, bg='#fffacd', \
@@ -1683,7 +1178,7 @@ if __name__ == "__main__":
     #【パスチェックボタン】    
     path_check_btn = tk.Button(root, text = "パスチェック", height = 2, width = 12,font=("",12), bg='#3cb371', \
                            command = lambda: path_chk(root, dxf0, dxf1, cut_start_entry_x, cut_start_entry_y, cut_end_entry_x, cut_end_entry_y, \
-                                                      xy_dist_entry, uv_dist_entry, mech_dist_entry, dl_entry, is_3d_path_check, message_window))
+                                                      xy_dist_entry, uv_dist_entry, mech_dist_entry, dl_entry, is_3d_path_check, message_window, toolpath_builder))
     path_check_btn.place(x = 1530, y = 660)
     
 
@@ -1692,7 +1187,7 @@ if __name__ == "__main__":
     generate_g_code_btn = tk.Button(root, text = "Gコード生成", height = 2, width = 12,font=("",12), bg='#ff6347', \
                             command = lambda: gen_g_code(dxf0, dxf1, cut_start_entry_x, cut_start_entry_y, cut_end_entry_x, cut_end_entry_y, \
                                                          xy_dist_entry, uv_dist_entry, mech_dist_entry, cut_speed_entry, cut_speed_def_cb, cnc_speed_def_cb, \
-                                                         dl_entry, message_window, config))
+                                                         dl_entry, message_window, config, toolpath_builder))
     generate_g_code_btn.place(x = 1530, y = 720)
 
 
@@ -1728,3 +1223,4 @@ if __name__ == "__main__":
     #======================================================================================================================================
 
     tk.mainloop()
+    load_executor.shutdown()
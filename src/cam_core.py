@@ -0,0 +1,577 @@
+# -*- coding: utf-8 -*-
+"""カット速度・オフセット距離の設定からGコード生成までを、GUIによらず実行するライブラリ
+
+引数はtkinterのウィジェットではなく、数値・文字列などの値で与える。
+XY面とUV面の断面は、Section（GUIではSectionを継承したDxfFile）で与える。
+
+HWCAM.pyのボタンから呼び出される関数は、ウィジェットから値を取得し、本モジュールの関数を呼び出す。
+
+"""
+
+# 外部ライブラリ
+import numpy as np
+import datetime
+import os
+import traceback
+
+# 内部ライブラリ
+from cam_generic_lib import *
+from section import *
+from toolpath_builder import *
+from cam_global import *
+from error_log import *
+
+
+class Config:
+    """CAMで使用する設定値を格納するクラスである。
+
+    Attributes:
+        FILENAME_XY(str): デフォルトで読み込むXYのdxfファイル名（起動時にのみ変更）
+        FILENAME_UV(str): デフォルトで読み込むUVのdxfファイル名（起動時にのみ変更）
+        OX(float): 切り出しの始点座標
+        OY(float): 切り出しの始点座標
+        EX(float): 切り出しの終点座標
+        EY(float): 切り出しの終点座標
+        DELTA_LENGTH(float): G Codeの点群の間隔
+        XY_OFFSET_DIST(float): XY面のオフセット距離
+        UV_OFFSET_DIST(float): UV面のオフセット距離
+        CUTSPEED(float): カット速度
+        XY_DIST(float): XY断面とマシン駆動面との距離
+        UV_DIST(float): UV断面とマシン駆動面との距離
+        CS_DEF(str): カット速度を定義する面
+        CNC_CS_DEF(str): CNCコントローラーにおける速度指令値の解釈方法
+        MACH_DIST(float): マシン駆動面の距離
+        OFFSET_X(float): 原点のオフセット量
+        OFFSET_Y(float): 原点のオフセット量
+        ROTATE(float): 回転角度
+        HEADER(str): Gコードの書き出し文字列
+        X_STR(str): G01でのX軸名称
+        Y_STR(str): G01でのY軸名称
+        U_STR(str): G01でのU軸名称
+        V_STR(str): G01でのV軸名称
+        ARC_X_STR(str): G02/G03でのXY面の円弧中心(X方向)の名称
+        ARC_Y_STR(str): G02/G03でのXY面の円弧中心(Y方向)の名称
+        ARC_U_STR(str): G02/G03でのUV面の円弧中心(U方向)の名称。空欄の場合は円弧をG01で出力する
+        ARC_V_STR(str): G02/G03でのUV面の円弧中心(V方向)の名称。空欄の場合は円弧をG01で出力する
+        REFINE(bool): スプライン点列をリファインして読み込む
+        REMOVE_COLLISION(bool): オフセットによる交差を除去する
+        offset_function(function): オフセット距離の算出に使用する関数オブジェクト
+        MESSEAGE(str): 設定ファイル、溶け量ファイルの読み込み結果
+    """
+    def __init__(self):
+        """メンバ変数をデフォルト値に設定する
+        """
+        self.FILENAME_XY = "ファイル名を入力して下さい。"
+        self.FILENAME_UV = "ファイル名を入力して下さい。"
+        self.OX = 0.0
+        self.OY = 0.0
+        self.EX = 0.0
+        self.EY = 0.0
+        self.DELTA_LENGTH = 1.0
+        self.XY_OFFSET_DIST = 0.0
+        self.UV_OFFSET_DIST = 0.0
+        self.CUTSPEED = 200
+        self.XY_DIST = 25.0
+        self.UV_DIST = 50.0
+        self.CS_DEF = "Center"
+        self.CNC_CS_DEF = "XY"
+        self.MACH_DIST = 500
+        self.OFFSET_X = 0
+        self.OFFSET_Y = 0
+        self.ROTATE = 0
+        self.HEADER = "T1\nG17 G49 G54 G80 G90 G94 G21 G40 G64\n"
+        self.X_STR = 'X'
+        self.Y_STR = 'Y'
+        self.U_STR = 'Z'
+        self.V_STR = 'A'
+        self.ARC_X_STR = 'I'
+        self.ARC_Y_STR = 'J'
+        self.ARC_U_STR = ''
+        self.ARC_V_STR = ''
+        self.REFINE = False
+        self.REMOVE_COLLISION = False
+        x_data = [1,1000]
+        y_data = [0,0]
+        self.offset_function = generate_offset_function(x_data, y_data)
+
+    def load_config(self, file_path):
+        """file_pathで与えられるcsvファイルを開き、csvファイルから読み込んだ値をメンバ変数に設定する。問題があればデフォルト値を設定する
+
+        Args:
+            file_path (str): 設定ファイルのパス
+        """
+        try:
+            config_file = np.genfromtxt(file_path, delimiter = ",", skip_header = 1, dtype = str, encoding="shift-jis")
+            config_data = config_file[:,2]
+            self.FILENAME_XY = config_data[0]
+            self.FILENAME_UV = config_data[1]
+            self.OX = float(config_data[2])
+            self.OY = float(config_data[3])
+            self.EX = float(config_data[4])
+            self.EY = float(config_data[5])
+            self.DELTA_LENGTH = float(config_data[6])
+            self.XY_OFFSET_DIST = float(config_data[7])
+            self.UV_OFFSET_DIST = float(config_data[8])
+            self.CUTSPEED = float(config_data[9])
+            self.CS_DEF = str(config_data[10])
+            self.CNC_CS_DEF = str(config_data[11])
+            self.XY_DIST = float(config_data[12])
+            self.UV_DIST = float(config_data[13])
+            self.MACH_DIST = float(config_data[14])
+            self.OFFSET_X = float(config_data[15])
+            self.OFFSET_Y = float(config_data[16])
+            self.ROTATE = float(config_data[17])
+            self.HEADER = config_data[18].replace("\\n", "\n")
+            self.X_STR = str(config_data[19])
+            self.Y_STR = str(config_data[20])
+            self.U_STR = str(config_data[21])
+            self.V_STR = str(config_data[22])
+            if str(config_data[23]) == "ON":
+                self.REMOVE_COLLISION = True
+            else:
+                self.REMOVE_COLLISION = False
+
+            if str(config_data[24]) == "ON":
+                self.REFINE = True
+            else:
+                self.REFINE = False
+
+            # 円弧中心の名称は、項目がない古い設定ファイルの場合はデフォルト値とする
+            if len(config_data) > 28:
+                self.ARC_X_STR = str(config_data[25])
+                self.ARC_Y_STR = str(config_data[26])
+                self.ARC_U_STR = str(config_data[27])
+                self.ARC_V_STR = str(config_data[28])
+            else:
+                self.ARC_X_STR = 'I'
+                self.ARC_Y_STR = 'J'
+                self.ARC_U_STR = ''
+                self.ARC_V_STR = ''
+
+            self.MESSEAGE = "設定ファイルの読み込み成功\n"
+
+        except:
+            traceback.print_exc()
+            output_log(traceback.format_exc())
+            self.FILENAME_XY = "ファイル名を入力して下さい。"
+            self.FILENAME_UV = "ファイル名を入力して下さい。"
+            self.OX = 0.0
+            self.OY = 0.0
+            self.EX = 0.0
+            self.EY = 0.0
+            self.DELTA_LENGTH = 1.0
+            self.XY_OFFSET_DIST = 0.0
+            self.UV_OFFSET_DIST = 0.0
+            self.CUTSPEED = 200
+            self.CS_DEF = "Center"
+            self.CNC_CS_DEF = "XY"
+            self.XY_DIST = 25.0
+            self.UV_DIST = 50.0
+            self.MACH_DIST = 500
+            self.OFFSET_X = 0
+            self.OFFSET_Y = 0
+            self.ROTATE = 0
+            self.HEADER = "T1\nG17 G49 G54 G80 G90 G94 G21 G40 G64\n"
+            self.X_STR = 'X'
+            self.Y_STR = 'Y'
+            self.U_STR = 'Z'
+            self.V_STR = 'A'
+            self.ARC_X_STR = 'I'
+            self.ARC_Y_STR = 'J'
+            self.ARC_U_STR = ''
+            self.ARC_V_STR = ''
+            self.REFINE = False
+            self.REMOVE_COLLISION = False
+            self.MESSEAGE = "設定ファイルの読み込み失敗\n"
+            pass
+
+    def load_offset_func(self, file_path):
+        """file_pathで与えられるcsvファイルを開き、csvファイルから読み込んだ値からoffset_functionを更新する。問題があればデフォルト値を設定する
+
+        Args:
+            file_path (str): 溶け量ファイルのパス
+        """
+        try:
+            offset_function_file = np.genfromtxt(file_path, delimiter = ",", skip_header = 1, dtype = str, encoding="shift-jis")
+            x_data = offset_function_file[0,3:]
+            y_data = offset_function_file[1,3:]
+            x_data = x_data.astype(float)
+            y_data = y_data.astype(float)
+            self.offset_function = generate_offset_function(x_data, y_data)
+            self.MESSEAGE = "%sの読み込み成功\n"%file_path
+        except:
+            traceback.print_exc()
+            output_log(traceback.format_exc())
+            x_data = [1,1000]
+            y_data = [0,0]
+            self.offset_function = generate_offset_function(x_data, y_data)
+            self.MESSEAGE = "溶け量ファイルの読み込み失敗\n"
+
+
+def get_cutspeed(length_xy, length_uv, z_xy, z_uv, z_mach, cut_speed, cut_speed_def_value):
+    """XY面とUV面の線長から、各面でのカット速度を計算する
+
+    1. XY断面の線長とUV断面の線長から、ワークの中間点での線長を算出する
+
+    2. cut_speed_def_valueで指定した面でのカット速度がcut_speedとなるように、線長比から各面でのカット速度を算出する
+
+    3. ワーク端面（XY面, UV面）とマシン駆動面との距離（z_xy, z_uv, z_mach）から、ワーク端面でのカット速度を実現するマシン駆動面速度を算出する
+
+    Args:
+        length_xy (float): XY面の線長
+        length_uv (float): UV面の線長
+        z_xy (float): XY面とXY駆動面の距離
+        z_uv (float): UV面とUV駆動面の距離
+        z_mach (float): CNC駆動面間の距離
+        cut_speed (float): カット速度
+        cut_speed_def_value (str): カット速度を定義する面("XY(Mech)", "XY(Work)", "Center", "UV(Work)", "UV(Mech)")
+
+    Returns:
+        float: XY駆動面でのカット速度
+        float: XY面でのカット速度
+        float: ワークの中間点でのカット速度
+        float: UV面でのカット速度
+        float: UV駆動面でのカット速度
+    """
+    z_work_mid = (z_mach - z_xy - z_uv)/2.0 + z_xy
+    l_xy_work = np.abs(z_work_mid - z_xy)
+    l_uv_work = np.abs((z_mach - z_uv) - z_work_mid)
+    l_xy_mach = np.abs(z_work_mid)
+    l_uv_mach = np.abs(z_mach - z_work_mid)
+
+    if l_xy_work == 0 or l_uv_work == 0:
+        k_xy = 1.0
+        k_uv = 1.0
+    else:
+        k_xy = l_xy_mach/ l_xy_work
+        k_uv = l_uv_mach/ l_uv_work
+
+    length_mid = (length_xy + length_uv)/ 2.0
+    dl_XY = length_xy - length_mid
+    dl_UV = length_uv - length_mid
+
+    length_XY_Mech = k_xy*dl_XY + length_mid
+    length_UV_Mech = k_uv*dl_UV + length_mid
+
+    if cut_speed_def_value == "XY(Mech)":
+        length_def = length_XY_Mech
+    elif cut_speed_def_value == "XY(Work)":
+        length_def = length_xy
+    elif cut_speed_def_value == "Center":
+        length_def = length_mid
+    elif cut_speed_def_value == "UV(Work)":
+        length_def = length_uv
+    else: # cut_speed_def_value == "UV(Mech)"
+        length_def = length_UV_Mech
+
+    ratio_XY_Mech = length_XY_Mech/length_def
+    ratio_XY_Work = length_xy/length_def
+    ratio_mid = length_uv/length_def
+    ratio_UV_Work = length_uv/length_def
+    ratio_UV_Mech = length_UV_Mech/length_def
+
+    cs_xy_mech = cut_speed*ratio_XY_Mech
+    cs_xy_work = cut_speed*ratio_XY_Work
+    cs_mid = cut_speed*ratio_mid
+    cs_uv_work = cut_speed*ratio_UV_Work
+    cs_uv_mech = cut_speed*ratio_UV_Mech
+
+    return cs_xy_mech, cs_xy_work, cs_mid, cs_uv_work, cs_uv_mech
+
+
+def apply_cut_speed(section0, section1, z_xy, z_uv, z_mach, cut_speed, cut_speed_def_value):
+    """XY面とUV面の線に、get_cutspeedで計算したカット速度を設定する
+
+    XY面とUV面で線の本数が一致しない場合は、すべての線のカット速度をcut_speedとする。
+
+    Args:
+        section0 (Section): XY面の断面
+        section1 (Section): UV面の断面
+        z_xy (float): XY面とXY駆動面の距離
+        z_uv (float): UV面とUV駆動面の距離
+        z_mach (float): CNC駆動面間の距離
+        cut_speed (float): カット速度
+        cut_speed_def_value (str): カット速度を定義する面
+    """
+    if len(section0.line_list) == len(section1.line_list):
+        i = 0
+        while i < len(section0.line_list):
+            line0 = section0.line_list[i]
+            line1 = section1.line_list[i]
+
+            line0_length = line0.get_length()
+            line1_length = line1.get_length()
+
+            cs_xy_mech, cs_xy_work, cs_mid, cs_uv_work, cs_uv_mech = \
+                get_cutspeed(line0_length, line1_length, z_xy, z_uv, z_mach, \
+                                         cut_speed, cut_speed_def_value)
+
+            line0.set_cutspeed(cs_xy_work, cs_xy_mech)
+            line1.set_cutspeed(cs_uv_work, cs_uv_mech)
+            i += 1
+
+    else:
+        for line0 in section0.line_list:
+            line0.set_cutspeed(cut_speed, cut_speed)
+
+        for line1 in section1.line_list:
+            line1.set_cutspeed(cut_speed, cut_speed)
+
+
+def apply_offset_function(section0, section1, z_xy, z_uv, z_mach, cut_speed, cut_speed_def_value, offset_function):
+    """XY面とUV面の線に、カット速度と、カット速度における溶け量をキャンセルするオフセット距離を設定する
+
+    線ごとにget_cutspeedでワーク端面でのカット速度を計算し、offset_functionにより溶け量を推定する。
+
+    Args:
+        section0 (Section): XY面の断面
+        section1 (Section): UV面の断面
+        z_xy (float): XY面とXY駆動面の距離
+        z_uv (float): UV面とUV駆動面の距離
+        z_mach (float): CNC駆動面間の距離
+        cut_speed (float): カット速度
+        cut_speed_def_value (str): カット速度を定義する面
+        offset_function (function): カット速度から溶け量を算出する関数
+
+    Note:
+        XY面とUV面で線の本数が一致していること。
+    """
+    i = 0
+    while i < len(section0.line_list):
+
+        line0 = section0.line_list[i]
+        line1 = section1.line_list[i]
+
+        line0_length = line0.get_length()
+        line1_length = line1.get_length()
+
+        cs_xy_mech, cs_xy_work, cs_mid, cs_uv_work, cs_uv_mech = \
+            get_cutspeed(line0_length, line1_length, z_xy, z_uv, z_mach, \
+                                     cut_speed, cut_speed_def_value)
+        offset_XY_Work = offset_function(cs_xy_work)
+        offset_UV_Work = offset_function(cs_uv_work)
+        line0.set_offset_dist(offset_XY_Work)
+        line1.set_offset_dist(offset_UV_Work)
+
+        line0.set_cutspeed(cs_xy_work, cs_xy_mech)
+        line1.set_cutspeed(cs_uv_work, cs_uv_mech)
+
+        i += 1
+
+
+def remove_section_collision(section, name):
+    """オフセットにより生じた自己交差・隣り合う線の交差を修正し、すべての線同士の交差を検出する
+
+    Args:
+        section (Section): 断面
+        name (str): メッセージに表示する断面の名称
+
+    Returns:
+        list: 修正・検出結果のメッセージのリスト
+    """
+    messeage_list = []
+    self_collision_list = section.remove_self_collision()
+    collision_line_list = section.remove_line_collision()
+    cross_line_list = section.detect_line_collision()
+
+    for num in self_collision_list:
+        messeage_list.append("%sの%s番目の線で自己交差を修正しました。形状に問題がないかをチェックしてください。\n"%(name, num))
+    for nums in collision_line_list:
+        messeage_list.append("%sの%s本目と%s本目の線で自己交差を修正しました。形状に問題がないかをチェックしてください。\n"%(name, nums[0], nums[1]))
+    for nums in cross_line_list:
+        messeage_list.append("%sの%s本目と%s本目の線が交差しています。自動では修正されないので、オフセット量と形状をチェックしてください。\n"%(name, nums[0], nums[1]))
+
+    return messeage_list
+
+
+def check_mach_dist(z_xy, z_uv, z_mach):
+    """XY面距離、UV面距離が、駆動面距離を超えていないかを判定する
+
+    Args:
+        z_xy (float): XY面とXY駆動面の距離
+        z_uv (float): UV面とUV駆動面の距離
+        z_mach (float): CNC駆動面間の距離
+
+    Returns:
+        list: 警告メッセージのリスト。問題がない場合は空のリスト
+    """
+    messeage_list = []
+    if z_xy > z_mach:
+        messeage_list.append("【警告】\nXY面距離が駆動面距離に対して%s mm 長いです。\n入力値を確認してください。\n\n"%(z_xy - z_mach))
+    if z_uv > z_mach:
+        messeage_list.append("【警告】\nUV面距離が駆動面距離に対して%s mm 長いです。\n入力値を確認してください。\n\n"%(z_uv - z_mach))
+    return messeage_list
+
+
+def iter_g_code(toolpath, section0, section1, ox, oy, ex, ey, cnc_cs_def, config, stats = None):
+    """カットパスから、Gコードの文字列をブロックごとに生成する
+
+    ヘッダ，始点への移動，各ラインのG01ブロック，終点への移動，M02を，1ブロックずつ生成する．
+    軸名はconfig.X_STR, Y_STR, U_STR, V_STRを書式文字列に埋め込んで出力し，ヘッダ等のその他の文字列は置換しない．
+
+    * SIMPLIFY_PATHがTrueの場合，simplify_pathによりxy平面とuv平面の点列を許容誤差以内で間引く．
+
+    * ARC_DIRECT_OUTPUTがTrueの場合，駆動面上で円弧となる線(seg.arc)をgen_g_code_arc_block_strによりG02/G03の1行で出力する．
+
+    * ARC_FITTINGがTrueの場合，gen_g_code_arc_strにより円弧とみなせる点列をG02/G03に置き換える．
+
+    G02/G03の円弧中心の名称はconfig.ARC_X_STR, ARC_Y_STR, ARC_U_STR, ARC_V_STRとし，
+    いずれかが空欄の場合（円弧の書式がない場合）は，円弧もG01で出力する．
+
+    Args:
+        toolpath (Toolpath): ToolpathBuilderで作成したカットパス
+        section0 (Section): XY面の断面
+        section1 (Section): UV面の断面
+        ox (float): カット開始点のx座標
+        oy (float): カット開始点のy座標
+        ex (float): カット終了点のx座標
+        ey (float): カット終了点のy座標
+        cnc_cs_def (str): CNCコントローラーにおける速度指令値の解釈方法
+        config (Config): ヘッダ、軸名を格納した設定値
+        stats (dict, optional): カット部分の点数("n_point")と移動指令の行数("n_block")を集計する辞書. Defaults to None.
+
+    Yields:
+        str: Gコードの文字列
+    """
+    # 軸名を埋め込んだG01, G02/G03の書式文字列を、あらかじめ作成しておく
+    axis_str = (config.X_STR, config.Y_STR, config.U_STR, config.V_STR)
+    center_str = (config.ARC_X_STR, config.ARC_Y_STR, config.ARC_U_STR, config.ARC_V_STR)
+    line_format = make_g_code_line_format(cnc_cs_def, axis_str)
+    arc_format = make_g_code_line_format(cnc_cs_def, axis_str, is_arc = True, center_str = center_str)
+
+    # ヘッダ
+    yield config.HEADER
+
+    #Ver2.0　変更 Gコード出力形式
+    yield "G00 %s%f %s%f %s%f %s%f\n"%(axis_str[0], ox, axis_str[1], oy, axis_str[2], ox, axis_str[3], oy)
+
+    x0 = ox
+    y0 = oy
+    u0 = ox
+    v0 = oy
+
+    for seg in toolpath.segments:
+        # カット開始点と、カット開始点・終了点との補完点列は、Gコードに出力しない
+        if (seg.kind == "start") or (seg.kind == "connector"):
+            continue
+
+        # カット速度は、区間に対応する線から取得する
+        cs_xy = section0.line_list[seg.line_index].cutspeed_mech
+        cs_uv = section1.line_list[seg.line_index].cutspeed_mech
+
+        x_m = seg.x_m
+        y_m = seg.y_m
+        u_m = seg.u_m
+        v_m = seg.v_m
+        if SIMPLIFY_PATH == True:
+            # 前の線の終端点を始点として間引き、前の線の終端点を除いて出力する
+            index = simplify_path(np.append(x0, x_m), np.append(y0, y_m), np.append(u0, u_m), np.append(v0, v_m), TOL_SIMPLIFY_PATH)
+            index = index[1:] - 1
+            x_m = np.asarray(x_m)[index]
+            y_m = np.asarray(y_m)[index]
+            u_m = np.asarray(u_m)[index]
+            v_m = np.asarray(v_m)[index]
+
+        if (ARC_DIRECT_OUTPUT == True) and not(seg.arc is None) and not(arc_format is None):
+            # 円弧同士の線は、G02/G03で直接出力する
+            g_code_str = gen_g_code_arc_block_str(x_m, y_m, u_m, v_m, x0, y0, u0, v0, seg.arc, cs_xy, cs_uv, cnc_cs_def, \
+                                                  line_format, arc_format)
+        elif (ARC_FITTING == True) and not(arc_format is None):
+            g_code_str = gen_g_code_arc_str(x_m, y_m, u_m, v_m, x0, y0, u0, v0, cs_xy, cs_uv, cnc_cs_def, \
+                                            TOL_ARC_FITTING, line_format, arc_format)
+        else:
+            g_code_str = gen_g_code_line_str(x_m, y_m, u_m, v_m, x0, y0, u0, v0, cs_xy, cs_uv, cnc_cs_def, line_format)
+
+        # 点列の間引き・円弧補完による行数の削減量を集計する
+        if stats != None:
+            stats["n_point"] += len(seg.x_m)
+            stats["n_block"] += g_code_str.count("\n")
+        yield g_code_str
+        x0 = seg.x_m[-1]
+        y0 = seg.y_m[-1]
+        u0 = seg.u_m[-1]
+        v0 = seg.v_m[-1]
+
+    #Ver2.0　変更 Gコード出力形式
+    yield gen_g_code_line_str([ex], [ey], [ex], [ey], x0, y0, u0, v0, cs_xy, cs_uv, cnc_cs_def, line_format)
+    yield "M02"
+
+
+def make_g_code_filename(section0, section1, cut_speed):
+    """Gコードの保存名を作成する
+
+    保存名は 「XY面のファイル名,UV面のファイル名,カット速度_日付.nc」とする．
+
+    Args:
+        section0 (Section): XY面の断面
+        section1 (Section): UV面の断面
+        cut_speed (float): カット速度
+
+    Returns:
+        str: Gコードの保存名
+    """
+    time_str = datetime.datetime.now().strftime('%Y%m%d_%H%M%S')
+    name0 = os.path.splitext(os.path.basename(section0.filename))[0]
+    name1 = os.path.splitext(os.path.basename(section1.filename))[0]
+    return "%s,%s,%s_%s.nc"%(name0, name1, cut_speed, time_str)
+
+
+def generate_g_code(section0, section1, ox, oy, ex, ey, z_xy, z_uv, z_mach, dl, cut_speed, cnc_cs_def, config, toolpath_builder, \
+                    output_filename = None):
+    """XY面とUV面の断面からカットパスを作成し、Gコードをファイルに書き込む
+
+    Gコードは、iter_g_codeから生成した順にファイルへ逐次書き込む．
+    書き込み途中でエラーが発生した場合は，書きかけのファイルを削除し，例外をそのまま送出する．
+
+    カット速度は、あらかじめapply_cut_speedなどにより線に設定しておくこと。
+
+    Args:
+        section0 (Section): XY面の断面
+        section1 (Section): UV面の断面
+        ox (float): カット開始点のx座標
+        oy (float): カット開始点のy座標
+        ex (float): カット終了点のx座標
+        ey (float): カット終了点のy座標
+        z_xy (float): XY面とXY駆動面の距離
+        z_uv (float): UV面とUV駆動面の距離
+        z_mach (float): CNC駆動面間の距離
+        dl (float): 分割距離。0.1未満の場合は0.1とする
+        cut_speed (float): カット速度（保存名に用いる）
+        cnc_cs_def (str): CNCコントローラーにおける速度指令値の解釈方法
+        config (Config): ヘッダ、軸名を格納した設定値
+        toolpath_builder (ToolpathBuilder): カットパスを作成するオブジェクト
+        output_filename (str, optional): 保存名。Noneの場合はmake_g_code_filenameで作成する. Defaults to None.
+
+    Returns:
+        str: 保存名
+        dict: カット部分の点数("n_point")と移動指令の行数("n_block")
+
+    Raises:
+        ValueError: XY面とUV面で線の本数が一致しない場合
+    """
+    if not(len(section0.line_list) == len(section1.line_list)):
+        raise ValueError("XY座標とUV座標でライン数が一致しません。XY：%s本，UV：%s本\n"%(len(section0.line_list), len(section1.line_list)))
+
+    if dl < 0.1:
+        dl = 0.1
+
+    # パスチェックと共通のカットパスを取得する
+    toolpath = toolpath_builder.get_toolpath(section0.line_list, section1.line_list, ox, oy, ex, ey, dl, z_xy, z_uv, z_mach)
+
+    if output_filename is None:
+        output_filename = make_g_code_filename(section0, section1, cut_speed)
+
+    # 生成したGコードを、ブロックごとにファイルへ書き込む
+    stats = {"n_point":0, "n_block":0}
+    f = open(output_filename,'w')
+    try:
+        for g_code_str in iter_g_code(toolpath, section0, section1, ox, oy, ex, ey, cnc_cs_def, config, stats):
+            f.write(g_code_str)
+        f.close()
+    except:
+        # 書きかけのファイルは残さない
+        f.close()
+        os.remove(output_filename)
+        raise
+
+    return output_filename, stats
@@ -4,7 +4,6 @@
 """
 # 外部ライブラリ
 import numpy as np
-from matplotlib import pyplot as plt
 from scipy import interpolate as intp
 from scipy.integrate import quad
 from scipy.optimize import fmin
@@ -47,9 +46,8 @@ def offset_line(x, y, d, interp_mode):
 
         https://stackoverflow.com/questions/32772638/python-how-to-get-the-x-y-coordinates-of-a-offset-spline-from-a-x-y-list-of-poi
     """
-    new_x = []
-    new_y = []
-    k = 0
+    x = np.asarray(x)
+    y = np.asarray(y)
     
     # 点の場合はオフセット方向を定義できないので、オフセットせずに元の点列を出力する
     if len(x) < 2: 
@@ -58,53 +56,43 @@ def offset_line(x, y, d, interp_mode):
     # 線分の場合、始点と終点で傾きは同じなので、同じkを用いてそれぞれオフセットする
     if len(x) == 2:
         k = np.arctan2((y[1]-y[0]), (x[1]-x[0]))
-        new_x.append(x[0] - d*np.sin(k))
-        new_x.append(x[1] - d*np.sin(k))
-        new_y.append(y[0] + d*np.cos(k))
-        new_y.append(y[1] + d*np.cos(k))
+        new_x = x - d*np.sin(k)
+        new_y = y + d*np.cos(k)
 
     # スプラインの場合
+    # 座標点ごとのループを避けるため、傾きkは配列としてまとめて計算する
     if len(x) > 2:
         # ポリラインの場合、角が失われないように、線の端点をそれぞれオフセットする（点の数は2倍になる）
         if interp_mode == "linear" and len(x)%2 == 0:
-            num = 0
-            while num < len(x)/2:
-                i = num * 2
-                if x[i] == x[i+1]:
-                    k = np.pi/2.0
-                else:
-                    k = np.arctan2((y[i+1]-y[i]), (x[i+1]-x[i]))
-
-                new_x.append(x[i]   - d*np.sin(k))
-                new_x.append(x[i+1] - d*np.sin(k))
-                new_y.append(y[i]   + d*np.cos(k))
-                new_y.append(y[i+1] + d*np.cos(k))
-
-                num += 1
+            # 偶数番目が線分の始点、奇数番目が線分の終点
+            x_st = x[0::2]
+            y_st = y[0::2]
+            x_ed = x[1::2]
+            y_ed = y[1::2]
+            k = np.arctan2((y_ed - y_st), (x_ed - x_st))
+            # y軸と並行な線分は、向きによらずk=pi/2とする
+            k = np.where(x_st == x_ed, np.pi/2.0, k)
+            
+            # 線分の始点と終点に、同じkを用いる
+            k = np.repeat(k, 2)
+            new_x = x - d*np.sin(k)
+            new_y = y + d*np.cos(k)
             
         else:
             # スプラインの場合、始点と中点以外は、１つ先と１つ前の点を用いて傾きを計算する
+            # 始点は始点と１つ先の点、終点は１つ前の点と終点を用いる
+            x_fw = np.concatenate([x[1:2], x[2:], x[-1:]])
+            y_fw = np.concatenate([y[1:2], y[2:], y[-1:]])
+            x_bw = np.concatenate([x[0:1], x[:-2], x[-2:-1]])
+            y_bw = np.concatenate([y[0:1], y[:-2], y[-2:-1]])
+            
             # 点列の間隔が狭い場合、傾きが正常に計算できないことがあるので、近傍点の場合(normがDIST_NEAR未満の場合）はスキップする
-            i = 0
-            while i < len(x):
-                if i == 0:
-                    if norm(x[0],y[0],x[1],y[1])>DIST_NEAR:
-                        k = np.arctan2((y[1]-y[0]), (x[1]-x[0]))
-                        new_x.append(x[0] - d*np.sin(k))      
-                        new_y.append(y[0] + d*np.cos(k))
-                elif i == len(x) - 1:
-                    if norm(x[i-1],y[i-1],x[i],y[i])>DIST_NEAR:
-                        k = np.arctan2((y[i]-y[i-1]), (x[i]-x[i-1]))
-                        new_x.append(x[i] - d*np.sin(k))      
-                        new_y.append(y[i] + d*np.cos(k))                    
-                else:
-                    if norm(x[i-1],y[i-1],x[i+1],y[i+1])>DIST_NEAR:
-                        k = np.arctan2((y[i+1]-y[i-1]), (x[i+1]-x[i-1]))
-                        new_x.append(x[i] - d*np.sin(k))      
-                        new_y.append(y[i] + d*np.cos(k))
-                i += 1
+            mask = norm(x_bw, y_bw, x_fw, y_fw) > DIST_NEAR
+            k = np.arctan2((y_fw - y_bw)[mask], (x_fw - x_bw)[mask])
+            new_x = x[mask] - d*np.sin(k)
+            new_y = y[mask] + d*np.cos(k)
 
-    return np.array(new_x), np.array(new_y)
+    return np.array(new_x, dtype = float), np.array(new_y, dtype = float)
 
 
 def norm(x0, y0, x, y):
@@ -167,7 +155,7 @@ def remove_same_point(x, y):
         
     return new_x, new_y
 
-def get_spline_length_array(x, y):
+def get_spline_length_array(x, y, n_gauss = N_GAUSS_LENGTH):
     """与えられた座標点列に対して、始点からi番目の座標点までの線長を計算した配列を出力する
 
     線長は、以下で計算する。x,yの微分は、x,y座標配列を媒介変数形式の3次スプラインで補完した後、媒介変数で微分する。
@@ -177,6 +165,83 @@ def get_spline_length_array(x, y):
 
         \\Delta l=\\sqrt{(\\frac{\\text{d}x}{\\text{d}t})^2 + (\\frac{\\text{d}y}{\\text{d}t})^2 }
 
+    各区間の積分は、n_gauss点のガウス・ルジャンドル求積により、全区間分をまとめて計算する。
+
+    .. math::
+        \\int_{t_i}^{t_{i+1}}\\Delta l(t) dt \\approx h_i\\sum_{k=1}^{n}w_k\\Delta l(m_i + h_i\\xi_k)
+
+        m_i = \\frac{t_{i+1}+t_i}{2},\\ h_i = \\frac{t_{i+1}-t_i}{2}
+
+    3次スプラインの微分は2次多項式なので、被積分関数はほとんどの区間で滑らかであり、少ない分点数で十分な精度が得られる。
+
+    ただし、dx/dt, dy/dtが同時にゼロ付近となる区間（点列が折り返す箇所）では被積分関数が尖るため、精度が低下する。
+    このため、区間を2分割して求積した値との差がTOL_GAUSS_LENGTHを超える区間のみ、quadによる適応積分で計算し直す。
+    
+    n_gaussが0以下の場合は、検証用にすべての区間をquadによる適応積分で計算する（get_spline_length_array_quad）。
+
+    Args:
+        x (numpy.array): x座標点列
+        y (numpy.array): y座標点列
+        n_gauss (int, optional): ガウス・ルジャンドル求積の分点数. Defaults to N_GAUSS_LENGTH.
+
+    Returns:
+        np.array: 始点からi番目の座標点までの線長を計算した配列
+    """
+
+    # 分点数が0以下の場合は、quadによる適応積分で計算する
+    if n_gauss <= 0:
+        return get_spline_length_array_quad(x, y)
+
+    dt = 1
+    t_p = np.linspace(0, dt * len(x), len(x)) #媒介変数
+
+    # 媒介変数で3次スプライン補完
+    # 補完アルゴリズムを簡単に変更できるように、slprevは用いていない
+    fx_t = intp.CubicSpline(t_p, x)
+    fy_t = intp.CubicSpline(t_p, y)
+    
+    # 微分値を計算
+    dfx_t = fx_t.derivative(1)
+    dfy_t = fy_t.derivative(1)
+
+    # ガウス・ルジャンドル求積の分点と重み（区間[-1, 1]）
+    xi, w = np.polynomial.legendre.leggauss(int(n_gauss))
+
+    # 区間[a, b]の積分値を、全区間まとめて計算する関数
+    def gauss_legendre(a, b):
+        # 全区間の分点を(区間数, 分点数)の配列として作成
+        m = (b + a)/2.0
+        h = (b - a)/2.0
+        t = m[:, np.newaxis] + h[:, np.newaxis]*xi[np.newaxis, :]
+        # 全分点でのdlを一括で計算し、区間ごとに積分
+        fdl = np.sqrt(dfx_t(t)**2 + dfy_t(t)**2)
+        return h * np.dot(fdl, w)
+
+    # 区間をそのまま求積した値と、2分割して求積した値を計算
+    t_st = t_p[:-1]
+    t_ed = t_p[1:]
+    t_md = (t_st + t_ed)/2.0
+    dl_coarse = gauss_legendre(t_st, t_ed)
+    dl = gauss_legendre(t_st, t_md) + gauss_legendre(t_md, t_ed)
+
+    # 両者の差が大きい区間（被積分関数が尖る区間）のみ、quadで計算し直す
+    fdl = lambda t: np.sqrt(dfx_t(t)**2 + dfy_t(t)**2)
+    for i in np.flatnonzero(np.abs(dl - dl_coarse) > TOL_GAUSS_LENGTH):
+        dl[i] = quad(fdl, t_st[i], t_ed[i])[0]
+
+    # i番目までの線長を配列に格納
+    length_array = np.zeros(len(t_p))
+    length_array[1:] = np.cumsum(dl)
+
+    return length_array
+
+
+def get_spline_length_array_quad(x, y):
+    """与えられた座標点列に対して、始点からi番目の座標点までの線長を、quadによる適応積分で計算した配列を出力する
+
+    get_spline_length_arrayと同じ線長を、区間ごとにquadで数値積分して計算する。
+    計算は遅いが精度が保証されているので、get_spline_length_arrayの検証用として用いる。
+
     Args:
         x (numpy.array): x座標点列
         y (numpy.array): y座標点列
@@ -193,7 +258,6 @@ def get_spline_length_array(x, y):
     t_p = np.linspace(0, dt * len(x), len(x)) #媒介変数
 
     # 媒介変数で3次スプライン補完
-    # 補完アルゴリズムを簡単に変更できるように、slprevは用いていない
     fx_t = intp.CubicSpline(t_p, x)
     fy_t = intp.CubicSpline(t_p, y)
     
@@ -407,6 +471,36 @@ def refine_line(x, y, N):
 
     return xp, yp
 
+def generate_arc_length_curve(line):
+    """スプラインの線長を正規化した媒介変数で、座標点列を補完する曲線(ArcLengthCurve)を作成する
+
+    媒介変数は、始点からi番目の座標点までの線長を、全体の線長で0~1に正規化した値とする。
+
+    曲線は、座標点列が更新されるまで再利用できるので、LineObjectのcacheに格納する。
+    よって、分割点数を変えて再分割する場合も、区間の探索と多項式の評価のみで座標点列を作成できる。
+
+    Args:
+        line (LineObject): LineObjectクラスのインスタンス。line_typeは"spline"であること
+
+    Returns:
+        ArcLengthCurve: 線長を正規化した媒介変数から、x, y座標を補完する曲線
+    """
+    
+    def calc_curve():
+        # スプラインが1次スプラインの場合、linearで補完
+        if line.interp_mode == "linear":
+            kind = "linear"
+        # 角の存在を想定する場合、PCHIPで補完
+        elif USE_PCHIP == True:
+            kind = "pchip"
+        # CADに厳密に補完方法を合わせたい場合、cubicで補完
+        else:
+            kind = "cubic"
+        return ArcLengthCurve(line.x, line.y, line.calc_length_array(), kind)
+    
+    return line.get_cache(("arc_length_curve", line.interp_mode, USE_PCHIP), calc_curve)
+
+
 def generate_arc_length_points(line, N):
     """線を等間隔分割した座標点を算出する
 
@@ -416,6 +510,8 @@ def generate_arc_length_points(line, N):
 
     スプラインの場合、スプライン補完関数により線長をN等分した配列を出力する。
 
+    円弧(ArcObject)の場合、中心角をN等分した配列を出力する。
+
     スプラインで線長をN等分する場合、i(i=0...N）点目までの線長を計算し、
     これを0~1に正規化した媒介変数を用いて座標点列を補完することで、
     等間隔の媒介変数を用いて補完点列を作成すると、出力される座標点列の間隔も
@@ -431,6 +527,9 @@ def generate_arc_length_points(line, N):
 
     スプライン補完の補完方法は、CADと同じ3次スプラインと、角があっても線がうねらない
     PCHIPアルゴリズムをUSE_PCHIPにより選択できるようにする。
+    
+    線分とスプラインの分割点列は、LineObjectのcacheに格納し、座標点列が更新されるまで再利用する。
+    呼び出し側で分割点列を変更してもcacheに影響しないように、cacheの複製を出力する。
 
     Args:
         line (LineObject): LineObjectクラスのインスタンス
@@ -453,57 +552,210 @@ def generate_arc_length_points(line, N):
     if line.line_type == "point":  
         x_p = [x]*N
         y_p = [y]*N
+        return x_p, y_p
     
     # 線分の場合、refine_lineにより等間隔点列作成
     if line.line_type == "line":  
-        x_p, y_p = refine_line(x, y, N)
+        x_p, y_p = line.get_cache(("arc_length_points", N), lambda: refine_line(x, y, N))
 
     # スプラインの場合
     if line.line_type == "spline":
-        # 線長を正規化した配列（t_p）を作成
-        length_array = line.calc_length_array()
-        sum_length = length_array[-1]
-        t_p = length_array/sum_length
-        
-        # スプラインが1次スプラインの場合、linearで補完関数を作成
-        if line.interp_mode == "linear":
-            # t_pを媒介変数として補完
-            fx_t = intp.interp1d(t_p, x, kind = "linear")
-            fy_t = intp.interp1d(t_p, y, kind = "linear")
-            
-            # 等間隔な媒介変数を作成
-            t_p_arc = np.linspace(t_p[0], t_p[-1], N)
-            
-            # ポリラインの場合、角の情報が失われないように、オリジナル点列を追加する
-            # t_pは元の座標点に対応する
-            t_p_arc_add_orgine_point = np.append(t_p, t_p_arc)
-            t_p_arc_add_orgine_point = np.sort(t_p_arc_add_orgine_point)              
-                    
-            # 補完後の点列を作成
-            x_p = fx_t(t_p_arc_add_orgine_point)
-            y_p = fy_t(t_p_arc_add_orgine_point)
+        x_p, y_p = line.get_cache(("arc_length_points", line.interp_mode, USE_PCHIP, N), 
+                                  lambda: calc_spline_arc_length_points(line, N))
+    
+    # 円弧(ArcObject)の場合、中心角をN等分して点列作成
+    if line.line_type == "arc":
+        x_p, y_p = line.get_cache(("arc_length_points", N), lambda: line.calc_arc_point(np.linspace(0, 1, N)))
             
-        # スプラインが3次スプラインの場合、cubicまたはPCHIPで補完関数を作成
-        else:
-            # 角の存在を想定する場合、PCHIPで補完
-            if USE_PCHIP == True:
-                fx_t = intp.PchipInterpolator(t_p, x)
-                fy_t = intp.PchipInterpolator(t_p, y) 
-            # CADに厳密に補完方法を合わせたい場合、cubicで補完
-            else:
-                fx_t = intp.CubicSpline(t_p, x)
-                fy_t = intp.CubicSpline(t_p, y)
+    return np.array(x_p), np.array(y_p)
 
-            # 等間隔な媒介変数を作成
-            t_p_arc = np.linspace(t_p[0], t_p[-1], N)
-            
-            # 補完後の点列を作成
-            x_p = fx_t(t_p_arc)
-            y_p = fy_t(t_p_arc)
-            
+
+def calc_spline_arc_length_points(line, N):
+    """スプラインを、線長に対して等間隔にN分割した座標点列を計算する
+
+    generate_arc_length_pointsから呼び出される。曲線はgenerate_arc_length_curveにより取得する。
+
+    Args:
+        line (LineObject): LineObjectクラスのインスタンス。line_typeは"spline"であること
+        N (int): 等間隔分割点数
+
+    Returns:
+        numpy.array: 等間隔分割後のx座標点列
+        numpy.array: 等間隔分割後のy座標点列
+    """
+    curve = generate_arc_length_curve(line)
+    
+    # 等間隔な媒介変数を作成
+    t_p_arc = np.linspace(curve.t_p[0], curve.t_p[-1], N)
+    
+    # スプラインが1次スプラインの場合
+    if line.interp_mode == "linear":
+        # ポリラインの場合、角の情報が失われないように、オリジナル点列を追加する
+        # t_pは元の座標点に対応する
+        t_p_arc_add_orgine_point = np.append(curve.t_p, t_p_arc)
+        t_p_arc_add_orgine_point = np.sort(t_p_arc_add_orgine_point)              
+                
+        # 補完後の点列を作成
+        x_p, y_p = curve.evaluate(t_p_arc_add_orgine_point)
+    
+    # スプラインが3次スプラインの場合
+    else:
+        # 補完後の点列を作成
+        x_p, y_p = curve.evaluate(t_p_arc)
+        
     return x_p, y_p
 
 
+def calc_line_point_and_curvature(line, t):
+    """線長を正規化した媒介変数tにおける、線上の座標点と曲率を計算する
+
+    点の場合は、同じ座標と曲率0を出力する。線分、1次スプラインの場合は、曲率は0とする。
+    円弧(ArcObject)の場合は、曲率は半径の逆数とする。
+    3次スプラインの場合は、generate_arc_length_curveの曲線の1階、2階微分から曲率を計算する。
+
+    .. math::
+        \\kappa = \\frac{\\left|x'y''-y'x''\\right|}{\\left(x'^2+y'^2\\right)^{3/2}}
+
+    Args:
+        line (LineObject): LineObjectクラスのインスタンス
+        t (numpy.array): 線長を0~1に正規化した媒介変数
+
+    Returns:
+        numpy.array: x座標点列
+        numpy.array: y座標点列
+        numpy.array: 曲率
+    """
+    if line.line_type == "point":
+        return np.full(len(t), line.x, dtype = float), np.full(len(t), line.y, dtype = float), np.zeros(len(t))
+    
+    if line.line_type == "line":
+        x = line.x[0] + t*(line.x[-1] - line.x[0])
+        y = line.y[0] + t*(line.y[-1] - line.y[0])
+        return x, y, np.zeros(len(t))
+    
+    # 円弧(ArcObject)の場合、曲率は半径の逆数
+    if line.line_type == "arc":
+        x, y = line.calc_arc_point(t)
+        return x, y, np.full(len(t), 1.0/line.r)
+    
+    curve = generate_arc_length_curve(line)
+    x, y = curve.evaluate(t)
+    if line.interp_mode == "linear":
+        kappa = np.zeros(len(t))
+    else:
+        dx, dy = curve.evaluate(t, 1)
+        ddx, ddy = curve.evaluate(t, 2)
+        with np.errstate(divide = "ignore", invalid = "ignore"):
+            kappa = np.abs(dx*ddy - dy*ddx)/(dx**2 + dy**2)**1.5
+        kappa[np.isnan(kappa)] = 0
+    return x, y, kappa
+
+
+def generate_adaptive_arc_length_points(line0, line1, tol, dist_min, dist_max):
+    """xy平面とuv平面の線を、曲率に応じた共通の媒介変数で分割した座標点列を作成する
+
+    線長を正規化した媒介変数tを両平面で共通とすることで、generate_arc_length_pointsと同様に
+    xy平面とuv平面の点列の対応関係を保つ。
+
+    曲率kの円弧を間隔cの弦で近似した際の誤差（矢高）は、おおよそ k c^2 / 8 であるため、
+    誤差がtol以下となる点間隔 c = sqrt(8 tol / k) を、dist_min以上dist_max以下の範囲で求める。
+    両平面のうち、媒介変数の間隔が小さくなる方を採用して点の密度とし、
+    密度の累積値を等分することで媒介変数列を作成する。
+    さらに、点間の中点と弦との距離がtolを超える区間には、中点を追加する（最大N_ADAPTIVE_REFINE回）。
+
+    1次スプラインの場合は、角の情報が失われないように、元の座標点に対応する媒介変数を追加する。
+
+    Args:
+        line0 (LineObject): xy平面の線
+        line1 (LineObject): uv平面の線
+        tol (float): 弦と線との許容誤差
+        dist_min (float): 点間隔の下限
+        dist_max (float): 点間隔の上限
+
+    Returns:
+        numpy.array: xy平面のx座標点列
+        numpy.array: xy平面のy座標点列
+        numpy.array: uv平面のu座標点列
+        numpy.array: uv平面のv座標点列
+    """
+    length0 = line0.get_length()
+    length1 = line1.get_length()
+    
+    # 密度を評価する媒介変数列。点間隔の下限より細かく取る
+    n_eval = int(max(length0, length1)/dist_min) + 1
+    if n_eval < 10:
+        n_eval = 10
+    t_eval = np.linspace(0, 1, n_eval + 1)
+    
+    # 両平面の点の密度（媒介変数あたりの点数）の大きい方を採用する
+    density = np.zeros(len(t_eval))
+    for line, length in [[line0, length0], [line1, length1]]:
+        if length > 0:
+            x, y, kappa = calc_line_point_and_curvature(line, t_eval)
+            with np.errstate(divide = "ignore"):
+                dist = np.sqrt(8.0*tol/kappa)
+            dist = np.clip(dist, dist_min, dist_max)
+            density = np.maximum(density, length/dist)
+    
+    # 密度の累積値を等分して、媒介変数列を作成する
+    density_sum = np.append(0, np.cumsum((density[1:] + density[:-1])/2.0*np.diff(t_eval)))
+    n = int(np.ceil(density_sum[-1])) + 1
+    # generate_arc_length_pointsと同じく、点数の下限を4とする
+    if n < 4:
+        n = 4
+    t = np.interp(np.linspace(0, density_sum[-1], n), density_sum, t_eval)
+    t[0] = 0.0
+    t[-1] = 1.0
+    
+    # 1次スプラインの場合、両平面の元の座標点に対応する媒介変数を追加する
+    for line in [line0, line1]:
+        if (line.line_type == "spline") and (line.interp_mode == "linear"):
+            t = np.unique(np.append(t, generate_arc_length_curve(line).t_p))
+    
+    # 曲率が急変する箇所では矢高の近似が成り立たないため、
+    # 点間の中点と弦との距離がtolを超える区間には、中点を追加する
+    i = 0
+    while i < N_ADAPTIVE_REFINE:
+        x, y, kappa = calc_line_point_and_curvature(line0, t)
+        u, v, kappa = calc_line_point_and_curvature(line1, t)
+        t_mid = (t[1:] + t[:-1])/2.0
+        x_mid, y_mid, kappa = calc_line_point_and_curvature(line0, t_mid)
+        u_mid, v_mid, kappa = calc_line_point_and_curvature(line1, t_mid)
+        dist = np.maximum(get_chord_dist(x_mid, y_mid, x, y), get_chord_dist(u_mid, v_mid, u, v))
+        # 点間隔の下限より細かくは分割しない
+        is_over = (dist > tol) & (np.diff(t)*max(length0, length1) > 2.0*dist_min)
+        if not np.any(is_over):
+            break
+        t = np.sort(np.append(t, t_mid[is_over]))
+        i += 1
+    
+    x, y, kappa = calc_line_point_and_curvature(line0, t)
+    u, v, kappa = calc_line_point_and_curvature(line1, t)
+    return x, y, u, v
+
+
+def get_chord_dist(x_mid, y_mid, x, y):
+    """座標点列(x, y)の各点間の弦と、その間の点(x_mid, y_mid)との距離を計算する
+
+    Args:
+        x_mid (numpy.array): i番目とi+1番目の点の間にある点のx座標点列（点数はxより1少ない）
+        y_mid (numpy.array): i番目とi+1番目の点の間にある点のy座標点列（点数はyより1少ない）
+        x (numpy.array): x座標点列
+        y (numpy.array): y座標点列
+
+    Returns:
+        numpy.array: 各弦との距離
+    """
+    dx = np.diff(x)
+    dy = np.diff(y)
+    l2 = dx**2 + dy**2
+    # 弦の長さが0の場合は、始点との距離とする
+    with np.errstate(divide = "ignore", invalid = "ignore"):
+        t = np.where(l2 > 0, ((x_mid - x[:-1])*dx + (y_mid - y[:-1])*dy)/l2, 0.0)
+    t = np.clip(t, 0.0, 1.0)
+    return np.sqrt((x_mid - x[:-1] - t*dx)**2 + (y_mid - y[:-1] - t*dy)**2)
+
+
 def calc_point_dist(x, y, u, v, z1, z2):
     """z1とz2の並行した２平面上の、対応するx,y座標とu,v座標間の距離を計算する
 
@@ -518,15 +770,10 @@ def calc_point_dist(x, y, u, v, z1, z2):
     Returns:
         numpy.array: 対応する(x[i],y[i])と(u[i],v[i])間の距離を計算した配列
     """
-    point_dist_list = []
-    
     if len(x) == len(y) == len(u) == len(v):
-        i = 0
-        while i < len(x):
-            temp_norm = norm_3d(x[i], y[i], z1, u[i], v[i], z2)
-            point_dist_list.append(temp_norm)
-            i += 1
-        return np.array(point_dist_list)
+        # 全点の距離を、配列演算でまとめて計算する
+        return norm_3d(np.asarray(x, dtype = float), np.asarray(y, dtype = float), z1, \
+                       np.asarray(u, dtype = float), np.asarray(v, dtype = float), z2)
         
     else:
         return np.array([])
@@ -609,7 +856,86 @@ def file_chk(filename):
         return -1
 
 
-def gen_g_code_line_str(x,y,u,v, x0,y0,u0,v0, cs_xy, cs_uv, cnc_cs_def):
+def make_g_code_line_format(cnc_cs_def, axis_str = ("X", "Y", "U", "V"), is_arc = False, center_str = ("I", "J", "", "")):
+    """G01(is_arc = Trueの場合はG02/G03)の移動指令1行分の書式文字列を作成する
+
+    軸名(axis_str)は書式文字列に埋め込むため、Gコード生成時に軸名を置換する必要はない。
+    また、軸名は座標値の前にのみ付与されるため、それ以外の文字列は変更されない。
+
+    円弧の場合、始点から見たxy平面の円弧中心とuv平面の円弧中心を、center_strの名称で出力する。
+    出力形式は、G17平面(xy平面)の円弧に加えて、uv平面の円弧中心を別の名称で指定する、xy平面とuv平面の同期円弧に
+    対応したCNCコントローラー向けである。一般的なG17のCNCコントローラーでは、KはZ軸方向の円弧中心と解釈されるため、
+    uv平面の円弧中心の名称は、コントローラーの仕様に合わせて設定すること。
+    center_strのいずれかが空欄の場合は、円弧を出力できないものとしてNoneを返す。この場合、円弧はG01で出力する。
+
+    Args:
+        cnc_cs_def (str): CNCコントローラーにおける速度指令値の解釈方法
+        axis_str (tuple): x, y, u, v座標に対応する軸名
+        is_arc (bool): 円弧(G02/G03)の書式とする
+        center_str (tuple): 円弧中心のx, y, u, v方向の名称。is_arc = Trueの場合のみ使用する
+
+    Returns:
+        str: x, y, u, v座標とFeedRateを%演算子で埋め込む書式文字列。
+        円弧の場合は、先頭にGコード番号(2 or 3)、座標の後に円弧中心のx, y, u, v方向の値を埋め込む。
+        円弧の書式を作成できない場合はNone
+    """
+    if cnc_cs_def == "InvertTime":
+        cs_digits = '.8f' # 逆時間送りの場合は、分解能を上げる(小数点8桁)
+    else:
+        cs_digits = '.2f' # 速度の場合は、分解能はそこそこでOK(小数点2桁)
+    
+    # 軸名に%が含まれていても書式指定と解釈されないよう、エスケープする
+    x_str, y_str, u_str, v_str = [str(axis).replace("%", "%%") for axis in axis_str]
+    if is_arc == True:
+        i_str, j_str, k_str, l_str = [str(center).strip().replace("%", "%%") for center in center_str]
+        if (i_str == "") or (j_str == "") or (k_str == "") or (l_str == ""):
+            return None
+        return "G%02d " + x_str + "%.6f " + y_str + "%.6f " + u_str + "%.6f " + v_str + "%.6f " \
+               + i_str + "%.6f " + j_str + "%.6f " + k_str + "%.6f " + l_str + "%.6f F%" + cs_digits + "\n"
+    else:
+        return "G01 " + x_str + "%.6f " + y_str + "%.6f " + u_str + "%.6f " + v_str + "%.6f F%" + cs_digits + "\n"
+
+
+def calc_g_code_cut_speed(l_xy, l_uv, l_xyu, l_xyv, cs_xy, cs_uv, cnc_cs_def):
+    """移動指令ごとの移動距離から、CNCコントローラーにおける速度指令値の解釈方法に併せてFeedRateを算出する
+
+    計算方法は、gen_g_code_line_strを参照。
+
+    Args:
+        l_xy (numpy.array): 移動指令ごとのxy平面の移動距離
+        l_uv (numpy.array): 移動指令ごとのuv平面の移動距離
+        l_xyu (numpy.array): 移動指令ごとのx, y, u軸の移動距離
+        l_xyv (numpy.array): 移動指令ごとのx, y, v軸の移動距離
+        cs_xy (float): xy平面側のCNC駆動面におけるカット速度指令値
+        cs_uv (float): uv平面側のCNC駆動面におけるカット速度指令値
+        cnc_cs_def (str): CNCコントローラーにおける速度指令値の解釈方法
+
+    Returns:
+        numpy.array: 移動指令ごとのFeedRate
+    """
+    if cnc_cs_def == "XY":
+        cut_speed = np.full(len(l_xy), cs_xy, dtype = float)
+    elif cnc_cs_def == "UV":
+        cut_speed = np.full(len(l_xy), cs_uv, dtype = float)
+    elif cnc_cs_def == "XYU":
+        is_valid = (l_xyu > DIST_NEAR) & (l_xy > DIST_NEAR)
+        cut_speed = np.full(len(l_xy), cs_xy, dtype = float)
+        cut_speed[is_valid] = cs_xy * l_xyu[is_valid] / l_xy[is_valid]
+    elif cnc_cs_def == "XYV":
+        is_valid = (l_xyv > DIST_NEAR) & (l_xy > DIST_NEAR)
+        cut_speed = np.full(len(l_xy), cs_xy, dtype = float)
+        cut_speed[is_valid] = cs_xy * l_xyv[is_valid] / l_xy[is_valid]
+    elif cnc_cs_def == "InvertTime":
+        t_xy = l_xy/cs_xy
+        t_uv = l_uv/cs_uv
+        # min(t_xy, t_uv)と同じく、t_uvがt_xyより小さい場合のみt_uvを採用する
+        cut_speed = np.where(t_uv < t_xy, t_uv, t_xy)
+    else: # cnc_cs_def == "Faster"
+        cut_speed = np.full(len(l_xy), max(cs_xy, cs_uv), dtype = float)
+    return cut_speed
+
+
+def gen_g_code_line_str(x,y,u,v, x0,y0,u0,v0, cs_xy, cs_uv, cnc_cs_def, line_format = None):
     """座標点列からGコードに出力する文字列を作成する
 
     Gコードは、G01で生成する。
@@ -652,130 +978,591 @@ def gen_g_code_line_str(x,y,u,v, x0,y0,u0,v0, cs_xy, cs_uv, cnc_cs_def):
         cs_xy (float): xy平面側のCNC駆動面におけるカット速度指令値
         cs_uv (float): uv平面側のCNC駆動面におけるカット速度指令値
         cnc_cs_def (str): CNCコントローラーにおける速度指令値の解釈方法
+        line_format (str): make_g_code_line_formatで作成した1行分の書式文字列。Noneの場合は、軸名をX, Y, U, Vとして作成する
 
     Returns:
         str: Gコードに出力する文字列
     """
     code_str = ""
     
-    if cnc_cs_def == "InvertTime":
-        cs_digits = '.8f' # 逆時間送りの場合は、分解能を上げる(小数点8桁)
-    else:
-        cs_digits = '.2f' # 速度の場合は、分解能はそこそこでOK(小数点2桁)
+    if line_format is None:
+        line_format = make_g_code_line_format(cnc_cs_def)
     
     # 座標点列が対応している（点数が揃っている）場合にGコードを生成する
     if len(x) == len(y) == len(u) == len(v):
-        # 前の線の終端点から開始点までの速度を計算
-        if cnc_cs_def == "XY":
-            cut_speed = cs_xy
-        elif cnc_cs_def == "UV":
-            cut_speed = cs_uv
-        elif cnc_cs_def == "XYU":
-            l_xyu = np.sqrt((x[0]-x0)**2 + (y[0]-y0)**2 + (u[0]-u0)**2)
-            l_xy = np.sqrt((x[0]-x0)**2 + (y[0]-y0)**2)
-            if (l_xyu > DIST_NEAR) and (l_xy > DIST_NEAR):
-                cut_speed = cs_xy * l_xyu / l_xy
+        x = np.asarray(x, dtype = float)
+        y = np.asarray(y, dtype = float)
+        u = np.asarray(u, dtype = float)
+        v = np.asarray(v, dtype = float)
+        
+        # 各点の移動量を計算する。先頭の点は、前の線の終端点からの移動量とする
+        dx = x - np.append(x0, x[:-1])
+        dy = y - np.append(y0, y[:-1])
+        du = u - np.append(u0, u[:-1])
+        dv = v - np.append(v0, v[:-1])
+        
+        # 前回の点から今回の点までの移動速度を、全点まとめて算出
+        l_xy = np.sqrt(dx**2 + dy**2)
+        l_uv = np.sqrt(du**2 + dv**2)
+        l_xyu = np.sqrt(dx**2 + dy**2 + du**2)
+        l_xyv = np.sqrt(dx**2 + dy**2 + dv**2)
+        cut_speed = calc_g_code_cut_speed(l_xy, l_uv, l_xyu, l_xyv, cs_xy, cs_uv, cnc_cs_def)
+        
+        # 移動司令を、1行分の書式で一括して文字列に変換する
+        code_str = "".join([line_format%point for point in zip(x.tolist(), y.tolist(), u.tolist(), v.tolist(), cut_speed.tolist())])
+        
+        return code_str
+
+
+def fit_arc(x, y, tol, r_max):
+    """座標点列が、許容誤差tol以内で1つの円弧上にあるかを判定し、円弧の中心と回転方向を出力する
+
+    円弧は、始点・中間点・終点の3点を通る円とする。各点の円からの距離と、
+    点間の弦と円弧との距離（矢高）がいずれもtol以下であり、かつ点列が一方向に回転している場合に円弧とみなす。
+
+    Args:
+        x (numpy.array): x座標点列
+        y (numpy.array): y座標点列
+        tol (float): 許容誤差
+        r_max (float): 円弧とみなす半径の上限。これより大きい円弧は直線とみなす
+
+    Returns:
+        float: 円弧の中心x座標（円弧でない場合はNone）
+        float: 円弧の中心y座標（円弧でない場合はNone）
+        int: 回転方向（1:反時計回り, -1:時計回り, 0:円弧でない）
+    """
+    i_mid = len(x)//2
+    
+    # 桁落ちを避けるため、始点を原点として3点を通る円の中心を求める
+    bx = x[i_mid] - x[0]
+    by = y[i_mid] - y[0]
+    cx = x[-1] - x[0]
+    cy = y[-1] - y[0]
+    d = 2.0*(bx*cy - by*cx)
+    if d == 0:
+        return None, None, 0
+    xc = (cy*(bx**2 + by**2) - by*(cx**2 + cy**2))/d
+    yc = (bx*(cx**2 + cy**2) - cx*(bx**2 + by**2))/d
+    r = np.sqrt(xc**2 + yc**2)
+    if r > r_max:
+        return None, None, 0
+    
+    # 各点の円からの距離
+    px = x - x[0] - xc
+    py = y - y[0] - yc
+    if np.max(np.abs(np.sqrt(px**2 + py**2) - r)) > tol:
+        return None, None, 0
+    
+    # 点間の回転角。全て同じ向きに回転している場合のみ円弧とする
+    d_theta = np.arctan2(px[:-1]*py[1:] - py[:-1]*px[1:], px[:-1]*px[1:] + py[:-1]*py[1:])
+    if np.all(d_theta > 0):
+        direction = 1
+    elif np.all(d_theta < 0):
+        direction = -1
+    else:
+        return None, None, 0
+    
+    # 1周以上の円弧は、始点と終点から円弧が定まらないため対象外とする
+    if np.sum(np.abs(d_theta)) >= 2*np.pi - 1e-3:
+        return None, None, 0
+    
+    # 点間の弦と円弧との距離（矢高）
+    if np.max(r*(1.0 - np.cos(d_theta/2.0))) > tol:
+        return None, None, 0
+    
+    return xc + x[0], yc + y[0], direction
+
+
+def get_arc_fitting_list(x, y, u, v, tol, n_min, r_max):
+    """xy平面とuv平面の座標点列から、両平面で同時に円弧とみなせる区間を抽出する
+
+    始点から順に、xy平面とuv平面の両方でfit_arcにより同じ回転方向の円弧とみなせる区間を、
+    点数を倍々に増やした後に二分探索することで、できるだけ長く延長する。
+
+    Args:
+        x (numpy.array): x座標点列
+        y (numpy.array): y座標点列
+        u (numpy.array): u座標点列
+        v (numpy.array): v座標点列
+        tol (float): 許容誤差
+        n_min (int): 円弧とする区間の最小点数（始点・終点を含む）
+        r_max (float): 円弧とみなす半径の上限
+
+    Returns:
+        list: 円弧区間のリスト。各要素は[始点のindex, 終点のindex, xy平面の円弧の中心x, 中心y, uv平面の円弧の中心u, 中心v, 回転方向]
+    """
+    def get_arc(st, ed):
+        xc, yc, dir_xy = fit_arc(x[st:ed + 1], y[st:ed + 1], tol, r_max)
+        if dir_xy == 0:
+            return None
+        uc, vc, dir_uv = fit_arc(u[st:ed + 1], v[st:ed + 1], tol, r_max)
+        if dir_uv != dir_xy:
+            return None
+        return [st, ed, xc, yc, uc, vc, dir_xy]
+    
+    arc_list = []
+    n = len(x)
+    st = 0
+    while st + n_min - 1 < n:
+        arc = get_arc(st, st + n_min - 1)
+        if arc == None:
+            st += 1
+            continue
+        
+        # 円弧とみなせなくなるまで、区間を倍々に延長する
+        ed_ok = st + n_min - 1
+        ed_ng = ed_ok
+        step = n_min
+        while ed_ok < n - 1:
+            ed_ng = min(ed_ok + step, n - 1)
+            new_arc = get_arc(st, ed_ng)
+            if new_arc == None:
+                break
+            arc = new_arc
+            ed_ok = ed_ng
+            step *= 2
+        
+        # 延長できなくなった区間内で、円弧とみなせる終点を二分探索する
+        while ed_ng - ed_ok > 1:
+            ed_mid = (ed_ok + ed_ng)//2
+            new_arc = get_arc(st, ed_mid)
+            if new_arc == None:
+                ed_ng = ed_mid
             else:
-                cut_speed = cs_xy
-        elif cnc_cs_def == "XYV":
-            l_xyv = np.sqrt((x[0]-x0)**2 + (y[0]-y0)**2 + (v[0]-v0)**2)
-            l_xy = np.sqrt((x[0]-x0)**2 + (y[0]-y0)**2)
-            if (l_xyv > DIST_NEAR) and (l_xy > DIST_NEAR):
-                cut_speed = cs_xy * l_xyv / l_xy
+                arc = new_arc
+                ed_ok = ed_mid
+        
+        arc_list.append(arc)
+        st = ed_ok
+    return arc_list
+
+
+def gen_g_code_arc_str(x,y,u,v, x0,y0,u0,v0, cs_xy, cs_uv, cnc_cs_def, tol, line_format = None, arc_format = None):
+    """座標点列からGコードに出力する文字列を、円弧補完(G02/G03)を用いて作成する
+
+    前の線の終端点を含む座標点列のうち、get_arc_fitting_listによりxy平面とuv平面で同時に円弧とみなせる区間を、
+    G02(時計回り)/G03(反時計回り)の1行に置き換える。それ以外の点は、gen_g_code_line_strと同じくG01で出力する。
+
+    FeedRateは、円弧に置き換えた区間の点間距離の合計から、gen_g_code_line_strと同じ方法で算出する。
+
+    Args:
+        x (numpy.array): Gコードに出力するx座標点列
+        y (numpy.array): Gコードに出力するy座標点列
+        u (numpy.array): Gコードに出力するu座標点列
+        v (numpy.array): Gコードに出力するv座標点列
+        x0 (float): x[0]の前の座標点（前の線の終端点のx座標）
+        y0 (float): y[0]の前の座標点（前の線の終端点のy座標）
+        u0 (float): u[0]の前の座標点（前の線の終端点のu座標）
+        v0 (float): v[0]の前の座標点（前の線の終端点のv座標）
+        cs_xy (float): xy平面側のCNC駆動面におけるカット速度指令値
+        cs_uv (float): uv平面側のCNC駆動面におけるカット速度指令値
+        cnc_cs_def (str): CNCコントローラーにおける速度指令値の解釈方法
+        tol (float): 円弧とみなす許容誤差
+        line_format (str): make_g_code_line_formatで作成したG01の書式文字列。Noneの場合は、軸名をX, Y, U, Vとして作成する
+        arc_format (str): make_g_code_line_formatで作成したG02/G03の書式文字列。Noneの場合は、円弧を出力せずG01で出力する
+
+    Returns:
+        str: Gコードに出力する文字列
+    """
+    code_str = ""
+    
+    if line_format is None:
+        line_format = make_g_code_line_format(cnc_cs_def)
+    # 円弧の書式がない(uv平面の円弧中心の名称が設定されていない)場合は、すべてG01で出力する
+    if arc_format is None:
+        return gen_g_code_line_str(x, y, u, v, x0, y0, u0, v0, cs_xy, cs_uv, cnc_cs_def, line_format)
+    
+    # 座標点列が対応している（点数が揃っている）場合にGコードを生成する
+    if len(x) == len(y) == len(u) == len(v):
+        # 前の線の終端点を先頭に加えた点列とする
+        x = np.append(x0, np.asarray(x, dtype = float))
+        y = np.append(y0, np.asarray(y, dtype = float))
+        u = np.append(u0, np.asarray(u, dtype = float))
+        v = np.append(v0, np.asarray(v, dtype = float))
+        
+        # 点間の移動距離
+        dx = np.diff(x)
+        dy = np.diff(y)
+        du = np.diff(u)
+        dv = np.diff(v)
+        l_xy = np.sqrt(dx**2 + dy**2)
+        l_uv = np.sqrt(du**2 + dv**2)
+        l_xyu = np.sqrt(dx**2 + dy**2 + du**2)
+        l_xyv = np.sqrt(dx**2 + dy**2 + dv**2)
+        
+        arc_list = get_arc_fitting_list(x, y, u, v, tol, N_ARC_FITTING_MIN, R_ARC_FITTING_MAX)
+        
+        # 移動指令ごとに、開始点と終了点のindexを作成する。円弧以外は1点ずつの移動指令とする
+        block_st = []
+        block_ed = []
+        block_arc = []
+        i = 0
+        k = 0
+        while i < len(x) - 1:
+            if (k < len(arc_list)) and (arc_list[k][0] == i):
+                block_st.append(i)
+                block_ed.append(arc_list[k][1])
+                block_arc.append(arc_list[k])
+                i = arc_list[k][1]
+                k += 1
             else:
-                cut_speed = cs_xy                
-        elif cnc_cs_def == "InvertTime":
-            l_xy = np.sqrt((x[0]-x0)**2 + (y[0]-y0)**2)
-            l_uv = np.sqrt((u[0]-u0)**2 + (v[0]-v0)**2)
-            t_xy = l_xy/cs_xy
-            t_uv = l_uv/cs_uv
-            cut_speed = min(t_xy, t_uv)
-        else: # cnc_cs_def == "Faster"
-            cut_speed = max(cs_xy, cs_uv)
-
-        # 前の線の終端点から開始点までの移動司令
-        code_str += "G01 X%s Y%s U%s V%s F%s\n"%(format(x[0], '.6f'), format(y[0], '.6f'), \
-                                                 format(u[0], '.6f'), format(v[0], '.6f'), \
-                                                 format(cut_speed, cs_digits))
+                block_st.append(i)
+                block_ed.append(i + 1)
+                block_arc.append(None)
+                i += 1
         
-        # 線の中での移動指令
-        i = 1
-        while i < len(x):
-            # 前回の点から今回の点までの移動速度を算出
-            if cnc_cs_def == "XY":
-                cut_speed = cs_xy
-            elif cnc_cs_def == "UV":
-                cut_speed = cs_uv
-            elif cnc_cs_def == "XYU":
-                l_xyu = np.sqrt((x[i]-x[i-1])**2 + (y[i]-y[i-1])**2 + (u[i]-u[i-1])**2)
-                l_xy = np.sqrt((x[i]-x[i-1])**2 + (y[i]-y[i-1])**2)
-                if (l_xyu > DIST_NEAR) and (l_xy > DIST_NEAR):
-                    cut_speed = cs_xy * l_xyu / l_xy
-                else:
-                    cut_speed = cs_xy
-            elif cnc_cs_def == "XYV":
-                l_xyv = np.sqrt((x[i]-x[i-1])**2 + (y[i]-y[i-1])**2 + (v[i]-v[i-1])**2)
-                l_xy = np.sqrt((x[i]-x[i-1])**2 + (y[i]-y[i-1])**2)
-                if (l_xyv > DIST_NEAR) and (l_xy > DIST_NEAR):
-                    cut_speed = cs_xy * l_xyv / l_xy
+        # 移動指令ごとの移動距離の合計から、FeedRateを算出する
+        block_st = np.array(block_st, dtype = int)
+        cut_speed = calc_g_code_cut_speed(np.add.reduceat(l_xy, block_st), np.add.reduceat(l_uv, block_st), \
+                                          np.add.reduceat(l_xyu, block_st), np.add.reduceat(l_xyv, block_st), \
+                                          cs_xy, cs_uv, cnc_cs_def).tolist()
+        
+        code_line_list = []
+        i = 0
+        while i < len(block_ed):
+            st = block_st[i]
+            ed = block_ed[i]
+            arc = block_arc[i]
+            if arc is None:
+                code_line_list.append(line_format%(x[ed], y[ed], u[ed], v[ed], cut_speed[i]))
+            else:
+                # 時計回りはG02、反時計回りはG03とする。円弧中心は始点からの相対座標とする
+                if arc[6] == 1:
+                    g_num = 3
                 else:
-                    cut_speed = cs_xy                
-            elif cnc_cs_def == "InvertTime":
-                l_xy = np.sqrt((x[i]-x[i-1])**2 + (y[i]-y[i-1])**2)
-                l_uv = np.sqrt((u[i]-u[i-1])**2 + (v[i]-v[i-1])**2)
-                t_xy = l_xy/cs_xy
-                t_uv = l_uv/cs_uv
-                cut_speed = min(t_xy, t_uv)
-            else: # cnc_cs_def == "Faster"
-                cut_speed = max(cs_xy, cs_uv)
-
-            # 前回の点から今回の点での移動司令
-            code_str += "G01 X%s Y%s U%s V%s F%s\n"%(format(x[i], '.6f'), format(y[i], '.6f'), \
-                                                     format(u[i], '.6f'), format(v[i], '.6f'), \
-                                                         format(cut_speed, cs_digits))
+                    g_num = 2
+                code_line_list.append(arc_format%(g_num, x[ed], y[ed], u[ed], v[ed], \
+                                                  arc[2] - x[st], arc[3] - y[st], arc[4] - u[st], arc[5] - v[st], cut_speed[i]))
             i += 1
+        code_str = "".join(code_line_list)
+        
         return code_str
 
 
-def arc_to_spline(arc_obj):
-    """ezdxfのArcオブジェクトから、座標点列を作成する
+def gen_g_code_arc_block_str(x,y,u,v, x0,y0,u0,v0, arc, cs_xy, cs_uv, cnc_cs_def, line_format = None, arc_format = None):
+    """円弧の座標点列を、1行のG02/G03としてGコードに出力する文字列を作成する
 
-    座標点列は、10degに1点作成する。
+    前の点(x0, y0, u0, v0)から座標点列の始点まではG01で移動し、座標点列の始点から終点までを1行の円弧とする。
+    円弧中心は、座標点列の始点からの相対座標とし、gen_g_code_arc_strと同じ書式(arc_format)で出力する。
+    ただし、座標点列の始点が円弧上にない場合（前の線の終端点に置き換えられた場合）は、2点目までG01で移動し、2点目から円弧とする。
+    FeedRateは、座標点列の点間距離の合計から、gen_g_code_line_strと同じ方法で算出する。
 
     Args:
-        arc_obj (ezdxf.entities.Arc): ezdxfの円弧オブジェクト
+        x (numpy.array): 円弧上のx座標点列
+        y (numpy.array): 円弧上のy座標点列
+        u (numpy.array): 円弧上のu座標点列
+        v (numpy.array): 円弧上のv座標点列
+        x0 (float): x[0]の前の座標点（前の線の終端点のx座標）
+        y0 (float): y[0]の前の座標点（前の線の終端点のy座標）
+        u0 (float): u[0]の前の座標点（前の線の終端点のu座標）
+        v0 (float): v[0]の前の座標点（前の線の終端点のv座標）
+        arc (list): [xy平面の円弧の中心x, 中心y, uv平面の円弧の中心u, 中心v, 回転方向(1:反時計回り, -1:時計回り)]
+        cs_xy (float): xy平面側のCNC駆動面におけるカット速度指令値
+        cs_uv (float): uv平面側のCNC駆動面におけるカット速度指令値
+        cnc_cs_def (str): CNCコントローラーにおける速度指令値の解釈方法
+        line_format (str): make_g_code_line_formatで作成したG01の書式文字列。Noneの場合は、軸名をX, Y, U, Vとして作成する
+        arc_format (str): make_g_code_line_formatで作成したG02/G03の書式文字列。Noneの場合は、円弧を出力せずG01で出力する
 
     Returns:
-        numpy.array: 円弧上のx, y座標点列
+        str: Gコードに出力する文字列
+    """
+    # 円弧の書式がない(uv平面の円弧中心の名称が設定されていない)場合は、すべてG01で出力する
+    if arc_format is None:
+        return gen_g_code_line_str(x, y, u, v, x0, y0, u0, v0, cs_xy, cs_uv, cnc_cs_def, line_format)
+    
+    x = np.asarray(x, dtype = float)
+    y = np.asarray(y, dtype = float)
+    u = np.asarray(u, dtype = float)
+    v = np.asarray(v, dtype = float)
+    
+    # 始点と終点の、円弧の中心からの距離の差で、始点が円弧上にあるかを判定する
+    d_r_xy = np.hypot(x[0] - arc[0], y[0] - arc[1]) - np.hypot(x[-1] - arc[0], y[-1] - arc[1])
+    d_r_uv = np.hypot(u[0] - arc[2], v[0] - arc[3]) - np.hypot(u[-1] - arc[2], v[-1] - arc[3])
+    if (np.abs(d_r_xy) > DIST_NEAR) or (np.abs(d_r_uv) > DIST_NEAR):
+        i_st = 1
+    else:
+        i_st = 0
+    
+    # 円弧とする点が残らない場合は、G01で出力する
+    if len(x) - i_st < 2:
+        return gen_g_code_line_str(x, y, u, v, x0, y0, u0, v0, cs_xy, cs_uv, cnc_cs_def, line_format)
+    
+    # 前の点から円弧の始点までのG01
+    g_code_str = gen_g_code_line_str(x[:i_st + 1], y[:i_st + 1], u[:i_st + 1], v[:i_st + 1], x0, y0, u0, v0, cs_xy, cs_uv, cnc_cs_def, line_format)
+    x = x[i_st:]
+    y = y[i_st:]
+    u = u[i_st:]
+    v = v[i_st:]
+    
+    dx = np.diff(x)
+    dy = np.diff(y)
+    du = np.diff(u)
+    dv = np.diff(v)
+    l_xy = np.sum(np.sqrt(dx**2 + dy**2))
+    l_uv = np.sum(np.sqrt(du**2 + dv**2))
+    l_xyu = np.sum(np.sqrt(dx**2 + dy**2 + du**2))
+    l_xyv = np.sum(np.sqrt(dx**2 + dy**2 + dv**2))
+    cut_speed = calc_g_code_cut_speed(np.array([l_xy]), np.array([l_uv]), np.array([l_xyu]), np.array([l_xyv]), \
+                                      cs_xy, cs_uv, cnc_cs_def)[0]
+    
+    # 時計回りはG02、反時計回りはG03とする
+    if arc[4] == 1:
+        g_num = 3
+    else:
+        g_num = 2
+    g_code_str += arc_format%(g_num, x[-1], y[-1], u[-1], v[-1], arc[0] - x[0], arc[1] - y[0], arc[2] - u[0], arc[3] - v[0], cut_speed)
+    return g_code_str
+
+
+def get_point_segment_dist(x, y, x1, y1, x2, y2):
+    """座標点列(x, y)と、線分(x1, y1)-(x2, y2)との距離を計算する
+
+    Args:
+        x (numpy.array): x座標点列
+        y (numpy.array): y座標点列
+        x1 (float): 線分の始点x座標
+        y1 (float): 線分の始点y座標
+        x2 (float): 線分の終点x座標
+        y2 (float): 線分の終点y座標
+
+    Returns:
+        numpy.array: 各点と線分との距離
+    """
+    dx = x2 - x1
+    dy = y2 - y1
+    l2 = dx**2 + dy**2
+    if l2 == 0:
+        # 線分の長さが0の場合は、始点との距離とする
+        return np.sqrt((x - x1)**2 + (y - y1)**2)
+    # 線分上の最近点の位置（0:始点, 1:終点）
+    t = np.clip(((x - x1)*dx + (y - y1)*dy)/l2, 0.0, 1.0)
+    return np.sqrt((x - x1 - t*dx)**2 + (y - y1 - t*dy)**2)
+
+
+def simplify_path(x, y, u, v, tol):
+    """xy平面とuv平面の座標点列を、対応関係を保ったまま許容誤差tol以内で間引く（Douglas-Peucker法）
+
+    区間の始点と終点を結ぶ線分から最も離れた点を残し、区間を分割することを繰り返す。
+    点と線分との距離は、xy平面とuv平面での距離の大きい方とする。
+    よって、間引いた後の点列は、xy平面、uv平面のいずれにおいても元の点列からtol以内となる。
+
+    Args:
+        x (numpy.array): x座標点列
+        y (numpy.array): y座標点列
+        u (numpy.array): u座標点列
+        v (numpy.array): v座標点列
+        tol (float): 許容誤差
+
+    Returns:
+        numpy.array: 残す点のindex（始点と終点は必ず残す）
+    """
+    x = np.asarray(x, dtype = float)
+    y = np.asarray(y, dtype = float)
+    u = np.asarray(u, dtype = float)
+    v = np.asarray(v, dtype = float)
+    n = len(x)
+    
+    is_keep = np.zeros(n, dtype = bool)
+    is_keep[0] = True
+    is_keep[-1] = True
+    
+    stack = [[0, n - 1]]
+    while len(stack) > 0:
+        st, ed = stack.pop()
+        if ed - st < 2:
+            continue
+        dist_xy = get_point_segment_dist(x[st + 1:ed], y[st + 1:ed], x[st], y[st], x[ed], y[ed])
+        dist_uv = get_point_segment_dist(u[st + 1:ed], v[st + 1:ed], u[st], v[st], u[ed], v[ed])
+        dist = np.maximum(dist_xy, dist_uv)
+        i_max = np.argmax(dist)
+        if dist[i_max] > tol:
+            # 最も離れた点を残し、その点で区間を分割する
+            i = st + 1 + i_max
+            is_keep[i] = True
+            stack.append([st, i])
+            stack.append([i, ed])
+    
+    return np.where(is_keep)[0]
+
+
+def calc_arc_point_num(r, sweep, tol):
+    """半径r、中心角sweepの円弧を、弦と円弧との距離（矢高）がtol以下となるように分割する点数を計算する
+
+    矢高は h = r(1 - cos(dθ/2)) なので、dθ = 2*arccos(1 - tol/r) 以下の角度間隔で分割する。
+    ただし、角度間隔の上限は180degとし、3点未満だと直線になるので、点数の下限は3点とする。
+
+    r, sweepに配列を与えた場合は、複数の円弧の点数をまとめて計算する。
+
+    Args:
+        r (float or numpy.array): 半径
+        sweep (float or numpy.array): 中心角[rad]
+        tol (float): 矢高の許容値
+
+    Returns:
+        numpy.array: 点数
+    """
+    r = np.maximum(np.asarray(r, dtype = float), DIST_NEAR)
+    sweep = np.abs(np.asarray(sweep, dtype = float))
+    d_theta = 2*np.arccos(np.clip(1.0 - tol/r, 0.0, 1.0))
+    num_point = np.ceil(sweep/d_theta).astype(int) + 1
+    return np.maximum(num_point, 3)
+
+
+def ellipse_to_spline(ellipse_obj, tol = TOL_ARC_POINT):
+    """ezdxfのEllipseオブジェクトから、座標点列を作成する
+
+    楕円は、中心c、長軸ベクトルa、短軸ベクトルbとして、媒介変数tにより c + a*cos(t) + b*sin(t) と表される。
+    媒介変数の間隔dtでの矢高は、長軸の半径の円弧と同じ間隔での矢高以下となるので、
+    点数は、長軸の半径でcalc_arc_point_numにより計算する。
+
+    短軸ベクトルは、押し出し方向と長軸ベクトルの外積とするので、押し出し方向が反転した楕円も取り扱える。
+
+    Args:
+        ellipse_obj (ezdxf.entities.Ellipse): ezdxfの楕円オブジェクト
+        tol (float, optional): 矢高の許容値. Defaults to TOL_ARC_POINT.
+
+    Returns:
+        numpy.array: 楕円上のx, y座標点列
 
     See Also:
-        https://ezdxf.readthedocs.io/en/stable/dxfentities/arc.html#ezdxf.entities.Arc 
+        https://ezdxf.readthedocs.io/en/stable/dxfentities/ellipse.html
     """
+    center = np.array(ellipse_obj.dxf.center, dtype = float)
+    major_axis = np.array(ellipse_obj.dxf.major_axis, dtype = float)
+    extrusion = np.array(ellipse_obj.dxf.extrusion, dtype = float)
+    minor_axis = np.cross(extrusion/np.linalg.norm(extrusion), major_axis)*ellipse_obj.dxf.ratio
     
-    # Arcオブジェクトから円弧の情報を取得
-    radius = arc_obj.dxf.radius # 円弧の半径
-    x_center_point  = arc_obj.dxf.center[0] # 円弧の中心x座標
-    y_center_point  = arc_obj.dxf.center[1] # 円弧の中心y座標
-    start_angle     = arc_obj.dxf.start_angle # 円弧の開始角度
-    end_angle       = arc_obj.dxf.end_angle # 円弧の終了角度
+    # 媒介変数のラッピング。始点と終点が同じ場合は、1周の楕円とする
+    start_param = ellipse_obj.dxf.start_param
+    sweep = (ellipse_obj.dxf.end_param - start_param)%(2*np.pi)
+    if sweep < DIST_NEAR:
+        sweep = 2*np.pi
     
-    # 角度ラッピング
-    if end_angle < start_angle:
-        end_angle += 360
+    num_point = int(calc_arc_point_num(np.linalg.norm(major_axis), sweep, tol))
+    t = start_param + np.linspace(0, 1, num_point)*sweep
+    points = center + np.outer(np.cos(t), major_axis) + np.outer(np.sin(t), minor_axis)
     
-    # 座標点列の個数を計算。10degに1点作成する
-    num_point = int(np.abs(end_angle - start_angle)/10.0)
+    return points[:,0:2]
+
+
+def eval_nurbs(degree, knots, control_points, weights, t):
+    """NURBSの媒介変数tにおける座標を、de Boorのアルゴリズムにより計算する
+
+    制御点を重みを掛けた同次座標(w*x, w*y, w)とし、B-スプラインとして評価した後、wで割ることで有理化する。
+    媒介変数tごとのループを避けるため、tを含むノット区間の制御点(degree+1点)を配列として取り出し、
+    de Boorの漸化式をtについてまとめて計算する。
+
+    Args:
+        degree (int): 次数
+        knots (numpy.array): ノットベクトル。要素数は、制御点の数 + degree + 1であること
+        control_points (numpy.array): 制御点の座標。[[x0, y0], [x1, y1], ...]
+        weights (numpy.array): 制御点の重み。Noneまたは空の場合は、すべて1とする
+        t (numpy.array): 媒介変数。knots[degree] ~ knots[-degree-1]の範囲であること
+
+    Returns:
+        numpy.array: x座標点列
+        numpy.array: y座標点列
+
+    See Also:
+        https://en.wikipedia.org/wiki/De_Boor%27s_algorithm
+    """
+    p = int(degree)
+    knots = np.asarray(knots, dtype = float)
+    control_points = np.asarray(control_points, dtype = float)
+    n = len(control_points)
+    if (weights is None) or (len(weights) == 0):
+        weights = np.ones(n)
+    weights = np.asarray(weights, dtype = float)
+    t = np.asarray(t, dtype = float)
+    
+    # 同次座標の制御点
+    pw = np.column_stack([control_points[:,0]*weights, control_points[:,1]*weights, weights])
+    
+    # tを含むノット区間 knots[k] <= t < knots[k+1] を探索する。終点は最後のノット区間に含める
+    k = np.searchsorted(knots, t, side = "right") - 1
+    k = np.clip(k, p, n - 1)
+    
+    # ノット区間kに影響する制御点(k-p ~ k)を取り出す。d[i, j]は、t[i]に対するj番目の制御点
+    d = pw[k[:,None] + np.arange(-p, 1)[None,:]]
+    
+    r = 1
+    while r <= p:
+        j = np.arange(r, p + 1)
+        left = knots[k[:,None] + j[None,:] - p]
+        right = knots[k[:,None] + j[None,:] + 1 - r]
+        denom = right - left
+        # 重複ノットにより区間幅が0となる場合は、0割を避ける
+        alpha = np.where(denom > 0, (t[:,None] - left)/np.where(denom > 0, denom, 1.0), 0.0)
+        d[:,j] = (1.0 - alpha)[:,:,None]*d[:,j - 1] + alpha[:,:,None]*d[:,j]
+        r += 1
+    
+    return d[:,p,0]/d[:,p,2], d[:,p,1]/d[:,p,2]
+
 
-    # 3点未満だと直線になるので、下限リミットを設ける
-    if num_point < 3:
-        num_point = 3
+def nurbs_to_spline(spline_obj, tol = TOL_NURBS_POINT):
+    """ezdxfのSplineオブジェクトを、NURBSとして評価した座標点列を作成する
+
+    点数は、弦と曲線との距離がtol以下となるように、ノット区間ごとに以下により決定する。
+
+    1. ノット区間をN_NURBS_SAMPLEに等分し、各小区間の中点での弦と曲線との距離を計算する。
+
+    2. 弦と曲線との距離は媒介変数の間隔の2乗に比例するので、最大値がtol以下となる分割数を計算する。
+
+    3. ノット区間ごとの分割数で媒介変数を作成し、eval_nurbsにより座標点列を計算する。
+
+    ノットベクトルがない場合は、両端で重複した一様ノットベクトルとする。
+
+    Args:
+        spline_obj (ezdxf.entities.Spline): ezdxfのスプラインオブジェクト。制御点が次数+1個以上あること
+        tol (float, optional): 弦と曲線との距離の許容値. Defaults to TOL_NURBS_POINT.
+
+    Returns:
+        numpy.array: NURBS上のx, y座標点列
+
+    See Also:
+        https://ezdxf.readthedocs.io/en/stable/dxfentities/spline.html
+    """
+    p = spline_obj.dxf.degree
+    control_points = np.array(spline_obj.control_points, dtype = float)[:,0:2]
+    weights = np.array(spline_obj.weights, dtype = float)
+    knots = np.array(spline_obj.knots, dtype = float)
+    n = len(control_points)
+    
+    if not(len(knots) == n + p + 1):
+        knots = np.concatenate([np.zeros(p), np.linspace(0, 1, n - p + 1), np.ones(p)])
+    
+    # 幅のあるノット区間の境界
+    t_knot = np.unique(knots[p:n + 1])
+    t_st = t_knot[:-1]
+    t_ed = t_knot[1:]
+    
+    # ノット区間をN_NURBS_SAMPLE等分した小区間の、始点・中点・終点での座標
+    s = np.arange(N_NURBS_SAMPLE)/N_NURBS_SAMPLE
+    h = (t_ed - t_st)/N_NURBS_SAMPLE
+    t0 = (t_st[:,None] + s[None,:]*(t_ed - t_st)[:,None]).flatten()
+    t_m = t0 + np.repeat(h, N_NURBS_SAMPLE)/2
+    t1 = t0 + np.repeat(h, N_NURBS_SAMPLE)
+    x, y = eval_nurbs(p, knots, control_points, weights, np.concatenate([t0, t_m, t1]))
+    m = len(t0)
+    
+    # 中点での弦と曲線との距離(|P0 - 2Pm + P1|/2)の、ノット区間ごとの最大値
+    sag = np.hypot(x[:m] - 2*x[m:2*m] + x[2*m:], y[:m] - 2*y[m:2*m] + y[2*m:])/2
+    sag = np.max(sag.reshape(-1, N_NURBS_SAMPLE), axis = 1)
+    n_span = np.maximum(np.ceil(N_NURBS_SAMPLE*np.sqrt(sag/tol)), 1).astype(int)
+    
+    # ノット区間ごとの分割数で媒介変数を作成する。ノット区間の終点は、次のノット区間の始点と重複するので除く
+    t = []
+    i = 0
+    while i < len(t_st):
+        t.append(np.linspace(t_st[i], t_ed[i], n_span[i] + 1)[:-1])
+        i += 1
+    t.append(t_ed[-1:])
+    x, y = eval_nurbs(p, knots, control_points, weights, np.concatenate(t))
     
-    # 補完点列を作成
-    angle_array = np.radians(np.linspace(start_angle, end_angle, num_point))
-    x_p = radius * np.cos(angle_array) + x_center_point
-    y_p = radius * np.sin(angle_array) + y_center_point
+    # 制御点の重複などで、近傍点となった点を除去する
+    x, y = remove_same_point(x, y)
     
-    return np.array([x_p, y_p]).T
+    return np.array([x, y]).T
 
 
 def poly_to_spline(poly_obj):
@@ -1147,11 +1934,149 @@ def cross_judge(a, b, c, d):
     return tc1 * tc2 <= 0 and td1 * td2 <= 0
 
 
+def get_segments(x, y):
+    """座標点列を結ぶ線分の配列を作成する
+
+    i番目の線分は、座標点(x[i], y[i])と(x[i+1], y[i+1])を結ぶ線分とする。
+
+    Args:
+        x (numpy.array): x座標点列
+        y (numpy.array): y座標点列
+
+    Returns:
+        numpy.array: 線分の配列。形状は(点数-1, 4)で、各行は線分の始点と終点の座標(x始点, y始点, x終点, y終点)
+    """
+    x = np.asarray(x, dtype = float)
+    y = np.asarray(y, dtype = float)
+    
+    # 点の場合、線分は存在しない
+    if len(x) < 2:
+        return np.zeros((0, 4))
+    
+    return np.stack([x[:-1], y[:-1], x[1:], y[1:]], axis = 1)
+
+
+def get_cross_segments(seg1, seg2 = None):
+    """2つの線分の配列に対し、互いに交差する線分のペアと、その交点をすべて検出する
+
+    線分のペアごとにcross_judge, get_cross_point_from_pointを呼び出す代わりに、配列演算でまとめて計算する。
+
+    すべての線分のペアを総当たりで判定すると計算量がO(n*m)となるため、以下の手順で判定する。
+
+    1. 線分の外接矩形(バウンディングボックス)をx座標の最小値でソートし、x方向に重なる線分のペアのみを二分探索で候補とする(スイープ法)
+
+    2. 候補のペアに対して、y方向の重なりによる判定と、cross_judgeと同じ判定式による交差判定をまとめて行う
+
+    3. 交差するペアに対して、get_cross_point_from_pointと同じ計算式で交点を計算する
+
+    seg2を省略した場合、seg1の線分同士の交差(自己交差)を検出する。
+    この場合、端点を共有する隣接した線分のペアは除外し、ペアはi<jとなるように出力する。
+
+    Args:
+        seg1 (numpy.array): 線分の配列。get_segmentsで作成した形状(N, 4)の配列
+        seg2 (numpy.array, optional): 線分の配列。get_segmentsで作成した形状(M, 4)の配列. Defaults to None.
+
+    Returns:
+        numpy.array: 交差する線分ペアの、seg1の線分番号の配列
+        numpy.array: 交差する線分ペアの、seg2(seg2を省略した場合はseg1)の線分番号の配列
+        numpy.array: 交点のx座標の配列
+        numpy.array: 交点のy座標の配列
+
+    Note:
+        ペアは、(seg1の線分番号, seg2の線分番号)の昇順に並べて出力する。
+    """
+    
+    def expand_pair(index, st, ed):
+        # index[k]番目の線分に対し、st[k]~ed[k]-1番目の候補を展開する
+        count = np.maximum(ed - st, 0)
+        pair_index = np.repeat(index, count)
+        pair_pos = np.arange(len(pair_index)) - np.repeat(np.cumsum(count) - count, count) + np.repeat(st, count)
+        return pair_index, pair_pos
+    
+    seg1 = np.asarray(seg1, dtype = float).reshape(-1, 4)
+    self_cross = seg2 is None
+    if self_cross == True:
+        seg2 = seg1
+    else:
+        seg2 = np.asarray(seg2, dtype = float).reshape(-1, 4)
+    
+    # 線分の外接矩形
+    x_min1 = np.minimum(seg1[:,0], seg1[:,2])
+    x_max1 = np.maximum(seg1[:,0], seg1[:,2])
+    x_min2 = np.minimum(seg2[:,0], seg2[:,2])
+    x_max2 = np.maximum(seg2[:,0], seg2[:,2])
+    
+    if self_cross == True:
+        # x座標の最小値でソートした順に、自身より後ろかつx方向に重なる線分を候補とする
+        order = np.argsort(x_min1, kind = "stable")
+        x_min_sorted = x_min1[order]
+        pos = np.arange(len(order))
+        ed = np.searchsorted(x_min_sorted, x_max1[order], side = "right")
+        pair_pos1, pair_pos2 = expand_pair(pos, pos + 1, ed)
+        s1 = order[pair_pos1]
+        s2 = order[pair_pos2]
+        i = np.minimum(s1, s2)
+        j = np.maximum(s1, s2)
+        # 隣接する線分は端点を共有するので、判定から除外する
+        mask = j - i > 1
+        i = i[mask]
+        j = j[mask]
+        
+    else:
+        # seg2の線分のx座標の最小値が、seg1の線分のx方向の範囲に含まれるペア
+        order2 = np.argsort(x_min2, kind = "stable")
+        st = np.searchsorted(x_min2[order2], x_min1, side = "left")
+        ed = np.searchsorted(x_min2[order2], x_max1, side = "right")
+        i_a, pos_a = expand_pair(np.arange(len(seg1)), st, ed)
+        j_a = order2[pos_a]
+        # seg1の線分のx座標の最小値が、seg2の線分のx方向の範囲に含まれるペア(x座標の最小値が等しいペアは上で検出済み)
+        order1 = np.argsort(x_min1, kind = "stable")
+        st = np.searchsorted(x_min1[order1], x_min2, side = "right")
+        ed = np.searchsorted(x_min1[order1], x_max2, side = "right")
+        j_b, pos_b = expand_pair(np.arange(len(seg2)), st, ed)
+        i_b = order1[pos_b]
+        i = np.concatenate([i_a, i_b])
+        j = np.concatenate([j_a, j_b])
+    
+    # y方向の重なりによる判定
+    y_min1 = np.minimum(seg1[i,1], seg1[i,3])
+    y_max1 = np.maximum(seg1[i,1], seg1[i,3])
+    y_min2 = np.minimum(seg2[j,1], seg2[j,3])
+    y_max2 = np.maximum(seg2[j,1], seg2[j,3])
+    mask = ~((y_min1 > y_max2) | (y_max1 < y_min2))
+    i = i[mask]
+    j = j[mask]
+    
+    # cross_judgeと同じ判定式で、交差を判定する(a,b:seg1の始点と終点, c,d:seg2の始点と終点)
+    ax, ay, bx, by = seg1[i,0], seg1[i,1], seg1[i,2], seg1[i,3]
+    cx, cy, dx, dy = seg2[j,0], seg2[j,1], seg2[j,2], seg2[j,3]
+    tc1 = (ax - bx) * (cy - ay) + (ay - by) * (ax - cx)
+    tc2 = (ax - bx) * (dy - ay) + (ay - by) * (ax - dx)
+    td1 = (cx - dx) * (ay - cy) + (cy - dy) * (cx - ax)
+    td2 = (cx - dx) * (by - cy) + (cy - dy) * (cx - bx)
+    mask = (tc1 * tc2 <= 0) & (td1 * td2 <= 0)
+    
+    # 線分番号の昇順に並べ替える
+    sort = np.lexsort((j[mask], i[mask]))
+    i = i[mask][sort]
+    j = j[mask][sort]
+    
+    # 交点を計算する。平行な線分が重なる場合は交点が定まらないので、nanとなる
+    with np.errstate(divide = "ignore", invalid = "ignore"):
+        cross_x, cross_y = get_cross_point_from_point(seg1[i,0], seg1[i,1], seg2[j,0], seg2[j,1], 
+                                                      seg1[i,2], seg1[i,3], seg2[j,2], seg2[j,3])
+    
+    return i, j, cross_x, cross_y
+
+
 def remove_self_collision(x, y):
     """線が自己交差を保つ場合、自己交差を解消した座標点列を出力する
 
     自己交差の開始点と終了点を検出し、その間の座標点を削除することで自己交差を解消する。
 
+    交差する線分のペアは、get_cross_segmentsによりまとめて検出する。
+    自己交差を1度で除去できない場合があるので、自己交差がなくなるまで繰り返し処理を行う。
+
     Args:
         x (numpy.array): x座標点列
         y (numpy.array): x座標点列
@@ -1161,34 +2086,40 @@ def remove_self_collision(x, y):
         numpy.array : 自己交差修正後のy座標点列
         bool: True:自己交差あり/ False:自己交差なし
     """
-
-    # 同一点があると正しく自己交差を検出できないため、削除する
-    x, y = remove_same_point(x, y)
-    
-    new_x = [x[0]]
-    new_y = [y[0]]
     detection = False
+    self_col = True
     
-    i = 1
-    while i < len(x):
-        j = i+1
-        p1 = [x[i-1], y[i-1]]
-        p2 = [x[i], y[i]]
-        while j < len(x)-3:
-            p3 = [x[j], y[j]]
-            p4 = [x[j+1], y[j+1]]
-            if cross_judge(p1, p2, p3, p4) == True:
-                detection = True
-                #cx, cy = get_cross_point_from_point(p1[0], p1[1], p3[0], p3[1], p2[0], p2[1], p4[0], p4[1])
-                #new_x.append(cx)
-                #new_y.append(cy)             
-                i = j+1
-            j += 1
-        new_x.append(x[i])
-        new_y.append(y[i])
-        i += 1
+    while self_col == True:
+        # 同一点があると正しく自己交差を検出できないため、削除する
+        x, y = remove_same_point(x, y)
+        x = np.array(x)
+        y = np.array(y)
+        
+        # i番目の線分と交差する線分のうち、最も後ろの線分番号を求める
+        # 終点付近の3線分は、判定の対象外とする
+        cross_i, cross_j, cross_x, cross_y = get_cross_segments(get_segments(x, y))
+        mask = cross_j < len(x) - 3
+        last_cross = np.full(len(x), -1)
+        np.maximum.at(last_cross, cross_i[mask], cross_j[mask])
         
-    return np.array(new_x), np.array(new_y), detection
+        self_col = np.any(mask)
+        if self_col == True:
+            detection = True
+            
+        # 交差した線分の間の座標点を削除する
+        new_x = [x[0]]
+        new_y = [y[0]]
+        i = 1
+        while i < len(x):
+            if last_cross[i-1] > 0:
+                i = last_cross[i-1] + 1
+            new_x.append(x[i])
+            new_y.append(y[i])
+            i += 1
+        x = np.array(new_x)
+        y = np.array(new_y)
+        
+    return x, y, detection
 
 
 def remove_collision(x1, y1, x2, y2):
@@ -1200,6 +2131,9 @@ def remove_collision(x1, y1, x2, y2):
 
         次の線：始点から交点までを削除
 
+    交差は、get_cross_segmentsにより検出する。交差が複数ある場合は、今の線の線分番号が最も若い交差
+    (同じ線分で複数交差する場合は、次の線の線分番号が最も若い交差)を用いる。
+
     Args:
         x1 (_type_): 今の線のx座標点列
         y1 (_type_): 今の線のy座標点列
@@ -1217,29 +2151,15 @@ def remove_collision(x1, y1, x2, y2):
     x1, y1 = remove_same_point(x1, y1)
     x2, y2 = remove_same_point(x2, y2)
     
-    detection = False 
-    num1 = 0
-    num2 = 0
-    cx = 0
-    cy = 0
+    cross_i, cross_j, cross_x, cross_y = get_cross_segments(get_segments(x1, y1), get_segments(x2, y2))
+    detection = len(cross_i) > 0
     
-    i = 1
-    while (i < len(x1)) and (detection==False):
-        j = 1
-        p1 = [x1[i-1], y1[i-1]]
-        p2 = [x1[i], y1[i]]
-        while (j < len(x2)) and (detection==False):
-            p3 = [x2[j-1], y2[j-1]]
-            p4 = [x2[j], y2[j]]
-            if cross_judge(p1, p2, p3, p4) == True:
-                detection = True
-                num1 = i
-                num2 = j 
-                cx, cy = get_cross_point_from_point(p1[0], p1[1], p3[0], p3[1], p2[0], p2[1], p4[0], p4[1])         
-            j += 1
-        i += 1
-        
     if detection == True:
+        # 交差は線分番号の昇順に並んでいるので、先頭の交差を用いる
+        num1 = cross_i[0] + 1
+        num2 = cross_j[0] + 1
+        cx = cross_x[0]
+        cy = cross_y[0]
         new_x1 = x1[:num1]
         new_y1 = y1[:num1]
         new_x2 = x2[num2:]
@@ -1278,4 +2198,207 @@ def rotate(x, y, sita, rx, ry):
     rot_y = rot_p[1] + ry
 
     return rot_x, rot_y
-    
\ No newline at end of file
+
+
+def make_offset_path(x_array, y_array, u_array, v_array, z_xy, z_uv, z_mach):
+    """ワーク上のXY, UV座標点列から、マシン駆動面上の座標点列を作成する
+
+    XY面とUV面の対応する点を結ぶ直線(ワイヤー)を、ワークの中間面を中心として、
+    ワーク面とマシン駆動面の距離の比で延長した点を、マシン駆動面上の座標点とする。
+
+    Args:
+        x_array (numpy.array): XY面のx座標点列
+        y_array (numpy.array): XY面のy座標点列
+        u_array (numpy.array): UV面のu座標点列
+        v_array (numpy.array): UV面のv座標点列
+        z_xy (float): xy平面とxy駆動面側のCNC駆動面間の距離
+        z_uv (float): uv平面とuv駆動面側のCNC駆動面間の距離
+        z_mach (float): CNC駆動面間の距離
+
+    Returns:
+        numpy.array: XY駆動面のx座標点列
+        numpy.array: XY駆動面のy座標点列
+        numpy.array: UV駆動面のu座標点列
+        numpy.array: UV駆動面のv座標点列
+    """
+    x_array = np.asarray(x_array, dtype = float)
+    y_array = np.asarray(y_array, dtype = float)
+    u_array = np.asarray(u_array, dtype = float)
+    v_array = np.asarray(v_array, dtype = float)
+    
+    z_work_mid = (z_mach - z_xy - z_uv)/2.0 + z_xy
+    l_xy_work = np.abs(z_work_mid - z_xy)
+    l_uv_work = np.abs((z_mach - z_uv) - z_work_mid)
+    l_xy_mach = np.abs(z_work_mid)
+    l_uv_mach = np.abs(z_mach - z_work_mid)
+    
+    if l_xy_work == 0 or l_uv_work == 0:
+        k_xy = 1.0
+        k_uv = 1.0        
+    else:
+        k_xy = l_xy_mach/ l_xy_work
+        k_uv = l_uv_mach/ l_uv_work
+    
+    xu_mid = (x_array + u_array)/ 2.0
+    yv_mid = (y_array + v_array)/ 2.0
+    dx = x_array - xu_mid
+    du = u_array - xu_mid
+    dy = y_array - yv_mid
+    dv = v_array - yv_mid
+    
+    new_x = dx*k_xy + xu_mid
+    new_y = dy*k_xy + yv_mid
+    new_u = du*k_uv + xu_mid
+    new_v = dv*k_uv + yv_mid
+    
+    return new_x, new_y, new_u, new_v
+
+
+class PathBuffer:
+    """x,y,u,vの座標点列を、線ごとの配列(チャンク)のリストとして蓄積する
+
+    座標点列を追加するたびにnp.concatenateで配列を作り直すと、計算量が全体の点数の2乗に比例するため、
+    追加時はチャンクをリストに格納するのみとし、get_arrayで1度だけ結合する。
+
+    Attributes:
+        x_list(list): x座標点列のチャンクのリスト
+        y_list(list): y座標点列のチャンクのリスト
+        u_list(list): u座標点列のチャンクのリスト
+        v_list(list): v座標点列のチャンクのリスト
+        length(int): 蓄積した座標点の数
+    """
+    def __init__(self, x, y, u, v):
+        """PathBufferのコンストラクタ
+
+        Args:
+            x (numpy.array): 最初のx座標点列
+            y (numpy.array): 最初のy座標点列
+            u (numpy.array): 最初のu座標点列
+            v (numpy.array): 最初のv座標点列
+        """
+        self.x_list = []
+        self.y_list = []
+        self.u_list = []
+        self.v_list = []
+        self.length = 0
+        self.append(x, y, u, v)
+
+
+    def append(self, x, y, u, v):
+        """座標点列を末尾に追加する
+
+        Args:
+            x (numpy.array): 追加するx座標点列
+            y (numpy.array): 追加するy座標点列
+            u (numpy.array): 追加するu座標点列
+            v (numpy.array): 追加するv座標点列
+        """
+        if len(x) > 0:
+            self.x_list.append(np.asarray(x, dtype = float))
+            self.y_list.append(np.asarray(y, dtype = float))
+            self.u_list.append(np.asarray(u, dtype = float))
+            self.v_list.append(np.asarray(v, dtype = float))
+            self.length += len(x)
+
+
+    def get_last_point(self, n):
+        """末尾からn点の座標点列を取得する
+
+        Args:
+            n (int): 取得する点数
+
+        Returns:
+            numpy.array: 末尾からn点のx座標点列
+            numpy.array: 末尾からn点のy座標点列
+            numpy.array: 末尾からn点のu座標点列
+            numpy.array: 末尾からn点のv座標点列
+        """
+        # 末尾のチャンクから、n点以上となるまでチャンクを遡る
+        i = len(self.x_list)
+        num = 0
+        while (i > 0) and (num < n):
+            i -= 1
+            num += len(self.x_list[i])
+        
+        x = np.concatenate(self.x_list[i:], 0)[-n:]
+        y = np.concatenate(self.y_list[i:], 0)[-n:]
+        u = np.concatenate(self.u_list[i:], 0)[-n:]
+        v = np.concatenate(self.v_list[i:], 0)[-n:]
+        return x, y, u, v
+    
+
+    def get_array(self):
+        """蓄積したすべての座標点列を結合して出力する
+
+        Returns:
+            numpy.array: x座標点列
+            numpy.array: y座標点列
+            numpy.array: u座標点列
+            numpy.array: v座標点列
+        """
+        x = np.concatenate(self.x_list, 0)
+        y = np.concatenate(self.y_list, 0)
+        u = np.concatenate(self.u_list, 0)
+        v = np.concatenate(self.v_list, 0)
+        return x, y, u, v
+
+
+class ArcLengthCurve:
+    """線長を正規化した媒介変数tで、x, y座標を補完する区分多項式の曲線
+
+    x, y座標を1つの区分多項式(scipy.interpolate.PPoly)にまとめて保持するため、
+    任意の媒介変数列での評価は、区間の探索(searchsorted)と多項式の評価を1度行うのみとなる。
+    ただし、1次スプラインの座標は、従来のinterp1dと同じ結果となるよう、np.interpで評価する。
+
+    Attributes:
+        t_p(numpy.array): 元の座標点に対応する媒介変数の配列（累積線長を0~1に正規化した値）
+        length_array(numpy.array): 元の座標点までの累積線長
+        kind(str): 補完方法（"linear", "pchip", "cubic"）
+        x(numpy.array): 元のx座標点列
+        y(numpy.array): 元のy座標点列
+        ppoly(scipy.interpolate.PPoly): x, y座標を補完する区分多項式
+    """
+    def __init__(self, x, y, length_array, kind):
+        """ArcLengthCurveのコンストラクタ
+
+        Args:
+            x (numpy.array): x座標点列
+            y (numpy.array): y座標点列
+            length_array (numpy.array): 始点から各座標点までの累積線長
+            kind (str): 補完方法（"linear", "pchip", "cubic"）
+        """
+        self.length_array = np.asarray(length_array, dtype = float)
+        self.t_p = self.length_array/self.length_array[-1]
+        self.kind = kind
+        self.x = np.asarray(x, dtype = float)
+        self.y = np.asarray(y, dtype = float)
+        xy = np.c_[self.x, self.y]
+        
+        if kind == "linear":
+            # 1次の区分多項式（係数は、傾きと区間始点の座標）
+            c = np.empty((2, len(self.t_p) - 1, 2))
+            c[0] = np.diff(xy, axis = 0)/np.diff(self.t_p)[:, None]
+            c[1] = xy[:-1]
+            self.ppoly = intp.PPoly(c, self.t_p)
+        elif kind == "pchip":
+            self.ppoly = intp.PchipInterpolator(self.t_p, xy)
+        else:
+            self.ppoly = intp.CubicSpline(self.t_p, xy)
+        
+        
+    def evaluate(self, t, nu = 0):
+        """媒介変数tにおける座標(nu > 0の場合はnu階微分)を計算する
+
+        Args:
+            t (numpy.array): 媒介変数
+            nu (int): 微分の階数
+
+        Returns:
+            numpy.array: x座標（またはそのnu階微分）
+            numpy.array: y座標（またはそのnu階微分）
+        """
+        if (self.kind == "linear") and (nu == 0):
+            return np.interp(t, self.t_p, self.x), np.interp(t, self.t_p, self.y)
+        xy = self.ppoly(t, nu)
+        return xy[:, 0], xy[:, 1]
+
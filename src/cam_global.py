@@ -27,4 +27,27 @@ R_C_MIN = 1                             #単位：mm　スプラインをリフ
 DIST_DELTA = 0.0001                     #単位：mm スプライン補完可能な最小距離
 USE_PCHIP = True                        #不連続点を持つスプラインに対応する
 FILET_INTERPOLATE = True                #フィレット補完する
-DIST_FILET = 0.3                        #単位:mm フィレットを挿入する端点同士の間隔。これより離れていると挿入する
\ No newline at end of file
+DIST_FILET = 0.3                        #単位:mm フィレットを挿入する端点同士の間隔。これより離れていると挿入する
+N_GAUSS_LENGTH = 5                      #スプラインの線長計算に用いるガウス・ルジャンドル求積の分点数。0以下とすると、quadによる適応積分で計算する（検証用）
+TOL_GAUSS_LENGTH = 1e-6                 #単位：mm ガウス・ルジャンドル求積の区間ごとの許容誤差。これを超える区間はquadによる適応積分で計算する
+ARC_FITTING = False                     #Gコード生成時に、xy平面とuv平面で同時に円弧とみなせる点列をG02/G03に置き換える
+TOL_ARC_FITTING = 0.01                  #単位：mm 円弧とみなす許容誤差（各点および点間の弦と円弧との距離）
+N_ARC_FITTING_MIN = 5                   #円弧に置き換える点列の最小点数
+R_ARC_FITTING_MAX = 5000                #単位：mm 円弧とみなす半径の上限。これより大きい場合は直線とみなし、G01で出力する
+SIMPLIFY_PATH = False                   #Gコード生成時に、xy平面とuv平面の点列を対応関係を保ったまま間引く（Douglas-Peucker法）
+TOL_SIMPLIFY_PATH = 0.01                #単位：mm 点列を間引く際の許容誤差。間引いた後の点列は、xy平面、uv平面ともに元の点列からこの距離以内となる
+ADAPTIVE_SAMPLING = False               #カットパス作成時に、分割距離によらず、xy平面とuv平面の曲率に応じて線を分割する
+TOL_ADAPTIVE_SAMPLING = 0.01            #単位：mm 曲率に応じて分割する際の、弦と線との許容誤差
+DIST_ADAPTIVE_MIN = 0.1                 #単位：mm 曲率に応じて分割する際の点間隔の下限
+DIST_ADAPTIVE_MAX = 5                   #単位：mm 曲率に応じて分割する際の点間隔の上限
+N_ADAPTIVE_REFINE = 5                   #曲率に応じて分割した後、弦と線との距離が許容誤差を超える区間に中点を追加する回数の上限
+TOL_ARC_POINT = 0.01                    #単位：mm 円弧・円・楕円を座標点列に変換するときの、弦と円弧との距離（矢高）の許容値
+ARC_DIRECT_OUTPUT = False               #xy平面とuv平面の線がともに円弧(ArcObject)で、角度が一致する場合、G02/G03で直接出力する
+DIST_ARC_ANGLE = 1e-6                   #単位：rad xy平面とuv平面の円弧の角度が一致しているとみなす角度差
+NURBS_EVALUATION = True                 #SPLINEを、次数・ノット・重みからNURBSとして評価して読み込む。Falseとすると、制御点を通るスプラインとして読み込む（Ver4.0以前と同じ）
+TOL_NURBS_POINT = 0.01                  #単位：mm NURBSを座標点列に変換するときの、弦と曲線との距離の許容値
+N_NURBS_SAMPLE = 8                      #NURBSの点数を見積もる際の、ノット区間ごとの分割数
+GEOMETRY_CACHE = True                   #dxfファイルの読み込み結果（リファイン後の座標点列）を保存し、同じファイルを同じ設定で読み込む場合に再利用する
+GEOMETRY_CACHE_DIRNAME = "geometry_cache"   #読み込み結果を保存するフォルダ名（実行ファイルと同じフォルダに作成する）
+GEOMETRY_CACHE_SIZE_MAX = 100           #単位：MB 保存する読み込み結果の合計サイズの上限。超えた場合は、最後に使用した日時が古いものから削除する
+DXF_STREAM_LOAD = False                 #dxfファイルを、ファイル全体を保持せずに先頭から1回走査して読み込む（iterdxf）。オブジェクト数が多い図面でメモリ使用量と読み込み時間を削減する
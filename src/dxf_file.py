@@ -6,15 +6,14 @@
 # 外部ライブラリ
 import tkinter as tk
 import tkinter.ttk as ttk
-import ezdxf as ez
 import numpy as np
-from matplotlib import pyplot as plt
 import traceback
 import copy
 
 # 内部ライブラリ
 from cam_generic_lib import *
 from line_object import *
+from section import *
 from cam_global import *
 from error_log import *
     
@@ -151,15 +150,22 @@ class SelectedPoint:
 
 
 
-class DxfFile:
+class DxfFile(Section):
     """dxfファイルに関連する情報として、LineObjectやSuperTableなどを格納する。
 
+    線の読み込み・整列・オフセットなどの処理はSectionで行い、本クラスはtableとグラフの操作を追加する。
+
     Note:
         ox, oy, rx, ry, sitaの値は、元のdxfファイルに対しての値である。
 
     Note:
         line_listのインデックスと、tableのインデックスは同期させるように処理する。
         例えば、tableで線番号が[2,1,3]と線が並ぶとき、line_listの線も[2,1,3]と並べる。
+
+    Note:
+        tableの行のアイテムIDは、item_listにtableでの並び順に格納し、item_indexでアイテムIDからインデックスを引けるようにする。
+        これにより、アイテムIDとインデックスの変換でtableの全行を走査しないようにする。
+        tableへの行の追加・削除は、insert_table_row, delete_lineを用いて、item_list, item_indexと同期させること。
     
 
     Attributes:
@@ -167,15 +173,9 @@ class DxfFile:
         canvas(matplotlib.backends.backend_tkagg.FigureCanvasTkAgg): グラフをtkinterに表示するためのオブジェクト(描画時に必要)
         table(SuperTable): dxfファイル内の線を管理するテーブル
         x_table(SuperTable): もう1つの断面のdxfファイル内の線を管理するテーブル（X-YであればU-V, U-VであればX-Y）
-        name(str): 断面の名称(X-Y or U-V)
-        line_list(list): dxfファイル内の線をLineObjectに変換したオブジェクトを格納するリスト
         selected_point(SelectedPoint): グラフ内で選択された点を管理するSelectedPointオブジェクト
-        line_num_max(int): 線番号の最大値
-        ox(float): グラフの原点のx座標
-        oy(float): グラフの原点のy座標
-        rx(float): グラフの回転中心のx座標
-        ry(float): グラフの回転中心のy座標 
-        sita(float): グラフの回転角度[rad]                
+        item_list(list): tableの行のアイテムIDを、tableでの並び順に格納するリスト
+        item_index(dict): アイテムIDをキーとして、tableでのインデックスを格納する辞書
 
 
 
@@ -192,77 +192,53 @@ class DxfFile:
 
         """
 
+        Section.__init__(self, name)
         self.ax = ax
         self.canvas = canvas
         self.table = table
         self.x_table = x_table
-        self.name = name
-        self.line_list = []
         self.selected_point = SelectedPoint(np.nan, np.nan, None) # 選択点はないので、リセット時の値を設定
-        self.line_num_max = 0
-        self.ox = 0
-        self.oy = 0
-        self.rx = 0
-        self.ry = 0
-        self.sita = 0
+        self.item_list = []
+        self.item_index = {}
     
     
-    def load_file(self, filename, is_refine):
-        """filenameで指定されたdxfファイルを読み込む
+    def load_file(self, filename, is_refine, line_list = None):
+        """filenameで指定されたdxfファイルを読み込み、tableに表示する
 
-        AUTOSORT_WHEN_LOADFILE = Trueの場合、ロード時に自動で線を整列する
+        読み込みと自動整列は、Section.load_fileで行う。
 
         Args:
             filename (str): 読み込むdxfファイルのパス
             is_refine (bool): True: スプライン点列をリファインして読み込む, False:リファインしない
+            line_list (list, optional): 読み込み済みの線。Noneの場合はfilenameから読み込む. Defaults to None.
         """
         
         # テーブル初期化
         self.table.reset()
-        # ファイルのパス更新
-        self.filename = filename
-        # 線のリストを初期化
-        self.line_list = []
-        # dxfファイルをline_listへ読み込み
-        self.reload(is_refine)
+        self.item_list = []
+        self.item_index = {}
+        # dxfファイルをline_listへ読み込み、自動整列する
+        Section.load_file(self, filename, is_refine, line_list)
         # テーブルの選択イベントに、selectedをバインド
         self.table.table.bind("<<TreeviewSelect>>", self.selected)
         # 選択点を非選択に設定
         self.selected_point.reset()
-        # 原点、回転中心、回転角を初期化
-        self.ox = 0
-        self.oy = 0
-        self.rx = 0
-        self.ry = 0
-        self.sita = 0
         
         # テーブルの1番上のアイテムを選択
-        items = self.table.table.get_children()
+        items = self.get_item(all=True)
         self.table.table.selection_set(items[0])
         self.table.table.see(items[0])
-        
-        # ロード時に自動整列する場合
-        if AUTOSORT_WHEN_LOADFILE == True:
-            # 一番最初に読み込まれた線を始点として、自動整列
-            self.sort_line()
-            # 線の番号を、tableでの線の並び順に再設定する
-            self.reset_line_num()
 
     
     def reset_line_num(self):
-        """線の番号を、line_listのインデックス順に再設定する
+        """線の番号を、line_listのインデックス順に再設定し、tableの表示を更新する
 
         Note:
             line_listのインデックスとtableのインデックスは同期しているので、
             tableの並び順（昇順）に線の番号が振り直される。
 
         """
-        i = 0
-        # line_list内のすべての線に対して実行
-        for line in self.line_list:
-            # lineはLineObjectのインスタンス
-            line.set_num(i)
-            i += 1
+        Section.reset_line_num(self)
         # tabelの表示を更新
         self.table_reload()
             
@@ -291,20 +267,20 @@ class DxfFile:
 
         """
 
-        # all=Trueの場合、table内のすべてのアイテムを取得
+        # all=Trueの場合、すべての行のインデックス
         if all == True:
-            items = self.table.table.get_children()
-        # all=Falseの場合、table内の選択されたアイテムを取得
+            indexs = list(range(len(self.item_list)))
+        # all=Falseの場合、table内の選択されたアイテムのインデックス
         else:
             items = self.table.table.selection()
-        indexs = []
-        # 選択されたアイテムが1つ以上の場合。0の場合は空リストを出力
-        if not len(items) == 0:
-            # 選択されたアイテムすべてに対して実行
-            for item in items:
-                # アイテムのインデックス(=行番号-1）を取得
-                index = self.table.table.get_children().index(item)
-                indexs.append(index)
+            indexs = []
+            # 選択されたアイテムが1つ以上の場合。0の場合は空リストを出力
+            if not len(items) == 0:
+                # 選択されたアイテムすべてに対して実行
+                for item in items:
+                    # アイテムのインデックス(=行番号-1）を取得
+                    index = self.item_index[item]
+                    indexs.append(index)
         return indexs
     
 
@@ -333,7 +309,7 @@ class DxfFile:
         """
         # all=Trueの場合、table内のすべてのアイテムを取得
         if all == True:
-            items = self.table.table.get_children()
+            items = tuple(self.item_list)
         # all=Falseの場合、table内の選択されたアイテムを取得
         else:
             items = self.table.table.selection()
@@ -361,13 +337,13 @@ class DxfFile:
         """
         # indexsがint型の場合
         if isinstance(indexs, int) == True:
-            item = self.table.table.get_children()[indexs]
+            item = self.item_list[indexs]
             return item
         # indexsがint型でない場合(リストの場合)
         else:
             items = []
             for index in indexs:
-                item = self.table.table.get_children()[index]
+                item = self.item_list[index]
                 items.append(item)
             return items
 
@@ -393,117 +369,70 @@ class DxfFile:
         """
         # itemsがstr型の場合
         if isinstance(items, str) == True:
-            index = self.table.table.get_children().index(items)
+            index = self.item_index[items]
             return index
         # itemsがstr型でない(リスト)場合
         else:
             indexs = []
             for item in items:
-                index = self.table.table.get_children().index(item)
+                index = self.item_index[item]
                 indexs.append(index)
             return indexs
 
 
-    def reload(self, is_refine):
-        """filenameで指定されたdxfファイル上の線を読み込み、LineObjectに変換した上で、line_listへ格納する
-
-        dxfファイルのうち、LINE, SPLINE, ARC, LWPOLYLINE のオブジェクトを抽出し、以下のLineObjectに変換する。
+    def insert_table_row(self, index, line):
+        """tableのインデックスの位置に、線の情報を表示する行を挿入する
 
-        +-----------+-----------+----------+------------+
-        |読み込み順 |dxf object |LineObject             |
-        |           +           +----------+------------+
-        |           |           |line_type |interp_mode |
-        +-----------+-----------+----------+------------+
-        |1          |SPLINE     |spline    |cubic       |
-        +-----------+-----------+----------+------------+
-        |2          |ARC        |spline    |cubic       |
-        +-----------+-----------+----------+------------+
-        |3          |LWPOLYLINE |spline    |linear      |
-        +-----------+-----------+----------+------------+
-        |4          |LINE       |line      |None        |
-        +-----------+-----------+----------+------------+
+        挿入した行のアイテムIDを、item_list, item_indexに反映する。
 
-        LineObjectの線番号(num)は、読み込んだ順に付与する。同種のdxfオブジェクトでは線番号の付与順は任意である。
-        (dxf objectのクエリで早く検索された順)
+        Args:
+            index (int): 行を挿入するインデックス。行数と等しい場合は、末尾に追加する
+            line (LineObject): 行に表示する線
 
-        線番号の最大値(=読み込んだ線の本数)は、line_num_maxに格納する。
+        Returns:
+            str: 挿入した行のアイテムID
+        """
+        item = self.table.table.insert("", index, values=(line.num, format(line.offset_dist, '.4f'),\
+                                                          line.line_type, format(line.cutspeed_work,'.2f')))
+        
+        # 末尾への追加の場合、既存の行のインデックスは変わらない
+        if index == len(self.item_list):
+            self.item_list.append(item)
+            self.item_index[item] = index
+        # 途中への挿入の場合、後ろの行のインデックスがずれるので、再計算する
+        else:
+            self.item_list.insert(index, item)
+            self.update_item_index()
+        
+        return item
 
 
-        Args:
-            is_refine (bool): True: スプライン点列をリファインして読み込む, False:リファインしない
+    def update_item_index(self):
+        """item_listの並び順から、item_indexを再計算する
+        """
+        self.item_index = {}
+        i = 0
+        while i < len(self.item_list):
+            self.item_index[self.item_list[i]] = i
+            i += 1
 
 
-        Note:
-            ARCは、arc_to_splineにより円弧上の座標点列を計算し、splineに変換する。
+    def reload(self, is_refine, line_list = None):
+        """filenameで指定されたdxfファイル上の線を、Section.reloadによりline_listへ読み込み、tableに行を追加する
 
-        """
+        読み込むdxfオブジェクトとLineObjectの対応は、load_dxf_linesを参照。
 
-        # dxfファイルの読み込み
-        dwg = ez.readfile(self.filename)
-        modelspace = dwg.modelspace()
+        Args:
+            is_refine (bool): True: スプライン点列をリファインして読み込む, False:リファインしない
+            line_list (list, optional): 読み込み済みの線。Noneの場合はfilenameから読み込む. Defaults to None.
 
-        # dxfファイルからのオブジェクトの取得
-        line_segment_obj = modelspace.query('LINE')
-        spline_obj = modelspace.query('SPLINE')
-        arc_obj = modelspace.query('ARC')
-        poly_obj = modelspace.query('LWPOLYLINE')
+        """
+        Section.reload(self, is_refine, line_list)
         
-        # スプラインオブジェクトのLineObjectへの変換
         i = 0
-        while i < len(spline_obj):
-            spline = spline_obj[i]
-            spline_data = np.array(spline.control_points)[:]
-            line = LineObject(spline_data[:,0], spline_data[:,1], i, is_refine) 
-            self.line_list.append(line)
-            self.table.table.insert("", "end", values=(line.num, format(line.offset_dist, '.4f'),\
-                                                       line.line_type, format(line.cutspeed_work,'.2f')))
+        while i < len(self.line_list):
+            self.insert_table_row(i, self.line_list[i])
             i += 1
-
-        # 円弧オブジェクトのLineObjectへの変換
-        i_arc = 0        
-        while i_arc < len(arc_obj):
-            arc = arc_obj[i_arc]
-            # 円弧の情報から、スプライン座標点列の計算
-            arc_data = arc_to_spline(arc)
-            line = LineObject(arc_data[:,0], arc_data[:,1], i + i_arc, is_refine) 
-            self.line_list.append(line)
-            self.table.table.insert("", "end", values=(line.num, format(line.offset_dist, '.4f'), \
-                                                       line.line_type, format(line.cutspeed_work,'.2f')))
-            i_arc += 1        
-        i = i + i_arc
-
-        # ポリオブジェクトのLineObjectへの変換
-        i_poly = 0
-        while i_poly < len(poly_obj):
-            poly = poly_obj[i_poly]
-            poly_data = poly_to_spline(poly)
-            line = LineObject(poly_data[:,0], poly_data[:,1], i + i_poly, is_refine) 
-            line.interp_mode = "linear" #poly_lineであることを設定する
-            self.line_list.append(line)
-            self.table.table.insert("", "end", values=(line.num, format(line.offset_dist, '.4f'), \
-                                                       line.line_type, format(line.cutspeed_work,'.2f')))
-            i_poly += 1    
-        i = i + i_poly
-
-        # 線オブジェクトのLineObjectへの変換
-        j = 0
-        k = 0
-        while j < len(line_segment_obj):
-            line_segment = line_segment_obj[j]
-            line_segment_data = [line_segment.dxf.start, line_segment.dxf.end]
-            line_segment_data = np.array(line_segment_data)[:,0:2]
-            
-            # 長さがほとんどない線分は追加しない
-            if norm(line_segment_data[0,0],line_segment_data[0,1],line_segment_data[1,0],line_segment_data[1,1]) > DIST_NEAR:
-                line = LineObject(line_segment_data[:,0], line_segment_data[:,1], i+k, is_refine) 
-                self.line_list.append(line)
-                self.table.table.insert("", "end", values=(line.num, format(line.offset_dist, '.4f'), \
-                                                           line.line_type, format(line.cutspeed_work,'.2f')))
-                k += 1
-            j += 1
-        
-        # 線番号の最大値(=読み込んだ線の本数)にて、line_num_maxを更新
-        self.line_num_max = i+k-1
         
 
     def table_reload(self):
@@ -749,11 +678,12 @@ class DxfFile:
                 
                     try:
                         # 相手テーブルの同じ行のインデックスを取得
+                        # 相手テーブルの行のアイテムIDは、ループの前に1度だけ取得する
+                        x_items = self.x_table.table.get_children()
                         x_selected_items = []
                         for item in items:
                             index = self.get_index_from_item(item)
-                            x_item = self.x_table.table.get_children()[index]
-                            x_selected_items.append(x_item)
+                            x_selected_items.append(x_items[index])
                         # 相手テーブルに選択イベントを発生
                         self.x_table.table.selection_set(x_selected_items)
                         # 相手テーブルの同じ行を選択表示
@@ -795,102 +725,19 @@ class DxfFile:
         Args:
             offset_dist (float): オフセット距離
         """
-
-        # table内の全アイテムIDを取得。line_listの要素全てに対して操作しても同じ
-        all_items = self.get_item(all=True)
-
-        # すべての線にオフセット距離を設定
-        for item in all_items:
-            index = self.get_index_from_item(item)
-            line = self.line_list[index]
-            line.set_offset_dist(offset_dist)
+        Section.set_offset_dist(self, offset_dist)
 
         # グラフが更新されるので、選択点をリセット
         self.selected_point.reset()
 
     
-    def remove_self_collision(self):
-        """オフセットにより生じた自己交差を修正する
-
-        table内のすべての線の自己交差を判定し、自己交差していれば修正する。
-
-        自己交差が検出された線番号をリストとして出力する。
-
-        Returns:
-            list: 自己交差が検出された線番号のリスト
-        """
-        
-        # table内のすべての線のアイテムIDを取得
-        all_items = self.get_item(all=True)
-
-        # 自己交差している線番号のリスト
-        self_collision_line_nums = []
-        
-        # すべての線に自己交差判定&修正を実施
-        for item in all_items:
-            index = self.get_index_from_item(item)
-            line = self.line_list[index]
-            # 自己交差判定&修正
-            detection = line.remove_self_collision()
-            
-            # 自己交差が検出された場合、線番号をリストに格納
-            if detection == True:
-                self_collision_line_nums.append(line.num)
-
-        return self_collision_line_nums
-        
-
-    
     def remove_line_collision(self):
-        """オフセットにより生じた線同時の端点の交差を修正する
-
-        line_list内のi番目とi+1番目(i=0...N-1)に対し、remove_collisionにより交差を判定する。
-
-        交差している場合、i番目とi+1番目の線の座標点列を、交差を修正した座標点列に置き換える。
-
-        更に、交差が検出された線のペアをリストに格納し、出力する。
+        """オフセットにより生じた線同時の端点の交差を、Section.remove_line_collisionにより修正する
 
         Returns:
             list: 交差が検出された線同士の線番号（ペア）のリスト
-
-        Note:
-            オフセットが0の状態で、i番目の線の終点と、i+1番目の線の始点が一致している必要がある。
-            
-            自動整列後に実行すること。
-
         """
-
-        # table内の全アイテムIDを取得。line_listの要素全てに対して操作しても同じ
-        all_items = self.get_item(all=True)
-
-        # 交差が検出された線同士の線番号（ペア）のリストを初期化
-        line_nums = []
-
-        # i番目とi+1番目の線のペアに対して、交差を判定する
-        i = 0
-        while i < len(all_items)-1:
-            index1 = self.get_index_from_item(all_items[i]) # i番目のインデックス
-            index2 = self.get_index_from_item(all_items[i+1]) # i+1番目のインデックス
-            line1 = self.line_list[index1] # i番目の線
-            line2 = self.line_list[index2] # i+1番目の線
-            
-            # 交差検出
-            x1 = line1.x
-            y1 = line1.y
-            x2 = line2.x
-            y2 = line2.y
-            x1, y1, x2, y2, detection = remove_collision(x1, y1, x2, y2)
-
-            # 交差が検出された場合
-            if detection == True:
-                # 交差除去後のx,y座標でi番目とi+1番目の座標点列を置換
-                line1.x = x1
-                line1.y = y1
-                line2.x = x2
-                line2.y = y2
-                # 交差が検出された線のペアをリストに格納
-                line_nums.append([line1.num, line2.num])
-            i += 1
+        line_nums = Section.remove_line_collision(self)
 
         # グラフが更新されるので、選択点をリセット
         self.selected_point.reset()
@@ -1179,6 +1026,8 @@ class DxfFile:
         self.line_list.pop(index)
         # インデックスに該当する行をtableから削除
         self.table.table.delete(item)
+        self.item_list.pop(index)
+        self.update_item_index()
     
 
     def add_line(self, item, line):
@@ -1198,26 +1047,14 @@ class DxfFile:
         # line_listの指定のインデックスの位置にlineを挿入
         self.line_list.insert(insert_index, line)
         # tableの指定のインデックスの位置に行を挿入&lineの情報を表示
-        self.table.table.insert("",  insert_index, values=(line.num, format(line.offset_dist, '.4f'),\
-                                                   line.line_type, format(line.cutspeed_work,'.2f')))
+        self.insert_table_row(insert_index, line)
     
 
     def reverse_all(self):
         """line_list内のLineObjectの座標点列と、line_listを反転する
 
         """
-
-        # table内のすべての行のアイテムIDを取得
-        items = self.get_item(all = True)
-
-        # line_listを反転
-        self.line_list.reverse()
-        
-        # すべての線の座標点列の向きを反転する
-        for item in items:
-            index = self.get_index_from_item(item)
-            line = self.line_list[index]
-            line.toggle_cut_dir()
+        Section.reverse_all(self)
         
         # グラフが更新されるので、選択点を解除
         self.selected_point.reset()
@@ -1239,27 +1076,7 @@ class DxfFile:
     
     
     def sort_line(self):
-        """選択されている線を起点に、残りの線を並び替える。並び替え後、座標点列の向きを判定し、線に設定する。
-
-        線の並び替えは、以下の手順で実施する。
-
-            1. 選択されている線の終点から最も近い位置にあるライン端を検索する。
-
-            2. 1.のライン端を有するラインを、2番目に配置する。1.のライン端がラインの終端である場合，向きを入れ替える。
-
-            3. 1.のライン端の逆端から最も近い位置にあるライン端を検索する。
-
-            4. 3.のライン端を有するラインを、3番目に配置する。3.のライン端がラインの終端である場合，向きを入れ替える。
-
-            5. 3.のライン端から最も近い位置にあるライン端を検索する。
-
-            6. 3～5を、テーブルに表示されている全てのラインに対して実施する。
-                
-        Note:
-            CAD図面に複数の閉曲線が含まれる場合、選択した線の向きと同じ向きにすべての閉曲線を並び替える。
-
-        Note:
-            閉曲線かどうかの判定は、端点間の距離がDIST_NEAR以下かで判定する。
+        """選択されている線を起点に、Section.sort_line_fromにより残りの線を並び替える。
 
         Returns:
             int: 選択されている線の数
@@ -1267,8 +1084,6 @@ class DxfFile:
 
         # tableで選択されている行のアイテムIDを取得
         items = self.get_item()
-        # tableのすべての行のアイテムIDを取得
-        all_items = self.get_item(all = True)
         
         # 行の選択されている数が1つ以外の場合は終了
         if not(len(items) == 1):
@@ -1276,95 +1091,7 @@ class DxfFile:
         # 行の選択されている数が1つの場合
         else:
             # ソートの開始点を、選択した線に設定
-            item_st = items[0]
-            index_st = self.get_index_from_item(item_st)
-            line_st = self.line_list[index_st]
-
-            norm_mn = np.inf
-            x0 = line_st.ed[0]
-            y0 = line_st.ed[1]
-
-            x_array = np.array(line_st.x_raw)
-            y_array = np.array(line_st.y_raw)                
-            new_lines = [line_st]
-            new_line_list = []
-            x_array_list = []
-            y_array_list = []
-            
-            # ソートを実行
-            i = 0
-            while i < len(all_items) - 1:
-                norm_mn = np.inf
-                j = 0
-                while j < len(all_items):
-                    index = self.get_index_from_item(all_items[j])
-                    line = self.line_list[index]
-
-                    if (line in sum(new_line_list, [])) or (line in new_lines):
-                        pass
-                    
-                    else:
-                        norm_st = norm(x0, y0, line.st[0], line.st[1])
-                        norm_ed = norm(x0, y0, line.ed[0], line.ed[1])
-                        if min(norm_st, norm_ed) < norm_mn:
-                            line_mn = line
-                            norm_mn = min(norm_st, norm_ed)                      
-                            if norm_st < norm_ed:
-                                toggle = False
-                            else:
-                                toggle = True
-                    j += 1
-                
-                if toggle == True:
-                    line_mn.toggle_cut_dir()
-                x0 = line_mn.ed[0]
-                y0 = line_mn.ed[1]
-                
-                # 同じ閉曲線かどうかを判定
-                if norm_mn <= DIST_NEAR:
-                    new_lines.append(line_mn)
-                    x_array = np.concatenate([x_array, line_mn.x_raw], 0)
-                    y_array = np.concatenate([y_array, line_mn.y_raw], 0)
-                else:
-                    new_line_list.append(new_lines)
-                    x_array_list.append(x_array)
-                    y_array_list.append(y_array)
-                    new_lines = [line_mn]
-                    x_array = np.array(line_mn.x_raw)
-                    y_array = np.array(line_mn.y_raw)
-                
-                i += 1
-                
-            new_line_list.append(new_lines)
-            x_array_list.append(x_array)
-            y_array_list.append(y_array)    
-             
-            # 閉曲線の向きを判定
-            ccw_list = []
-            i = 0
-            while i < len(x_array_list):
-                x_array = x_array_list[i]
-                y_array = y_array_list[i]
-                ccw = detect_rotation(x_array, y_array)
-                ccw_list.append(ccw)
-                i += 1
-            
-            # 閉曲線が複数ある場合、残りの閉曲線の向きを最初の線の向きに合わせる
-            ccw_st = ccw_list[0]
-            i = 0
-            while i < len(ccw_list):
-                ccw = ccw_list[i]
-                new_lines = new_line_list[i]
-                if not(ccw == ccw_st):
-                    new_line_list[i] = new_lines[::-1]
-                    
-                for line in new_lines:
-                    if not(ccw == ccw_st):
-                        line.toggle_cut_dir()
-                    line.set_ccw(ccw_st)
-                i += 1
-            
-            self.line_list = sum(new_line_list,[])
+            self.sort_line_from(self.get_index_from_item(items[0]))
 
             # グラフが更新されるので、選択点を解除
             self.selected_point.reset()
@@ -1378,23 +1105,7 @@ class DxfFile:
             offset_ox (float): 原点のx座標
             offset_oy (float): 原点のy座標
         """
-        # 現在の原点の座標からの差分を計算する
-        dx = offset_ox - self.ox
-        dy = offset_oy - self.oy
-        # 原点の座標を更新する
-        self.ox = offset_ox
-        self.oy = offset_oy
-        # 回転中心の座標をオフセットする
-        self.rx = self.rx + dx
-        self.ry = self.ry + dy
-        
-        # table内のすべての行のアイテムIDを取得
-        all_items = self.get_item(all=True)
-        # table内のすべての線を、現在の原点の座標からの差分だけ移動する
-        for item in all_items:
-            index = self.get_index_from_item(item)
-            line = self.line_list[index]
-            line.move_origin(dx, dy)
+        Section.offset_origin(self, offset_ox, offset_oy)
         
         # グラフが更新されるので、選択点を解除する
         self.selected_point.reset()
@@ -1408,60 +1119,7 @@ class DxfFile:
             rx (float): 回転中心x座標
             ry (float): 回転中心y座標
         """
-        
-        # 回転中心の座標を更新
-        self.rx = rx
-        self.ry = ry
-        # 現在の回転角度からの差分を計算する
-        d_sita = sita - self.sita
-        # 回転角度を更新
-        self.sita = sita
-        
-        # table内のすべての行のアイテムIDを取得
-        all_items = self.get_item(all=True)
-        # table内のすべての線を、現在の回転角度からの差分だけ回転する
-        for item in all_items:
-            index = self.get_index_from_item(item)
-            line = self.line_list[index]
-            line.rotate(d_sita, rx, ry)
+        Section.rotate(self, sita, rx, ry)
         
         # グラフが更新されるので、選択点を解除する
         self.selected_point.reset()        
-    
-    
-    def get_cg(self):
-        """すべての線の重心の座標を計算する
-
-        重心は、すべての点の座標の平均値で計算する。
-        
-        Returns:
-            float: 重心のx座標
-            float: 重心のy座標
-        """
-        
-        # 平均値計算用にx,y座標を格納する配列を用意
-        x = np.array([])
-        y = np.array([])
-        
-        # table内のすべての行のアイテムIDを取得
-        all_items = self.get_item(all=True)
-        # table内のすべての線の座標を配列に格納
-        for item in all_items:
-            index = self.get_index_from_item(item)
-            line = self.line_list[index]
-            x = np.concatenate([x, line.x_raw], 0)
-            y = np.concatenate([y, line.y_raw], 0)
-        
-        # 格納したx,y座標の平均値を計算
-        # 配列長がゼロ出ない場合
-        if not(len(x) == 0):
-            cg_x = np.mean(x)
-            cg_y = np.mean(y)
-        # 配列長がゼロの場合
-        else:
-            cg_x = None
-            cg_y = None
-            
-        return cg_x, cg_y
-    
-
@@ -0,0 +1,231 @@
+# -*- coding: utf-8 -*-
+"""dxfファイルの読み込み結果（リファイン後の座標点列）を、ファイルに保存して再利用するライブラリ
+
+dxfファイルの読み込みでは、ezdxfによる解析と、スプラインのリファイン（refine_spline_curvature）に時間がかかる。
+同じdxfファイルを同じ設定で読み込む場合は、保存した読み込み結果から線を作成することで、これらの計算を省略する。
+
+読み込み結果は、dxfファイルの内容のハッシュ値と、読み込み結果に影響するcam_globalの設定値から作成したキーを
+ファイル名として、GEOMETRY_CACHE_DIRNAMEのフォルダに、1ファイルにつき1つの.npzファイルとして保存する。
+
+保存した.npzファイルの合計サイズがGEOMETRY_CACHE_SIZE_MAXを超えた場合は、最後に使用した日時（更新日時）が
+古いものから削除する(LRU)。
+
+"""
+
+# 外部ライブラリ
+import hashlib
+import os
+import numpy as np
+import traceback
+
+# 内部ライブラリ
+from cam_generic_lib import *
+from line_object import *
+from cam_global import *
+from error_log import *
+
+# 保存形式のバージョン。保存する内容を変更した場合は更新し、古い形式の読み込み結果を使用しないようにする
+GEOMETRY_CACHE_FORMAT = 2
+
+# 線の種類
+GEOMETRY_KIND_LINE = 0      # LineObject(座標点列)
+GEOMETRY_KIND_ARC = 1       # ArcObject(中心・半径・角度)
+
+
+def get_geometry_cache_dir():
+    """読み込み結果を保存するフォルダのパスを取得する
+
+    Returns:
+        str: 実行ファイルと同じフォルダにある、GEOMETRY_CACHE_DIRNAMEのフォルダのパス
+    """
+    return os.path.join(get_curdir(), GEOMETRY_CACHE_DIRNAME)
+
+
+def get_geometry_cache_key(filename, is_refine):
+    """dxfファイルの内容と読み込み設定から、読み込み結果を識別するキーを作成する
+
+    キーには、dxfファイルの内容のハッシュ値のほか、リファイン・NURBS評価・円弧の点数など、
+    読み込み後の座標点列に影響するcam_globalの設定値を含める。
+
+    Args:
+        filename (str): dxfファイルのパス
+        is_refine (bool): True: スプライン点列をリファインして読み込む, False:リファインしない
+
+    Returns:
+        str: キー（SHA-256のハッシュ値の16進数文字列）
+    """
+    setting = (GEOMETRY_CACHE_FORMAT, bool(is_refine), DIST_NEAR,
+               REFINE_SPLINE_PCHIP, DIST_REFINE_SPLINE, REFINE_SPLINE_EDGE, N_REFINE_SPLINE_MIN, N_SPLINE_EDGE, DIST_SPLINE_EDGE,
+               R_C_MAX, R_C_MIN, DIST_DELTA, USE_PCHIP, N_GAUSS_LENGTH, TOL_GAUSS_LENGTH,
+               TOL_ARC_POINT, NURBS_EVALUATION, TOL_NURBS_POINT, N_NURBS_SAMPLE)
+
+    hash_obj = hashlib.sha256()
+    f = open(filename, "rb")
+    hash_obj.update(f.read())
+    f.close()
+    hash_obj.update(repr(setting).encode("utf-8"))
+    return hash_obj.hexdigest()
+
+
+def load_geometry_cache(key):
+    """キーに対応する読み込み結果から、LineObjectのリストを作成する
+
+    読み込み結果が見つかった場合は、更新日時を現在時刻とし、最後に使用した日時として記録する。
+
+    Args:
+        key (str): get_geometry_cache_keyで作成したキー
+
+    Returns:
+        list: LineObjectのリスト。読み込み結果がない場合、または読み込めない場合はNone
+    """
+    file_path = os.path.join(get_geometry_cache_dir(), key + ".npz")
+    if not(os.path.isfile(file_path)):
+        return None
+
+    try:
+        data = np.load(file_path, allow_pickle = False)
+        try:
+            if not(int(data["format"]) == GEOMETRY_CACHE_FORMAT):
+                return None
+            kind = data["kind"]
+            num = data["num"]
+            interp_mode = data["interp_mode"]
+            arc = data["arc"]
+            x = data["x"]
+            y = data["y"]
+            index = np.append(0, np.cumsum(data["n_point"]))
+        finally:
+            # 形式が異なる場合や、読み込めない場合もファイルを閉じる
+            data.close()
+
+        line_list = []
+        i = 0
+        while i < len(kind):
+            if kind[i] == GEOMETRY_KIND_ARC:
+                line = ArcObject(arc[i,0], arc[i,1], arc[i,2], arc[i,3], arc[i,4], int(num[i]))
+            else:
+                # 保存した座標点列はリファイン後の点列なので、再度リファインしない
+                line = LineObject(x[index[i]:index[i+1]], y[index[i]:index[i+1]], int(num[i]), False, str(interp_mode[i]))
+            line_list.append(line)
+            i += 1
+
+        # LRUでの削除順を決めるため、使用した日時を記録する
+        os.utime(file_path, None)
+        return line_list
+
+    except:
+        # 読み込めない場合は、読み込み結果がないものとして扱い、dxfファイルから読み込み直す
+        traceback.print_exc()
+        output_log(traceback.format_exc())
+        return None
+
+
+def save_geometry_cache(key, line_list):
+    """LineObjectのリストを、キーに対応する読み込み結果として保存する
+
+    書き込み途中のファイルを他のプロセスが読み込まないように、一時ファイルに書き込んだ後にファイル名を変更する。
+    保存後、evict_geometry_cacheにより合計サイズを上限以下とする。
+
+    Args:
+        key (str): get_geometry_cache_keyで作成したキー
+        line_list (list): dxfファイルから読み込んだ直後のLineObjectのリスト
+    """
+    try:
+        kind = []
+        num = []
+        interp_mode = []
+        arc = []
+        n_point = []
+        x_list = []
+        y_list = []
+        for line in line_list:
+            num.append(line.num)
+            interp_mode.append(line.interp_mode)
+            if isinstance(line, ArcObject) and (line.line_type == "arc"):
+                kind.append(GEOMETRY_KIND_ARC)
+                arc.append([line.xc, line.yc, line.r_raw, line.start_angle, line.end_angle])
+                n_point.append(0)
+            else:
+                kind.append(GEOMETRY_KIND_LINE)
+                arc.append([0.0, 0.0, 0.0, 0.0, 0.0])
+                n_point.append(len(line.x_raw))
+                x_list.append(line.x_raw)
+                y_list.append(line.y_raw)
+
+        if len(x_list) > 0:
+            x = np.concatenate(x_list)
+            y = np.concatenate(y_list)
+        else:
+            x = np.array([])
+            y = np.array([])
+
+        # 他のプロセスが同時にフォルダを作成する場合があるので、作成済みでもエラーとしない
+        cache_dir = get_geometry_cache_dir()
+        os.makedirs(cache_dir, exist_ok = True)
+
+        file_path = os.path.join(cache_dir, key + ".npz")
+        temp_path = "%s.%s.tmp"%(file_path, os.getpid())
+        f = open(temp_path, "wb")
+        np.savez(f, format = GEOMETRY_CACHE_FORMAT, kind = np.array(kind, dtype = int), num = np.array(num, dtype = int),
+                 interp_mode = np.array(interp_mode, dtype = str), arc = np.array(arc, dtype = float).reshape(-1, 5),
+                 n_point = np.array(n_point, dtype = int), x = x, y = y)
+        f.close()
+        os.replace(temp_path, file_path)
+
+        evict_geometry_cache(GEOMETRY_CACHE_SIZE_MAX*1024*1024, file_path)
+
+    except:
+        # 保存できない場合も、読み込み自体は継続する
+        traceback.print_exc()
+        output_log(traceback.format_exc())
+
+
+def evict_geometry_cache(size_max, keep_path = None):
+    """保存した読み込み結果の合計サイズがsize_max以下となるように、最後に使用した日時が古いものから削除する
+
+    Args:
+        size_max (int): 合計サイズの上限[byte]
+        keep_path (str, optional): 削除しない読み込み結果のパス（保存した直後のもの）. Defaults to None.
+
+    Returns:
+        int: 削除した読み込み結果の数
+    """
+    cache_dir = get_geometry_cache_dir()
+    if not(os.path.isdir(cache_dir)):
+        return 0
+
+    entry_list = []
+    for name in os.listdir(cache_dir):
+        if name.endswith(".npz"):
+            file_path = os.path.join(cache_dir, name)
+            stat = os.stat(file_path)
+            entry_list.append((stat.st_mtime, stat.st_size, file_path))
+
+    # 最後に使用した日時が古い順に並べる
+    entry_list.sort()
+    size_sum = sum([entry[1] for entry in entry_list])
+
+    n_remove = 0
+    i = 0
+    while (size_sum > size_max) and (i < len(entry_list)):
+        mtime, size, file_path = entry_list[i]
+        if not(file_path == keep_path):
+            try:
+                os.remove(file_path)
+                size_sum -= size
+                n_remove += 1
+            except OSError:
+                # 他のプロセスが削除済み、または使用中の場合は読み飛ばす
+                pass
+        i += 1
+
+    return n_remove
+
+
+def clear_geometry_cache():
+    """保存したすべての読み込み結果を削除する
+
+    Returns:
+        int: 削除した読み込み結果の数
+    """
+    return evict_geometry_cache(-1)
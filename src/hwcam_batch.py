@@ -0,0 +1,299 @@
+# -*- coding: utf-8 -*-
+"""複数のXY/UV面のdxfファイルの組から、Gコードを一括で生成するコマンドラインツール
+
+マニフェスト（csvファイル）に記載したdxfファイルの組ごとに、GUIと同じ以下の処理を行い、組ごとに1つのGコードを出力する。
+
+1. dxfファイルの読み込み（AUTOSORT_WHEN_LOADFILE = Trueの場合、読み込み時に自動で整列する）
+
+2. オフセット距離の設定（溶け量ファイルを指定した場合はカット速度から算出し、指定しない場合は設定ファイルの値とする）
+
+3. オフセットによる交差の除去（設定ファイルでREMOVE_COLLISIONがONの場合）
+
+4. カット速度の設定とGコード生成
+
+組ごとの処理は、ProcessPoolExecutorにより並列に実行する。
+すべての組の処理が終わった後、組ごとの計算時間、ワイヤーの最大長、警告を一覧で出力する。
+
+マニフェストは、1行目を見出し行とし、2行目以降の各行に「XYファイル名,UVファイル名,出力ファイル名」を記載する。
+出力ファイル名は省略でき、省略した場合はGUIと同じ保存名とする。相対パスは、マニフェストのあるフォルダを基準とする。
+
+実行方法::
+
+    python hwcam_batch.py manifest.csv --config config.csv --offset-function offset_function.csv --output-dir nc --jobs 4
+
+"""
+
+# 外部ライブラリ
+import argparse
+import csv
+import os
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import freeze_support
+
+# 内部ライブラリ
+from cam_core import *
+from cam_global import *
+from error_log import *
+
+
+class BatchJob:
+    """Gコードを生成する1組のdxfファイルと、処理に用いる設定を格納するクラスである。
+
+    ProcessPoolExecutorで別プロセスへ渡すため、ファイルパスなどの値のみを持つ。
+
+    Attributes:
+        index(int): マニフェストにおける組の番号
+        filename_xy(str): XY面のdxfファイルのパス
+        filename_uv(str): UV面のdxfファイルのパス
+        output_filename(str): Gコードの保存名。Noneの場合はGUIと同じ保存名とする
+        output_dir(str): Gコードの保存先フォルダ
+        config_path(str): 設定ファイルのパス
+        offset_function_path(str): 溶け量ファイルのパス。Noneの場合は設定ファイルのオフセット距離を用いる
+    """
+    def __init__(self, index, filename_xy, filename_uv, output_filename, output_dir, config_path, offset_function_path):
+        """BatchJobのコンストラクタ
+        """
+        self.index = index
+        self.filename_xy = filename_xy
+        self.filename_uv = filename_uv
+        self.output_filename = output_filename
+        self.output_dir = output_dir
+        self.config_path = config_path
+        self.offset_function_path = offset_function_path
+
+
+def load_manifest(manifest_path, config_path, offset_function_path, output_dir, encoding = "shift-jis"):
+    """マニフェストを読み込み、組ごとのBatchJobを作成する
+
+    Args:
+        manifest_path (str): マニフェストのパス
+        config_path (str): 設定ファイルのパス
+        offset_function_path (str): 溶け量ファイルのパス。Noneの場合は設定ファイルのオフセット距離を用いる
+        output_dir (str): Gコードの保存先フォルダ
+        encoding (str, optional): マニフェストの文字コード. Defaults to "shift-jis".
+
+    Returns:
+        list: BatchJobのリスト
+
+    Raises:
+        ValueError: XYファイル名、UVファイル名が記載されていない行がある場合
+    """
+    base_dir = os.path.dirname(os.path.abspath(manifest_path))
+    job_list = []
+
+    f = open(manifest_path, encoding = encoding, newline = "")
+    rows = list(csv.reader(f))
+    f.close()
+
+    # 1行目は見出し行として読み飛ばす
+    i = 1
+    while i < len(rows):
+        row = [item.strip() for item in rows[i]]
+        # 空行は読み飛ばす
+        if (len(row) == 0) or (len("".join(row)) == 0):
+            i += 1
+            continue
+        if (len(row) < 2) or (row[0] == "") or (row[1] == ""):
+            raise ValueError("マニフェストの%s行目に、XYファイル名とUVファイル名が記載されていません。"%(i + 1))
+
+        filename_xy = os.path.join(base_dir, row[0])
+        filename_uv = os.path.join(base_dir, row[1])
+        if (len(row) > 2) and not(row[2] == ""):
+            output_filename = row[2]
+        else:
+            output_filename = None
+
+        job_list.append(BatchJob(len(job_list), filename_xy, filename_uv, output_filename, output_dir, config_path, offset_function_path))
+        i += 1
+
+    return job_list
+
+
+def run_job(job):
+    """1組のdxfファイルから、Gコードを生成する
+
+    エラーが発生した場合も例外は送出せず、エラー内容を結果に格納する。
+
+    Args:
+        job (BatchJob): Gコードを生成する組
+
+    Returns:
+        dict: 処理結果。以下のキーを持つ
+
+            index(int), filename_xy(str), filename_uv(str), output_filename(str),
+
+            n_line(int): 線の本数,
+            wire_length_max(float): ワイヤーの最大長,
+            t_load(float), t_offset(float), t_g_code(float), t_total(float): 処理ごとの計算時間[s],
+            messeage_list(list): 警告・交差の修正結果のメッセージ,
+            error(str): エラー内容。正常終了した場合はNone
+    """
+    result = {"index":job.index, "filename_xy":job.filename_xy, "filename_uv":job.filename_uv, "output_filename":None, \
+              "n_line":0, "wire_length_max":0.0, "t_load":0.0, "t_offset":0.0, "t_g_code":0.0, "t_total":0.0, \
+              "messeage_list":[], "error":None}
+    t_st = time.perf_counter()
+    try:
+        config = Config()
+        config.load_config(job.config_path)
+        if not(job.offset_function_path is None):
+            config.load_offset_func(job.offset_function_path)
+
+        z_xy = config.XY_DIST
+        z_uv = config.UV_DIST
+        z_mach = config.MACH_DIST
+
+        # 1. dxfファイルの読み込み
+        t = time.perf_counter()
+        section0 = Section("XY面")
+        section1 = Section("UV面")
+        section0.load_file(job.filename_xy, config.REFINE)
+        section1.load_file(job.filename_uv, config.REFINE)
+        result["t_load"] = time.perf_counter() - t
+        result["n_line"] = len(section0.line_list)
+
+        if not(len(section0.line_list) == len(section1.line_list)):
+            raise ValueError("XY座標とUV座標でライン数が一致しません。XY：%s本，UV：%s本"%(len(section0.line_list), len(section1.line_list)))
+
+        # 2. オフセット距離の設定, 3. 交差の除去
+        t = time.perf_counter()
+        if job.offset_function_path is None:
+            section0.set_offset_dist(config.XY_OFFSET_DIST)
+            section1.set_offset_dist(config.UV_OFFSET_DIST)
+        else:
+            apply_offset_function(section0, section1, z_xy, z_uv, z_mach, config.CUTSPEED, config.CS_DEF, config.offset_function)
+        if config.REMOVE_COLLISION == True:
+            result["messeage_list"] += remove_section_collision(section0, "XY面")
+            result["messeage_list"] += remove_section_collision(section1, "UV面")
+        result["t_offset"] = time.perf_counter() - t
+
+        # 4. カット速度の設定とGコード生成
+        t = time.perf_counter()
+        warning_list = check_mach_dist(z_xy, z_uv, z_mach)
+        result["messeage_list"] += warning_list
+        if len(warning_list) > 0:
+            raise ValueError("入力値に誤りがあります。Gコード生成を中止しました。")
+
+        apply_cut_speed(section0, section1, z_xy, z_uv, z_mach, config.CUTSPEED, config.CS_DEF)
+        dl = max(config.DELTA_LENGTH, 0.1)
+        if job.output_filename is None:
+            output_filename = make_g_code_filename(section0, section1, config.CUTSPEED)
+        else:
+            output_filename = job.output_filename
+        output_filename = os.path.join(job.output_dir, output_filename)
+        toolpath_builder = ToolpathBuilder()
+        output_filename, stats = generate_g_code(section0, section1, config.OX, config.OY, config.EX, config.EY, z_xy, z_uv, z_mach, \
+                                                 dl, config.CUTSPEED, config.CNC_CS_DEF, config, toolpath_builder, output_filename)
+        result["output_filename"] = output_filename
+        result["t_g_code"] = time.perf_counter() - t
+
+        # パスチェックと同じワイヤー長の確認（Gコード生成で作成したカットパスを再利用する）
+        toolpath = toolpath_builder.get_toolpath(section0.line_list, section1.line_list, config.OX, config.OY, config.EX, config.EY, \
+                                                 dl, z_xy, z_uv, z_mach)
+        wire_length = calc_point_dist(toolpath.x_m_array, toolpath.y_m_array, toolpath.u_m_array, toolpath.v_m_array, 0, z_mach)
+        result["wire_length_max"] = float(np.max(wire_length))
+
+    except:
+        traceback.print_exc()
+        output_log(traceback.format_exc())
+        result["error"] = traceback.format_exc().strip().split("\n")[-1]
+
+    result["t_total"] = time.perf_counter() - t_st
+    return result
+
+
+def run_batch(job_list, max_workers = None):
+    """BatchJobのリストを、ProcessPoolExecutorにより並列に処理する
+
+    Args:
+        job_list (list): BatchJobのリスト
+        max_workers (int, optional): プロセス数。1の場合は並列化せず、同じプロセスで順に処理する. Defaults to None.
+
+    Returns:
+        list: run_jobの処理結果のリスト（マニフェストの順）
+    """
+    if max_workers == 1:
+        return [run_job(job) for job in job_list]
+
+    with ProcessPoolExecutor(max_workers = max_workers) as executor:
+        return list(executor.map(run_job, job_list))
+
+
+def format_summary(result_list):
+    """処理結果の一覧を、表形式の文字列にする
+
+    Args:
+        result_list (list): run_jobの処理結果のリスト
+
+    Returns:
+        str: 処理結果の一覧
+    """
+    summary_str = "%4s  %-6s %6s %10s %8s %8s %8s %8s  %s\n"%("No.", "Result", "Lines", "Wire[mm]", "Load[s]", "Offset[s]", "GCode[s]", "Total[s]", "Output")
+    for result in result_list:
+        if result["error"] is None:
+            state = "OK"
+            output = os.path.basename(result["output_filename"])
+        else:
+            state = "NG"
+            output = result["error"]
+        summary_str += "%4d  %-6s %6d %10.1f %8.3f %8.3f %8.3f %8.3f  %s\n"%(result["index"] + 1, state, result["n_line"], result["wire_length_max"], \
+                        result["t_load"], result["t_offset"], result["t_g_code"], result["t_total"], output)
+
+    # 警告・交差の修正結果は、表の後に組ごとに出力する
+    for result in result_list:
+        if len(result["messeage_list"]) > 0:
+            summary_str += "\n[%d] %s, %s\n"%(result["index"] + 1, os.path.basename(result["filename_xy"]), os.path.basename(result["filename_uv"]))
+            for messeage in result["messeage_list"]:
+                summary_str += "  " + messeage.strip().replace("\n", " ") + "\n"
+    return summary_str
+
+
+def main(argv = None):
+    """コマンドライン引数を解釈し、Gコードを一括で生成する
+
+    Args:
+        argv (list, optional): コマンドライン引数. Defaults to None.
+
+    Returns:
+        int: 終了コード。すべての組でGコード生成に成功した場合は0
+    """
+    parser = argparse.ArgumentParser(description = "複数のXY/UV面のdxfファイルの組から、Gコードを一括で生成する")
+    parser.add_argument("manifest", help = "XYファイル名,UVファイル名,出力ファイル名 を記載したcsvファイル")
+    parser.add_argument("--config", required = True, help = "設定ファイル(config.csv)のパス")
+    parser.add_argument("--offset-function", default = None, help = "溶け量ファイルのパス。指定した場合、カット速度からオフセット距離を算出する")
+    parser.add_argument("--output-dir", default = ".", help = "Gコードの保存先フォルダ")
+    parser.add_argument("--jobs", type = int, default = None, help = "並列に処理するプロセス数。1とすると並列化しない")
+    parser.add_argument("--encoding", default = "shift-jis", help = "マニフェストの文字コード")
+    args = parser.parse_args(argv)
+
+    if not(os.path.isdir(args.output_dir)):
+        os.makedirs(args.output_dir)
+
+    # 設定ファイル、溶け量ファイルの読み込み結果は、ここで一度だけ表示する
+    config = Config()
+    config.load_config(args.config)
+    print(config.MESSEAGE.strip())
+    if not(args.offset_function is None):
+        config.load_offset_func(args.offset_function)
+        print(config.MESSEAGE.strip())
+
+    job_list = load_manifest(args.manifest, args.config, args.offset_function, args.output_dir, args.encoding)
+
+    t = time.perf_counter()
+    result_list = run_batch(job_list, args.jobs)
+    t_all = time.perf_counter() - t
+
+    print(format_summary(result_list))
+    n_error = len([result for result in result_list if not(result["error"] is None)])
+    print("%s組中%s組のGコードを生成しました。（%.3f s）"%(len(result_list), len(result_list) - n_error, t_all))
+
+    if n_error > 0:
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    freeze_support()
+    sys.exit(main())
@@ -5,7 +5,6 @@
 
 # 外部ライブラリ
 import numpy as np
-from matplotlib import pyplot as plt
 from scipy import interpolate as intp
 from scipy.integrate import quad
 import traceback
@@ -33,6 +32,11 @@ class LineObject:
         cutspeed_mech(float): CNC駆動面(ラインの座標面からz軸方向にオフセットした面)でのカット速度
         x(numpy.array): オフセット適用後のx座標点列
         y(numpy.array): オフセット適用後のy座標点列
+        version(int): 座標点列の更新回数。座標点列を変更するメソッドで加算する
+        cache(dict): 線長や補完関数など、座標点列から計算した派生データのキャッシュ
+        cache_version(int): cacheを計算した時点でのversion
+        cache_hit(int): cacheから派生データを取得できた回数
+        cache_miss(int): cacheに派生データがなく、計算した回数
     
     """
 
@@ -84,6 +88,52 @@ class LineObject:
         self.cutspeed_mech = CUTSPEED_DEFAULT
         self.x = np.array(x_points)
         self.y = np.array(y_points)
+        self.version = 0
+        self.cache = {}
+        self.cache_version = 0
+        self.cache_hit = 0
+        self.cache_miss = 0
+
+
+    def update_version(self):
+        """座標点列が更新されたことを記録する
+
+        versionを加算することで、更新前の座標点列から計算したcacheを無効化する。
+
+        座標点列（x_raw, y_raw, x, y）を変更した場合は、必ずコールすること。
+        """
+        self.version += 1
+
+
+    def get_cache(self, key, func):
+        """keyに対応する派生データを、cacheから取得する
+
+        cacheを計算した後に座標点列が更新されている(cache_versionとversionが異なる)場合は、cacheを破棄する。
+
+        cacheにkeyの派生データがない場合は、funcにより計算し、cacheに格納する。
+
+        Args:
+            key (tuple): 派生データの種類を表すキー
+            func (function): 派生データを計算する引数なしの関数
+
+        Returns:
+            any: keyに対応する派生データ
+
+        Note:
+            cacheから取得した派生データは、呼び出し側で変更しないこと。
+        """
+        # 座標点列が更新されている場合、cacheを破棄する
+        if not(self.cache_version == self.version):
+            self.cache = {}
+            self.cache_version = self.version
+
+        if key in self.cache:
+            self.cache_hit += 1
+        else:
+            self.cache_miss += 1
+            self.cache[key] = func()
+
+        return self.cache[key]
 
         
     def reset_point(self, x_points, y_points):
@@ -111,6 +161,7 @@ class LineObject:
         self.y_raw = np.array(y_points)
         self.st = np.array([x_points[0], y_points[0]])
         self.ed = np.array([x_points[-1], y_points[-1]])
+        self.update_version()
         # オフセット距離が設定されている場合に備え、オフセット後の点列も再計算
         self.set_offset_dist(self.offset_dist)
         
@@ -134,6 +185,7 @@ class LineObject:
         self.ed[0] = self.ed[0] + dx
         self.st[1] = self.st[1] + dy
         self.ed[1] = self.ed[1] + dy
+        self.update_version()
         
         
     def rotate(self, d_sita, rx, ry):
@@ -151,6 +203,7 @@ class LineObject:
         self.x, self.y = rotate(self.x, self.y, d_sita, rx, ry)
         self.st[0], self.st[1] = rotate(self.st[0], self.st[1], d_sita, rx, ry)
         self.ed[0], self.ed[1] = rotate(self.ed[0], self.ed[1], d_sita, rx, ry)
+        self.update_version()
     
     
     def set_ccw(self, ccw):
@@ -200,6 +253,7 @@ class LineObject:
                 dist = self.offset_dist
                 
             self.x, self.y = offset_line(self.x_raw, self.y_raw, dist, self.interp_mode) 
+            self.update_version()
             
         except:
             traceback.print_exc()
@@ -212,20 +266,28 @@ class LineObject:
         Returns:
             bool: 自己交差の有無(True:自己交差あり, False:自己交差なし)
         """
-        self_col = True
-        detection = False
-        temp_x = self.x
-        temp_y = self.y
-
-       # 自己交差を1度で除去できない場合があるので、自己交差がなくなるまで繰り返し処理を行う
-        while self_col == True:
-            temp_x, temp_y, self_col = remove_self_collision(temp_x, temp_y)
-            if self_col == True:
-                detection = True
+        # 自己交差は、remove_self_collisionの1度の呼び出しですべて除去される
+        temp_x, temp_y, detection = remove_self_collision(self.x, self.y)
     
+        # 自己交差がない場合も、近傍点の削除により点数が変わる場合があるので、常にcacheを無効化する
         self.x = temp_x
         self.y = temp_y
+        self.update_version()
         return detection
+
+
+    def set_offset_point(self, x, y):
+        """オフセット後の座標点列を、直接更新する
+
+        線同士の交差を除去した場合など、オフセット後の座標点列を修正する場合に用いる。
+
+        Args:
+            x (numpy.array): オフセット適用後のx座標点列
+            y (numpy.array): オフセット適用後のy座標点列
+        """
+        self.x = x
+        self.y = y
+        self.update_version()
         
     
         
@@ -283,11 +345,28 @@ class LineObject:
         else:
             ccw = True
         self.ccw = ccw
+        self.update_version()
         
         
     def calc_length_array(self, mode = "offset"):
         """始点からi番目の座標点までの線長を計算した配列を出力する
 
+        計算結果はcacheに格納し、座標点列が更新されるまで再利用する。
+
+        Args:
+            mode (str, optional): 元の座標データとオフセット後の座標データのどちらで線長を計算するか. Defaults to "offset".
+
+        Returns:
+            np.array: 始点からi番目の座標点までの線長を計算した配列
+        """
+        # 呼び出し側で変更されてもよいように、cacheの複製を出力する
+        length_array = self.get_cache(("length_array", mode), lambda: self.calc_length_array_nocache(mode))
+        return np.array(length_array)
+
+
+    def calc_length_array_nocache(self, mode = "offset"):
+        """cacheを用いずに、始点からi番目の座標点までの線長を計算した配列を出力する
+
         Args:
             mode (str, optional): 元の座標データとオフセット後の座標データのどちらで線長を計算するか. Defaults to "offset".
 
@@ -324,6 +403,9 @@ class LineObject:
     def get_length(self, mode = "offset"):
         """始点から終点までの線長を計算する
 
+        線長は、calc_length_arrayの最後の値とする。calc_length_arrayの計算結果はcacheに格納されるので、
+        同じ線の線長を繰り返し取得しても再計算されない。
+
         Args:
             mode (str, optional): 元の座標データとオフセット後の座標データのどちらで線長を計算するか. Defaults to "offset".
 
@@ -331,24 +413,306 @@ class LineObject:
             float: 始点から終点までの線長
         """
         
-        length = 0
+        length_array = self.get_cache(("length_array", mode), lambda: self.calc_length_array_nocache(mode))
+        length = length_array[-1]
+        
+        return length
+
+
+class ArcObject(LineObject):
+    """円弧を、中心・半径・角度で解析的に保持するLineObjectである。
+
+    線長は半径×中心角、オフセットは半径±オフセット距離として解析的に計算する。
+    また、任意の点数の等間隔分割点列を、角度を等分することで直接計算できる。
+
+    表示、線同士の交差判定などのため、x_raw, y_raw, x, yには円弧上の座標点列も格納する。
+    座標点列は、calc_arc_point_numにより、弦と円弧との距離（矢高）がTOL_ARC_POINT以下となる点数で作成する。
+
+    線の結合などにより座標点列が円弧上からずれた場合は、line_typeを"spline"とし、LineObjectと同じく座標点列で取り扱う。
+    
+    Attributes:
+        xc(float): 円弧の中心x座標
+        yc(float): 円弧の中心y座標
+        r_raw(float): オフセット適用前の半径
+        theta_raw(float): オフセット適用前の始点の角度[rad]
+        sweep_raw(float): オフセット適用前の中心角[rad]。正で反時計回り、負で時計回り
+        r(float): オフセット適用後の半径
+        theta(float): オフセット適用後の始点の角度[rad]
+        sweep(float): オフセット適用後の中心角[rad]。正で反時計回り、負で時計回り
+        start_angle(float): 作成時に与えた始点の角度[deg]（読み込み結果の保存に用いる）
+        end_angle(float): 作成時に与えた終点の角度[deg]（読み込み結果の保存に用いる）
+    """
+
+    def __init__(self, xc, yc, r, start_angle, end_angle, num):
+        """ArcObjectのコンストラクタ
+
+        dxfの円弧と同じく、start_angleからend_angleまで反時計回りの円弧とする。
+
+        Args:
+            xc (float): 円弧の中心x座標
+            yc (float): 円弧の中心y座標
+            r (float): 半径
+            start_angle (float): 始点の角度[deg]
+            end_angle (float): 終点の角度[deg]
+            num (int): ライン番号
+        """
+        # 角度ラッピング。始点と終点の角度が同じ場合は、1周の円弧とする
+        sweep_deg = (end_angle - start_angle)%360.0
+        if sweep_deg == 0:
+            sweep_deg = 360.0
+        
+        self.start_angle = start_angle
+        self.end_angle = end_angle
+        self.xc = float(xc)
+        self.yc = float(yc)
+        self.r_raw = float(r)
+        self.theta_raw = np.radians(start_angle)
+        self.sweep_raw = np.radians(sweep_deg)
+        self.r = self.r_raw
+        self.theta = self.theta_raw
+        self.sweep = self.sweep_raw
+        
+        # 座標点列の個数を、矢高の許容値と半径から計算する
+        num_point = int(calc_arc_point_num(self.r_raw, self.sweep_raw, TOL_ARC_POINT))
+        x_points, y_points = self.calc_arc_point(np.linspace(0, 1, num_point), mode = "raw")
         
+        LineObject.__init__(self, x_points, y_points, num, False)
+        self.line_type = "arc"
+
+
+    def calc_arc_point(self, t, mode = "offset"):
+        """始点を0、終点を1とした媒介変数tにおける、円弧上の座標点を計算する
+
+        媒介変数は中心角に比例するので、tを等間隔とすると、線長に対しても等間隔となる。
+
+        Args:
+            t (numpy.array): 媒介変数
+            mode (str, optional): 元の円弧とオフセット後の円弧のどちらで計算するか. Defaults to "offset".
+
+        Returns:
+            numpy.array: x座標点列
+            numpy.array: y座標点列
+        """
         if mode == "raw":
-            x = self.x_raw
-            y = self.y_raw
+            r, theta, sweep = self.r_raw, self.theta_raw, self.sweep_raw
+        else:
+            r, theta, sweep = self.r, self.theta, self.sweep
+        angle = theta + np.asarray(t, dtype = float)*sweep
+        return self.xc + r*np.cos(angle), self.yc + r*np.sin(angle)
+
+
+    def calc_arc_angle(self, x, y):
+        """座標点列の、円弧の中心から見た角度を、始点からの連続した値として計算する
+
+        Args:
+            x (numpy.array): x座標点列
+            y (numpy.array): y座標点列
+
+        Returns:
+            numpy.array: 各点の角度[rad]
+        """
+        return np.unwrap(np.arctan2(np.asarray(y, dtype = float) - self.yc, np.asarray(x, dtype = float) - self.xc))
+
+
+    def fit_arc_point(self, x, y, r, sweep):
+        """座標点列が、半径rの円弧上に、sweepと同じ回転方向で並んでいるかを判定する
+
+        座標点列の間隔での弦と円弧との距離（矢高）程度のずれは、円弧上にあるとみなす。
+
+        Args:
+            x (numpy.array): x座標点列
+            y (numpy.array): y座標点列
+            r (float): 半径
+            sweep (float): 中心角[rad]
+
+        Returns:
+            float: 円弧上にある場合は始点の角度[rad]、ない場合はNone
+            float: 円弧上にある場合は中心角[rad]、ない場合はNone
+        """
+        if len(x) < 2:
+            return None, None
         
+        # 座標点列の間隔での矢高を、許容誤差とする
+        angle = self.calc_arc_angle(x, y)
+        d_angle = np.diff(angle)
+        tol = np.abs(r)*(1.0 - np.cos(np.max(np.abs(d_angle))/2.0)) + DIST_NEAR
+        
+        dist = np.sqrt((np.asarray(x, dtype = float) - self.xc)**2 + (np.asarray(y, dtype = float) - self.yc)**2)
+        if np.max(np.abs(dist - r)) > tol:
+            return None, None
+        
+        # 回転方向が元の円弧と同じであること
+        if not(np.all(d_angle*sweep > 0)):
+            return None, None
+        
+        return angle[0], angle[-1] - angle[0]
+
+
+    def reset_point(self, x_points, y_points):
+        """座標データを更新する
+
+        更新後の座標点列が元の円弧上にある場合（線の分割など）は、円弧の角度を更新し、円弧として取り扱う。
+        円弧上にない場合（線の結合など）は、line_typeを"spline"等とし、座標点列で取り扱う。
+
+        Args:
+            x_points (numpy.array): x座標点列
+            y_points (numpy.array): y座標点列
+        """
+        if self.line_type == "arc":
+            theta_raw, sweep_raw = self.fit_arc_point(x_points, y_points, self.r_raw, self.sweep_raw)
         else:
-            x = self.x
-            y = self.y           
-            
-        if self.line_type == "point":
-            length = 0
+            theta_raw, sweep_raw = None, None
         
-        if self.line_type == "line":
-            length = np.sqrt((x[0]-x[1])**2 + (y[0]-y[1])**2)
+        LineObject.reset_point(self, x_points, y_points)
         
-        if self.line_type == "spline":
-            length = get_spline_length(x, y)
+        if not(theta_raw == None):
+            self.theta_raw = theta_raw
+            self.sweep_raw = sweep_raw
+            self.line_type = "arc"
+            self.set_offset_dist(self.offset_dist)
+
+
+    def move_origin(self, dx, dy):
+        """座標点を指定の距離(dx,dy)だけすべてオフセットする
+
+        円弧の中心も移動する。
+
+        Args:
+            dx (float): x方向移動距離
+            dy (float): y方向移動距離
+        """
+        LineObject.move_origin(self, dx, dy)
+        self.xc = self.xc + dx
+        self.yc = self.yc + dy
+
+
+    def rotate(self, d_sita, rx, ry):
+        """座標点を指定の座標(rx,ry)を中心に、指定の角度(d_sita)だけ回転する。
+
+        円弧の中心と角度も回転する。
+
+        Args:
+            d_sita (float): 回転角度
+            rx (float): 回転中心x座標
+            ry (float): 回転中心y座標
+        """
+        LineObject.rotate(self, d_sita, rx, ry)
+        self.xc, self.yc = rotate(self.xc, self.yc, d_sita, rx, ry)
+        self.theta_raw = self.theta_raw + d_sita
+        self.theta = self.theta + d_sita
+
+
+    def set_offset_dist(self, offset_dist):
+        """オフセット後の座標点を更新する
+
+        offset_lineと同じく、進行方向の左側にオフセットする（LineObject.set_offset_distを参照）。
+        反時計回りの円弧では中心側となるので、オフセット後の半径は、r_raw - オフセット距離となる。
+
+        オフセット後の半径が0以下となる場合は、円弧として取り扱えないため、LineObjectと同じく座標点列でオフセットする。
+
+        Args:
+            offset_dist (float): オフセット距離
+        """
+        if not(self.line_type == "arc"):
+            LineObject.set_offset_dist(self, offset_dist)
+            return
         
-        return length
+        try:
+            self.offset_dist = float(offset_dist)
+            if self.ccw == True:
+                dist = -self.offset_dist
+            else:
+                dist = self.offset_dist
+            
+            r = self.r_raw - np.sign(self.sweep_raw)*dist
+            if r <= 0:
+                self.line_type = "spline"
+                LineObject.set_offset_dist(self, offset_dist)
+                return
+            
+            self.r = r
+            self.theta = self.theta_raw
+            self.sweep = self.sweep_raw
+            
+            # 元の座標点列と同じ角度で、オフセット後の座標点列を作成する
+            angle = self.calc_arc_angle(self.x_raw, self.y_raw)
+            t = (angle - angle[0])/self.sweep_raw
+            self.x, self.y = self.calc_arc_point(t)
+            self.update_version()
+            
+        except:
+            traceback.print_exc()
+            output_log(traceback.format_exc())
+            pass
+
+
+    def update_offset_arc(self):
+        """オフセット後の座標点列から、オフセット後の円弧の角度を更新する
+
+        線同士の交差除去などで、オフセット後の座標点列の端部が削除された場合に用いる。
+        座標点列が円弧上にない場合は、line_typeを"spline"とし、座標点列で取り扱う。
+        """
+        theta, sweep = self.fit_arc_point(self.x, self.y, self.r, self.sweep)
+        if theta == None:
+            self.line_type = "spline"
+        else:
+            self.theta = theta
+            self.sweep = sweep
+
+
+    def remove_self_collision(self):
+        """オフセット後の座標点列に自己交差がある場合、除去する
+
+        Returns:
+            bool: 自己交差の有無(True:自己交差あり, False:自己交差なし)
+        """
+        detection = LineObject.remove_self_collision(self)
+        if (detection == True) and (self.line_type == "arc"):
+            self.update_offset_arc()
+        return detection
 
+
+    def set_offset_point(self, x, y):
+        """オフセット後の座標点列を、直接更新する
+
+        Args:
+            x (numpy.array): オフセット適用後のx座標点列
+            y (numpy.array): オフセット適用後のy座標点列
+        """
+        LineObject.set_offset_point(self, x, y)
+        if self.line_type == "arc":
+            self.update_offset_arc()
+
+
+    def toggle_cut_dir(self):
+        """カット方向(座標点列の向き)を反転させる
+
+        円弧の始点を終点に入れ替え、中心角の符号を反転させる。
+        """
+        LineObject.toggle_cut_dir(self)
+        self.theta_raw = self.theta_raw + self.sweep_raw
+        self.sweep_raw = -self.sweep_raw
+        self.theta = self.theta + self.sweep
+        self.sweep = -self.sweep
+
+
+    def calc_length_array_nocache(self, mode = "offset"):
+        """cacheを用いずに、始点からi番目の座標点までの線長を計算した配列を出力する
+
+        円弧の場合、半径×中心角として解析的に計算する。
+
+        Args:
+            mode (str, optional): 元の座標データとオフセット後の座標データのどちらで線長を計算するか. Defaults to "offset".
+
+        Returns:
+            np.array: 始点からi番目の座標点までの線長を計算した配列
+        """
+        if not(self.line_type == "arc"):
+            return LineObject.calc_length_array_nocache(self, mode)
+        
+        if mode == "raw":
+            x, y, r = self.x_raw, self.y_raw, self.r_raw
+        else:
+            x, y, r = self.x, self.y, self.r
+        angle = self.calc_arc_angle(x, y)
+        return np.abs(r*(angle - angle[0]))
@@ -0,0 +1,772 @@
+# -*- coding: utf-8 -*-
+"""CAD図面(dxfファイル)の断面を、GUIによらず取り扱うライブラリ
+
+tkinter, matplotlibに依存しないので、GUIを起動せずに、ワーカープロセスやテストからカットパスの計算に用いることができる。
+GUIで用いるDxfFileは、本モジュールのSectionに、tableとグラフの操作を追加したクラスである。
+
+"""
+
+# 外部ライブラリ
+import ezdxf as ez
+from ezdxf.addons import iterdxf
+import numpy as np
+from scipy.spatial import cKDTree
+from concurrent.futures import ProcessPoolExecutor
+import traceback
+
+# 内部ライブラリ
+from cam_generic_lib import *
+from line_object import *
+from geometry_cache import *
+from cam_global import *
+from error_log import *
+
+# dxfオブジェクトを読み込む順番。LineObjectの線番号は、この順に付与する
+DXF_LOAD_ORDER = ("SPLINE", "ARC", "CIRCLE", "ELLIPSE", "LWPOLYLINE", "LINE")
+
+
+def load_dxf_lines(filename, is_refine):
+    """filenameで指定されたdxfファイル上の線を読み込み、LineObjectに変換したリストを出力する
+
+    dxfファイルのうち、LINE, SPLINE, ARC, CIRCLE, ELLIPSE, LWPOLYLINE のオブジェクトを抽出し、以下のLineObjectに変換する。
+
+    +-----------+-----------+----------+------------+
+    |読み込み順 |dxf object |LineObject             |
+    |           +           +----------+------------+
+    |           |           |line_type |interp_mode |
+    +-----------+-----------+----------+------------+
+    |1          |SPLINE     |spline    |cubic       |
+    +-----------+-----------+----------+------------+
+    |2          |ARC        |arc       |cubic       |
+    +-----------+-----------+----------+------------+
+    |3          |CIRCLE     |arc       |cubic       |
+    +-----------+-----------+----------+------------+
+    |4          |ELLIPSE    |spline    |cubic       |
+    +-----------+-----------+----------+------------+
+    |5          |LWPOLYLINE |spline    |linear      |
+    +-----------+-----------+----------+------------+
+    |6          |LINE       |line      |None        |
+    +-----------+-----------+----------+------------+
+
+    LineObjectの線番号(num)は、読み込んだ順に付与する。同種のdxfオブジェクトでは線番号の付与順は任意である。
+    (dxf objectのクエリで早く検索された順)
+
+    Args:
+        filename (str): 読み込むdxfファイルのパス
+        is_refine (bool): True: スプライン点列をリファインして読み込む, False:リファインしない
+
+    Returns:
+        list: LineObjectのリスト
+
+    Note:
+        SPLINEは、NURBS_EVALUATION = Trueの場合、nurbs_to_splineにより次数・ノット・重みからNURBSとして評価した座標点列に変換する。
+        座標点列は弦と曲線との距離がTOL_NURBS_POINT以下となる点数で作成するので、is_refineによらずリファインしない。
+        NURBS_EVALUATION = Falseの場合、または制御点がない場合は、制御点（制御点がない場合はフィット点）を通るスプラインとする。
+
+        ARCは、中心・半径・角度を保持するArcObjectに変換する。CIRCLEは、中心角360degのArcObjectに変換する。
+
+        ELLIPSEは、ellipse_to_splineにより、矢高がTOL_ARC_POINT以下となる座標点列を計算し、splineに変換する。
+        SPLINEのNURBS評価と同じく、座標点列の点数は矢高の許容値から決まるので、is_refineによらずリファインしない。
+
+    """
+
+    line_list = []
+
+    # dxfファイルの読み込み
+    dwg = ez.readfile(filename)
+    modelspace = dwg.modelspace()
+
+    # dxfオブジェクトの種類ごとに、読み込み順にLineObjectへ変換する
+    for dxftype in DXF_LOAD_ORDER:
+        for entity in modelspace.query(dxftype):
+            line = dxf_entity_to_line(entity, len(line_list), is_refine)
+            if not(line is None):
+                line_list.append(line)
+
+    return line_list
+
+
+def load_dxf_lines_stream(filename, is_refine):
+    """load_dxf_linesと同じ線を、dxfファイルを先頭から1回走査するだけで読み込む
+
+    ezdxfのiterdxfにより、modelspaceのオブジェクトを1つずつ読み込み、読み込んだ時点でLineObjectに変換して破棄する。
+    dxfファイル全体のオブジェクトを保持しないので、オブジェクト数が多いdxfファイルでもメモリ使用量が少ない。
+    また、オブジェクトの種類ごとに検索(query)を繰り返さない。
+
+    変換した線は種類ごとに保持し、最後にload_dxf_linesと同じ読み込み順に並べて線番号を付与する。
+
+    Args:
+        filename (str): 読み込むdxfファイルのパス
+        is_refine (bool): True: スプライン点列をリファインして読み込む, False:リファインしない
+
+    Returns:
+        list: LineObjectのリスト
+
+    Note:
+        iterdxfで読み込めない構造のdxfファイルの場合は、load_dxf_linesで読み込む。
+    """
+    line_list_dict = {}
+    for dxftype in DXF_LOAD_ORDER:
+        line_list_dict[dxftype] = []
+
+    try:
+        dwg = iterdxf.opendxf(filename)
+    except ez.DXFStructureError:
+        traceback.print_exc()
+        output_log(traceback.format_exc())
+        return load_dxf_lines(filename, is_refine)
+
+    try:
+        # 読み込み対象の種類のオブジェクトのみを、ファイルの先頭から順に読み込む
+        for entity in dwg.modelspace(types = DXF_LOAD_ORDER):
+            line = dxf_entity_to_line(entity, 0, is_refine)
+            if not(line is None):
+                line_list_dict[entity.dxftype()].append(line)
+    finally:
+        dwg.close()
+
+    # load_dxf_linesと同じ読み込み順に並べ、線番号を付与する
+    line_list = []
+    for dxftype in DXF_LOAD_ORDER:
+        for line in line_list_dict[dxftype]:
+            line.set_num(len(line_list))
+            line_list.append(line)
+
+    return line_list
+
+
+def dxf_entity_to_line(entity, num, is_refine):
+    """ezdxfのdxfオブジェクトを、LineObjectに変換する
+
+    変換方法は、load_dxf_linesを参照。
+
+    Args:
+        entity (ezdxf.entities.DXFGraphic): SPLINE, ARC, CIRCLE, ELLIPSE, LWPOLYLINE, LINE のいずれかのdxfオブジェクト
+        num (int): ライン番号
+        is_refine (bool): True: スプライン点列をリファインして読み込む, False:リファインしない
+
+    Returns:
+        LineObject: 変換した線。長さがほとんどない線分、および対象外のdxfオブジェクトの場合はNone
+    """
+    dxftype = entity.dxftype()
+
+    # スプラインオブジェクトのLineObjectへの変換
+    if dxftype == "SPLINE":
+        if (NURBS_EVALUATION == True) and (len(entity.control_points) > entity.dxf.degree):
+            spline_data = nurbs_to_spline(entity, TOL_NURBS_POINT)
+            return LineObject(spline_data[:,0], spline_data[:,1], num, False)
+        if len(entity.control_points) > 0:
+            spline_data = np.array(entity.control_points)[:]
+        else:
+            spline_data = np.array(entity.fit_points)[:]
+        return LineObject(spline_data[:,0], spline_data[:,1], num, is_refine)
+
+    # 円弧オブジェクトのLineObjectへの変換
+    if dxftype == "ARC":
+        # 円弧の中心・半径・角度を保持したまま、ArcObjectに変換
+        return ArcObject(entity.dxf.center[0], entity.dxf.center[1], entity.dxf.radius, entity.dxf.start_angle, entity.dxf.end_angle, num)
+
+    # 円オブジェクトのLineObjectへの変換
+    if dxftype == "CIRCLE":
+        # 0degから360degまでの円弧とする
+        return ArcObject(entity.dxf.center[0], entity.dxf.center[1], entity.dxf.radius, 0.0, 360.0, num)
+
+    # 楕円オブジェクトのLineObjectへの変換
+    if dxftype == "ELLIPSE":
+        ellipse_data = ellipse_to_spline(entity, TOL_ARC_POINT)
+        return LineObject(ellipse_data[:,0], ellipse_data[:,1], num, False)
+
+    # ポリオブジェクトのLineObjectへの変換
+    if dxftype == "LWPOLYLINE":
+        poly_data = poly_to_spline(entity)
+        line = LineObject(poly_data[:,0], poly_data[:,1], num, is_refine)
+        line.interp_mode = "linear" #poly_lineであることを設定する
+        return line
+
+    # 線オブジェクトのLineObjectへの変換
+    if dxftype == "LINE":
+        line_segment_data = [entity.dxf.start, entity.dxf.end]
+        line_segment_data = np.array(line_segment_data)[:,0:2]
+        # 長さがほとんどない線分は追加しない
+        if norm(line_segment_data[0,0],line_segment_data[0,1],line_segment_data[1,0],line_segment_data[1,1]) > DIST_NEAR:
+            return LineObject(line_segment_data[:,0], line_segment_data[:,1], num, is_refine)
+
+    return None
+
+
+
+def load_dxf_lines_with_cache(filename, is_refine):
+    """load_dxf_linesと同じ線を、保存した読み込み結果があれば再利用して出力する
+
+    GEOMETRY_CACHE = Trueの場合、dxfファイルの内容と読み込み設定から作成したキーで読み込み結果を検索し、
+    見つかった場合は読み込み結果から線を作成する。見つからない場合はload_dxf_linesで読み込み、読み込み結果を保存する。
+
+    DXF_STREAM_LOAD = Trueの場合は、load_dxf_linesの代わりにload_dxf_lines_streamで読み込む。
+
+    Args:
+        filename (str): 読み込むdxfファイルのパス
+        is_refine (bool): True: スプライン点列をリファインして読み込む, False:リファインしない
+
+    Returns:
+        list: LineObjectのリスト
+    """
+    # DXF_STREAM_LOAD = Trueの場合、dxfファイル全体を保持しないload_dxf_lines_streamで読み込む
+    if DXF_STREAM_LOAD == True:
+        load_func = load_dxf_lines_stream
+    else:
+        load_func = load_dxf_lines
+
+    if GEOMETRY_CACHE == False:
+        return load_func(filename, is_refine)
+
+    key = get_geometry_cache_key(filename, is_refine)
+    line_list = load_geometry_cache(key)
+    if line_list is None:
+        line_list = load_func(filename, is_refine)
+        save_geometry_cache(key, line_list)
+    return line_list
+
+
+def load_dxf_lines_concurrent(filename_list, is_refine, executor = None):
+    """複数のdxfファイルを、load_dxf_lines_with_cacheによりプロセスプールで並列に読み込む
+
+    ezdxfによる解析とスプラインのリファインは、GILを解放しない計算(quadなど)が多いため、スレッドではなくプロセスで並列化する。
+
+    Args:
+        filename_list (list): 読み込むdxfファイルのパスのリスト
+        is_refine (bool): True: スプライン点列をリファインして読み込む, False:リファインしない
+        executor (ProcessPoolExecutor, optional): 読み込みに用いるプロセスプール。Noneの場合は、ファイル数のプロセスを起動して終了後に破棄する. Defaults to None.
+
+    Returns:
+        list: filename_listの順に、LineObjectのリストを格納したリスト
+    """
+    is_refine_list = [is_refine]*len(filename_list)
+    if executor is None:
+        with ProcessPoolExecutor(max_workers = len(filename_list)) as executor:
+            return list(executor.map(load_dxf_lines_with_cache, filename_list, is_refine_list))
+    return list(executor.map(load_dxf_lines_with_cache, filename_list, is_refine_list))
+
+
+
+class Section:
+    """CAD図面(dxfファイル)の1断面の線を、GUIによらず管理する。
+
+    Attributes:
+        name(str): 断面の名称(X-Y or U-V)
+        filename(str): 読み込んだdxfファイルのパス
+        line_list(list): dxfファイル内の線をLineObjectに変換したオブジェクトを格納するリスト。カット順に並べる
+        line_num_max(int): 線番号の最大値
+        ox(float): グラフの原点のx座標
+        oy(float): グラフの原点のy座標
+        rx(float): グラフの回転中心のx座標
+        ry(float): グラフの回転中心のy座標
+        sita(float): グラフの回転角度[rad]
+
+    Note:
+        ox, oy, rx, ry, sitaの値は、元のdxfファイルに対しての値である。
+
+    """
+    def __init__(self, name):
+        """Sectionのコンストラクタ
+
+        Args:
+            name(str): 断面の名称(X-Y or U-V)
+
+        """
+        self.name = name
+        self.filename = ""
+        self.line_list = []
+        self.line_num_max = 0
+        self.ox = 0
+        self.oy = 0
+        self.rx = 0
+        self.ry = 0
+        self.sita = 0
+
+
+    def load_file(self, filename, is_refine, line_list = None):
+        """filenameで指定されたdxfファイルを読み込む
+
+        AUTOSORT_WHEN_LOADFILE = Trueの場合、ロード時に、一番最初に読み込まれた線を始点として自動で線を整列する
+
+        Args:
+            filename (str): 読み込むdxfファイルのパス
+            is_refine (bool): True: スプライン点列をリファインして読み込む, False:リファインしない
+            line_list (list, optional): load_dxf_lines_concurrentなどで読み込み済みの線。Noneの場合はfilenameから読み込む. Defaults to None.
+        """
+        # ファイルのパス更新
+        self.filename = filename
+        # dxfファイルをline_listへ読み込み
+        self.reload(is_refine, line_list)
+        # 原点、回転中心、回転角を初期化
+        self.ox = 0
+        self.oy = 0
+        self.rx = 0
+        self.ry = 0
+        self.sita = 0
+
+        # ロード時に自動整列する場合
+        if AUTOSORT_WHEN_LOADFILE == True:
+            # 一番最初に読み込まれた線を始点として、自動整列
+            self.sort_line_from(0)
+            # 線の番号を、line_listでの線の並び順に再設定する
+            self.reset_line_num()
+
+
+    def reload(self, is_refine, line_list = None):
+        """filenameで指定されたdxfファイル上の線を、load_dxf_lines_with_cacheにより読み込み、line_listへ格納する
+
+        線番号の最大値(=読み込んだ線の本数 - 1)は、line_num_maxに格納する。
+
+        Args:
+            is_refine (bool): True: スプライン点列をリファインして読み込む, False:リファインしない
+            line_list (list, optional): 読み込み済みの線。Noneの場合はfilenameから読み込む. Defaults to None.
+        """
+        if line_list is None:
+            line_list = load_dxf_lines_with_cache(self.filename, is_refine)
+        self.line_list = line_list
+        self.line_num_max = len(self.line_list) - 1
+
+
+    def reset_line_num(self):
+        """線の番号を、line_listのインデックス順に再設定する
+        """
+        i = 0
+        # line_list内のすべての線に対して実行
+        for line in self.line_list:
+            # lineはLineObjectのインスタンス
+            line.set_num(i)
+            i += 1
+
+
+    def set_offset_dist(self, offset_dist):
+        """line_list内のLineObjectにオフセット距離を設定する
+
+        Args:
+            offset_dist (float): オフセット距離
+        """
+        for line in self.line_list:
+            line.set_offset_dist(offset_dist)
+
+
+    def remove_self_collision(self):
+        """オフセットにより生じた自己交差を修正する
+
+        すべての線の自己交差を判定し、自己交差していれば修正する。
+
+        自己交差が検出された線番号をリストとして出力する。
+
+        Returns:
+            list: 自己交差が検出された線番号のリスト
+        """
+        # 自己交差している線番号のリスト
+        self_collision_line_nums = []
+
+        # すべての線に自己交差判定&修正を実施
+        for line in self.line_list:
+            # 自己交差判定&修正
+            detection = line.remove_self_collision()
+
+            # 自己交差が検出された場合、線番号をリストに格納
+            if detection == True:
+                self_collision_line_nums.append(line.num)
+
+        return self_collision_line_nums
+
+
+    def remove_line_collision(self):
+        """オフセットにより生じた線同時の端点の交差を修正する
+
+        line_list内のi番目とi+1番目(i=0...N-1)に対し、remove_collisionにより交差を判定する。
+
+        交差している場合、i番目とi+1番目の線の座標点列を、交差を修正した座標点列に置き換える。
+
+        更に、交差が検出された線のペアをリストに格納し、出力する。
+
+        Returns:
+            list: 交差が検出された線同士の線番号（ペア）のリスト
+
+        Note:
+            オフセットが0の状態で、i番目の線の終点と、i+1番目の線の始点が一致している必要がある。
+
+            自動整列後に実行すること。
+
+        """
+        # 交差が検出された線同士の線番号（ペア）のリストを初期化
+        line_nums = []
+
+        # i番目とi+1番目の線のペアに対して、交差を判定する
+        i = 0
+        while i < len(self.line_list)-1:
+            line1 = self.line_list[i] # i番目の線
+            line2 = self.line_list[i+1] # i+1番目の線
+
+            # 交差検出
+            x1, y1, x2, y2, detection = remove_collision(line1.x, line1.y, line2.x, line2.y)
+
+            # 交差が検出された場合
+            if detection == True:
+                # 交差除去後のx,y座標でi番目とi+1番目の座標点列を置換
+                line1.set_offset_point(x1, y1)
+                line2.set_offset_point(x2, y2)
+                # 交差が検出された線のペアをリストに格納
+                line_nums.append([line1.num, line2.num])
+            i += 1
+
+        return line_nums
+
+
+    def detect_line_collision(self):
+        """オフセットにより生じた、すべての線同士の交差を検出する
+
+        remove_line_collisionは、i番目とi+1番目の線の交差のみを修正する。
+        後縁付近など、隣り合わない線同士の交差を検出するため、すべての線のオフセット後の線分をまとめて、
+        get_cross_segmentsにより交差を判定する。
+
+        線の端点同士が接している箇所(交点が両方の線の端点からDIST_NEAR以内)は、線のつながりなので交差とみなさない。
+
+        交差が検出された線のペアをリストに格納し、出力する。交差の修正は行わない。
+
+        Returns:
+            list: 交差が検出された線同士の線番号（ペア）のリスト
+
+        Note:
+            remove_line_collisionの後に実行すること。
+        """
+        # すべての線の線分と、線分が属する線の、line_list上の順番を格納する
+        seg_list = []
+        order_list = []
+        i = 0
+        while i < len(self.line_list):
+            line = self.line_list[i]
+            seg = get_segments(line.x, line.y)
+            seg_list.append(seg)
+            order_list.append(np.full(len(seg), i))
+            i += 1
+
+        # 交差が検出された線同士の線番号（ペア）のリストを初期化
+        line_nums = []
+
+        if len(seg_list) == 0:
+            return line_nums
+
+        seg = np.concatenate(seg_list, 0)
+        order = np.concatenate(order_list, 0)
+
+        # 全線分同士の交差を判定する
+        cross_i, cross_j, cross_x, cross_y = get_cross_segments(seg)
+
+        # 自己交差の判定では、配列上で隣接する線分のペアが除外されるため、線の境界で隣接する線分のペアは別に判定する
+        edge = np.nonzero(order[:-1] < order[1:])[0]
+        edge_i, edge_j, edge_x, edge_y = get_cross_segments(seg[edge], seg[edge + 1])
+        mask = edge_i == edge_j
+        cross_i = np.concatenate([cross_i, edge[edge_i[mask]]])
+        cross_j = np.concatenate([cross_j, edge[edge_j[mask]] + 1])
+        cross_x = np.concatenate([cross_x, edge_x[mask]])
+        cross_y = np.concatenate([cross_y, edge_y[mask]])
+
+        # 異なる線同士のペアのみ残し、線分番号の昇順に並べる(同じ線の交差は、remove_self_collisionで判定する)
+        mask = order[cross_i] < order[cross_j]
+        sort = np.lexsort((cross_j[mask], cross_i[mask]))
+        cross_i = cross_i[mask][sort]
+        cross_j = cross_j[mask][sort]
+        cross_x = cross_x[mask][sort]
+        cross_y = cross_y[mask][sort]
+
+        # 検出済みのペアの判定用
+        line_num_set = set()
+
+        k = 0
+        while k < len(cross_i):
+            line1 = self.line_list[order[cross_i[k]]]
+            line2 = self.line_list[order[cross_j[k]]]
+            pair = [line1.num, line2.num]
+            cx = cross_x[k]
+            cy = cross_y[k]
+
+            # 同一直線上で重なる線分は交点が定まらない(nan)ので、線分の端点同士が一致する場合はその点を交点とする
+            if np.isnan(cx) or np.isnan(cy):
+                for p1 in [seg[cross_i[k], 0:2], seg[cross_i[k], 2:4]]:
+                    for p2 in [seg[cross_j[k], 0:2], seg[cross_j[k], 2:4]]:
+                        if norm(p1[0], p1[1], p2[0], p2[1]) < DIST_NEAR:
+                            cx = p1[0]
+                            cy = p1[1]
+
+            # 交点が、両方の線の端点と一致する場合は、線のつながりとみなす
+            is_connect1 = min(norm(line1.x[0], line1.y[0], cx, cy), norm(line1.x[-1], line1.y[-1], cx, cy)) < DIST_NEAR
+            is_connect2 = min(norm(line2.x[0], line2.y[0], cx, cy), norm(line2.x[-1], line2.y[-1], cx, cy)) < DIST_NEAR
+
+            if not(is_connect1 and is_connect2) and not(tuple(pair) in line_num_set):
+                line_nums.append(pair)
+                line_num_set.add(tuple(pair))
+            k += 1
+
+        return line_nums
+
+
+    def reverse_all(self):
+        """line_list内のLineObjectの座標点列と、line_listを反転する
+
+        """
+        # line_listを反転
+        self.line_list.reverse()
+
+        # すべての線の座標点列の向きを反転する
+        for line in self.line_list:
+            line.toggle_cut_dir()
+
+
+    def sort_line_from(self, index_st):
+        """line_listのindex_st番目の線を起点に、残りの線を並び替える。並び替え後、座標点列の向きを判定し、線に設定する。
+
+        線の並び替えは、以下の手順で実施する。
+
+            1. 起点の線の終点から最も近い位置にあるライン端を検索する。
+
+            2. 1.のライン端を有するラインを、2番目に配置する。1.のライン端がラインの終端である場合，向きを入れ替える。
+
+            3. 1.のライン端の逆端から最も近い位置にあるライン端を検索する。
+
+            4. 3.のライン端を有するラインを、3番目に配置する。3.のライン端がラインの終端である場合，向きを入れ替える。
+
+            5. 3.のライン端から最も近い位置にあるライン端を検索する。
+
+            6. 3～5を、line_list内の全てのラインに対して実施する。
+
+        Note:
+            CAD図面に複数の閉曲線が含まれる場合、起点の線の向きと同じ向きにすべての閉曲線を並び替える。
+
+        Note:
+            閉曲線かどうかの判定は、端点間の距離がDIST_NEAR以下かで判定する。
+
+        Note:
+            最も近いライン端の検索は、すべての線の始点と終点を格納したKD木(cKDTree)を用いる。
+            並び替え済みの線の端点は検索対象から除外し、除外した端点が半数を超えたらKD木を作り直す。
+            距離が等しいライン端が複数ある場合は、line_listで前にある線を優先する。
+
+        Args:
+            index_st (int): 起点とする線の、line_listでのインデックス
+        """
+        # ソートの開始点を、起点の線に設定
+        line_st = self.line_list[index_st]
+
+        x0 = line_st.ed[0]
+        y0 = line_st.ed[1]
+
+        # 閉曲線の座標点列は、閉曲線ごとに線の座標点列をリストに格納し、最後に結合する
+        x_array = [line_st.x_raw]
+        y_array = [line_st.y_raw]
+        new_lines = [line_st]
+        new_line_list = []
+        x_array_list = []
+        y_array_list = []
+
+        # すべての線の始点と終点の座標。2*k番目がk番目の線の始点、2*k+1番目がk番目の線の終点
+        lines = list(self.line_list)
+        end_points = np.zeros((2*len(lines), 2))
+        k = 0
+        while k < len(lines):
+            end_points[2*k] = lines[k].st
+            end_points[2*k+1] = lines[k].ed
+            k += 1
+        # 並び替え済みの線
+        is_sorted = np.zeros(len(lines), dtype = bool)
+        is_sorted[index_st] = True
+
+        def build_tree():
+            # 並び替えていない線の端点で、KD木を作成する
+            point_index = np.where(np.repeat(~is_sorted, 2))[0]
+            return cKDTree(end_points[point_index]), point_index
+
+        def search_nearest_line(x0, y0):
+            # (x0, y0)から最も近いライン端を有する、並び替えていない線を検索する
+            k_query = 2
+            while True:
+                k_query = min(k_query, len(point_index))
+                dist, pos = tree.query([x0, y0], k = k_query)
+                dist = np.atleast_1d(dist)
+                pos = np.atleast_1d(pos)
+                line_index = point_index[pos]//2
+                valid = ~is_sorted[line_index]
+                if np.any(valid) or k_query == len(point_index):
+                    break
+                k_query = k_query*2
+
+            # 最も近いライン端と同じ距離にあるライン端をすべて候補とし、元の線の順番で判定する
+            dist_mn = dist[valid][0]
+            pos = tree.query_ball_point([x0, y0], dist_mn*(1 + 1e-9) + 1e-12)
+            candidates = np.unique(point_index[pos]//2)
+
+            norm_mn = np.inf
+            for index in candidates:
+                if is_sorted[index] == True:
+                    continue
+                line = lines[index]
+                norm_st = norm(x0, y0, line.st[0], line.st[1])
+                norm_ed = norm(x0, y0, line.ed[0], line.ed[1])
+                if min(norm_st, norm_ed) < norm_mn:
+                    index_mn = index
+                    norm_mn = min(norm_st, norm_ed)
+                    if norm_st < norm_ed:
+                        toggle = False
+                    else:
+                        toggle = True
+            return index_mn, norm_mn, toggle
+
+        tree, point_index = build_tree()
+        n_sorted_tree = 1 # KD木の作成時点で、並び替え済みの線の数
+
+        # ソートを実行
+        i = 0
+        while i < len(lines) - 1:
+            # 並び替え済みの線の端点が半数を超えたら、KD木を作り直す
+            if (np.count_nonzero(is_sorted) - n_sorted_tree)*2 > len(point_index)//2:
+                tree, point_index = build_tree()
+                n_sorted_tree = np.count_nonzero(is_sorted)
+
+            index_mn, norm_mn, toggle = search_nearest_line(x0, y0)
+            line_mn = lines[index_mn]
+            is_sorted[index_mn] = True
+
+            if toggle == True:
+                line_mn.toggle_cut_dir()
+            x0 = line_mn.ed[0]
+            y0 = line_mn.ed[1]
+
+            # 同じ閉曲線かどうかを判定
+            if norm_mn <= DIST_NEAR:
+                new_lines.append(line_mn)
+                x_array.append(line_mn.x_raw)
+                y_array.append(line_mn.y_raw)
+            else:
+                new_line_list.append(new_lines)
+                x_array_list.append(np.concatenate(x_array, 0))
+                y_array_list.append(np.concatenate(y_array, 0))
+                new_lines = [line_mn]
+                x_array = [line_mn.x_raw]
+                y_array = [line_mn.y_raw]
+
+            i += 1
+
+        new_line_list.append(new_lines)
+        x_array_list.append(np.concatenate(x_array, 0))
+        y_array_list.append(np.concatenate(y_array, 0))
+
+        # 閉曲線の向きを判定
+        ccw_list = []
+        i = 0
+        while i < len(x_array_list):
+            x_array = x_array_list[i]
+            y_array = y_array_list[i]
+            ccw = detect_rotation(x_array, y_array)
+            ccw_list.append(ccw)
+            i += 1
+
+        # 閉曲線が複数ある場合、残りの閉曲線の向きを最初の線の向きに合わせる
+        ccw_st = ccw_list[0]
+        i = 0
+        while i < len(ccw_list):
+            ccw = ccw_list[i]
+            new_lines = new_line_list[i]
+            if not(ccw == ccw_st):
+                new_line_list[i] = new_lines[::-1]
+
+            for line in new_lines:
+                if not(ccw == ccw_st):
+                    line.toggle_cut_dir()
+                line.set_ccw(ccw_st)
+            i += 1
+
+        self.line_list = [line for new_lines in new_line_list for line in new_lines]
+
+
+    def offset_origin(self, offset_ox, offset_oy):
+        """指定の座標に原点をオフセットする。
+
+        Args:
+            offset_ox (float): 原点のx座標
+            offset_oy (float): 原点のy座標
+        """
+        # 現在の原点の座標からの差分を計算する
+        dx = offset_ox - self.ox
+        dy = offset_oy - self.oy
+        # 原点の座標を更新する
+        self.ox = offset_ox
+        self.oy = offset_oy
+        # 回転中心の座標をオフセットする
+        self.rx = self.rx + dx
+        self.ry = self.ry + dy
+
+        # すべての線を、現在の原点の座標からの差分だけ移動する
+        for line in self.line_list:
+            line.move_origin(dx, dy)
+
+
+    def rotate(self, sita, rx, ry):
+        """指定の座標を中心に、指定の角度だけ線を回転する
+
+        Args:
+            sita (float): 回転角度[rad]
+            rx (float): 回転中心x座標
+            ry (float): 回転中心y座標
+        """
+        # 回転中心の座標を更新
+        self.rx = rx
+        self.ry = ry
+        # 現在の回転角度からの差分を計算する
+        d_sita = sita - self.sita
+        # 回転角度を更新
+        self.sita = sita
+
+        # すべての線を、現在の回転角度からの差分だけ回転する
+        for line in self.line_list:
+            line.rotate(d_sita, rx, ry)
+
+
+    def get_cg(self):
+        """すべての線の重心の座標を計算する
+
+        重心は、すべての点の座標の平均値で計算する。
+
+        Returns:
+            float: 重心のx座標
+            float: 重心のy座標
+        """
+        # 平均値計算用にx,y座標を格納する配列を用意
+        x = np.array([])
+        y = np.array([])
+
+        # すべての線の座標を配列に格納
+        for line in self.line_list:
+            x = np.concatenate([x, line.x_raw], 0)
+            y = np.concatenate([y, line.y_raw], 0)
+
+        # 格納したx,y座標の平均値を計算
+        # 配列長がゼロ出ない場合
+        if not(len(x) == 0):
+            cg_x = np.mean(x)
+            cg_y = np.mean(y)
+        # 配列長がゼロの場合
+        else:
+            cg_x = None
+            cg_y = None
+
+        return cg_x, cg_y
+
+
+    def get_cache_count(self):
+        """すべての線の、派生データのcacheの取得回数を集計する
+
+        cacheの効果を確認するために用いる。
+
+        Returns:
+            int: cacheから派生データを取得できた回数の合計
+            int: cacheに派生データがなく、計算した回数の合計
+        """
+        cache_hit = 0
+        cache_miss = 0
+        for line in self.line_list:
+            cache_hit += line.cache_hit
+            cache_miss += line.cache_miss
+
+        return cache_hit, cache_miss
@@ -0,0 +1,356 @@
+# -*- coding: utf-8 -*-
+"""パスチェックとGコード生成で共通して用いる、カットパスを作成するライブラリ
+
+"""
+
+# 外部ライブラリ
+import numpy as np
+
+# 内部ライブラリ
+from cam_generic_lib import *
+from cam_global import *
+
+
+class ToolpathSegment:
+    """カットパスを構成する区間の情報を格納するクラスである。
+
+    区間の種類(kind)は、以下とする。
+
+    +-----------+------------------------------------------------+-----------+
+    |kind       |内容                                            |Gコード出力|
+    +-----------+------------------------------------------------+-----------+
+    |start      |カット開始点(1点)                               |しない     |
+    +-----------+------------------------------------------------+-----------+
+    |connector  |カット開始点・終了点と線をつなぐ補完点列        |しない     |
+    +-----------+------------------------------------------------+-----------+
+    |line       |線を等間隔分割した点列                          |する       |
+    +-----------+------------------------------------------------+-----------+
+    |fillet     |オフセットした線間を補完するフィレットの点列    |する       |
+    +-----------+------------------------------------------------+-----------+
+
+    Attributes:
+        kind(str): 区間の種類(start/connector/line/fillet)
+        line_index(int): 区間に対応する線のline_listでのインデックス。フィレットは、フィレットの後の線のインデックス
+        x(numpy.array): XY面のx座標点列
+        y(numpy.array): XY面のy座標点列
+        u(numpy.array): UV面のu座標点列
+        v(numpy.array): UV面のv座標点列
+        x_m(numpy.array): XY駆動面のx座標点列
+        y_m(numpy.array): XY駆動面のy座標点列
+        u_m(numpy.array): UV駆動面のu座標点列
+        v_m(numpy.array): UV駆動面のv座標点列
+        arc(list): 区間が駆動面上で円弧となる場合、[XY駆動面の円弧の中心x, 中心y, UV駆動面の円弧の中心u, 中心v, 回転方向]。円弧でない場合はNone
+    """
+    def __init__(self, kind, line_index, x, y, u, v, z_xy, z_uv, z_mach):
+        """ToolpathSegmentのコンストラクタ
+
+        駆動面の座標点列は、make_offset_pathにより作成する。
+
+        Args:
+            kind (str): 区間の種類(start/connector/line/fillet)
+            line_index (int): 区間に対応する線のline_listでのインデックス
+            x (numpy.array): XY面のx座標点列
+            y (numpy.array): XY面のy座標点列
+            u (numpy.array): UV面のu座標点列
+            v (numpy.array): UV面のv座標点列
+            z_xy (float): xy平面とxy駆動面側のCNC駆動面間の距離
+            z_uv (float): uv平面とuv駆動面側のCNC駆動面間の距離
+            z_mach (float): CNC駆動面間の距離
+        """
+        self.kind = kind
+        self.line_index = line_index
+        self.x = np.asarray(x, dtype = float)
+        self.y = np.asarray(y, dtype = float)
+        self.u = np.asarray(u, dtype = float)
+        self.v = np.asarray(v, dtype = float)
+        self.x_m, self.y_m, self.u_m, self.v_m = make_offset_path(self.x, self.y, self.u, self.v, z_xy, z_uv, z_mach)
+        self.arc = None
+
+
+class Toolpath:
+    """ToolpathBuilderで作成したカットパスを格納するクラスである。
+
+    Attributes:
+        segments(list): カットパスを構成するToolpathSegmentのリスト(カット順)
+        length_sum(float): XY面とUV面の線長の平均値の、全線の合計
+        x_array(numpy.array): すべての区間を結合したXY面のx座標点列
+        y_array(numpy.array): すべての区間を結合したXY面のy座標点列
+        u_array(numpy.array): すべての区間を結合したUV面のu座標点列
+        v_array(numpy.array): すべての区間を結合したUV面のv座標点列
+        x_m_array(numpy.array): すべての区間を結合したXY駆動面のx座標点列
+        y_m_array(numpy.array): すべての区間を結合したXY駆動面のy座標点列
+        u_m_array(numpy.array): すべての区間を結合したUV駆動面のu座標点列
+        v_m_array(numpy.array): すべての区間を結合したUV駆動面のv座標点列
+    """
+    def __init__(self, segments, length_sum):
+        """Toolpathのコンストラクタ
+
+        Args:
+            segments (list): カットパスを構成するToolpathSegmentのリスト(カット順)
+            length_sum (float): XY面とUV面の線長の平均値の、全線の合計
+        """
+        self.segments = segments
+        self.length_sum = length_sum
+
+        # ビューア用に、すべての区間を1度だけ結合する
+        self.x_array = np.concatenate([seg.x for seg in segments], 0)
+        self.y_array = np.concatenate([seg.y for seg in segments], 0)
+        self.u_array = np.concatenate([seg.u for seg in segments], 0)
+        self.v_array = np.concatenate([seg.v for seg in segments], 0)
+        self.x_m_array = np.concatenate([seg.x_m for seg in segments], 0)
+        self.y_m_array = np.concatenate([seg.y_m for seg in segments], 0)
+        self.u_m_array = np.concatenate([seg.u_m for seg in segments], 0)
+        self.v_m_array = np.concatenate([seg.v_m for seg in segments], 0)
+
+
+class ToolpathBuilder:
+    """XY面とUV面の線から、カットパス(Toolpath)を作成するクラスである。
+
+    パスチェックとGコード生成で同じカットパスを用いるため、作成したカットパスを保持し、
+    入力が変わっていなければ再利用する(メモ化)。
+
+    入力が同じかどうかは、以下をキーとして判定する。
+
+    ・XY面、UV面のすべての線(LineObject)と、線の座標点列の更新回数(version)
+
+    ・カット開始点、カット終了点の座標、分割距離dl
+
+    ・ワーク面とCNC駆動面の距離(z_xy, z_uv, z_mach)
+
+    カット速度はカットパスの形状に影響しないため、キーに含めない。Gコード生成時に線から取得すること。
+
+    Attributes:
+        key(tuple): 保持しているカットパスを作成した時の入力
+        toolpath(Toolpath): 保持しているカットパス
+        build_count(int): カットパスを作成した回数
+        reuse_count(int): 保持しているカットパスを再利用した回数
+    """
+    def __init__(self):
+        """ToolpathBuilderのコンストラクタ
+        """
+        self.key = None
+        self.toolpath = None
+        self.build_count = 0
+        self.reuse_count = 0
+
+
+    def get_key(self, line_list0, line_list1, ox, oy, ex, ey, dl, z_xy, z_uv, z_mach):
+        """カットパスの再利用を判定するキーを作成する
+
+        線はオブジェクトそのものをキーに含めることで、線が入れ替わった場合(ファイル再読み込み等)も判定できるようにする。
+
+        Returns:
+            tuple: カットパスの再利用を判定するキー
+        """
+        lines0 = tuple([(line, line.version) for line in line_list0])
+        lines1 = tuple([(line, line.version) for line in line_list1])
+        return (lines0, lines1, ox, oy, ex, ey, dl, z_xy, z_uv, z_mach)
+
+
+    def get_toolpath(self, line_list0, line_list1, ox, oy, ex, ey, dl, z_xy, z_uv, z_mach):
+        """カットパスを取得する
+
+        入力が前回と同じ場合は、保持しているカットパスを出力する。異なる場合は、buildにより作成する。
+
+        Args:
+            line_list0 (list): XY面の線(LineObject)のリスト(カット順)
+            line_list1 (list): UV面の線(LineObject)のリスト(カット順)。line_list0と同じ本数であること
+            ox (float): カット開始点のx座標
+            oy (float): カット開始点のy座標
+            ex (float): カット終了点のx座標
+            ey (float): カット終了点のy座標
+            dl (float): 分割距離
+            z_xy (float): xy平面とxy駆動面側のCNC駆動面間の距離
+            z_uv (float): uv平面とuv駆動面側のCNC駆動面間の距離
+            z_mach (float): CNC駆動面間の距離
+
+        Returns:
+            Toolpath: カットパス
+        """
+        key = self.get_key(line_list0, line_list1, ox, oy, ex, ey, dl, z_xy, z_uv, z_mach)
+
+        if (not(self.toolpath == None)) and (key == self.key):
+            self.reuse_count += 1
+        else:
+            self.toolpath = self.build(line_list0, line_list1, ox, oy, ex, ey, dl, z_xy, z_uv, z_mach)
+            self.key = key
+            self.build_count += 1
+
+        return self.toolpath
+
+
+    def build(self, line_list0, line_list1, ox, oy, ex, ey, dl, z_xy, z_uv, z_mach):
+        """カットパスを作成する
+
+        以下の手順で作成する。
+
+            1. 線ごとに、XY面とUV面の線長の長い方をdlで分割した点数を求め、generate_arc_length_pointsで等間隔分割する。
+               ADAPTIVE_SAMPLING = Trueの場合は、generate_adaptive_arc_length_pointsにより曲率に応じて分割する。
+
+            2. 2本目以降の線は、前の線との間をgenerate_offset_interporate_pointによりフィレット補完する(FILET_INTERPOLATE = Trueの場合)。
+               フィレットが作成されない場合は、線の始点を前の線の終点に置き換える。
+
+            3. カット開始点と最初の線、最後の線とカット終了点の間が、dlより離れている場合は、直線で補完する(connector)。
+
+            4. 各区間について、make_offset_pathによりCNC駆動面の座標点列を作成する。
+               線の区間は、get_arcにより駆動面上で円弧となるかを判定する。
+
+        Args:
+            line_list0 (list): XY面の線(LineObject)のリスト(カット順)
+            line_list1 (list): UV面の線(LineObject)のリスト(カット順)。line_list0と同じ本数であること
+            ox (float): カット開始点のx座標
+            oy (float): カット開始点のy座標
+            ex (float): カット終了点のx座標
+            ey (float): カット終了点のy座標
+            dl (float): 分割距離
+            z_xy (float): xy平面とxy駆動面側のCNC駆動面間の距離
+            z_uv (float): uv平面とuv駆動面側のCNC駆動面間の距離
+            z_mach (float): CNC駆動面間の距離
+
+        Returns:
+            Toolpath: カットパス
+        """
+        segments = [ToolpathSegment("start", None, [ox], [oy], [ox], [oy], z_xy, z_uv, z_mach)]
+        # フィレット補完に用いる末尾の点を取得するため、ワーク面の座標点列を蓄積する
+        path = PathBuffer([ox], [oy], [ox], [oy])
+        length_sum = 0
+
+        xy_offset_dist = []
+        uv_offset_dist = []
+
+        i = 0
+        while i < len(line_list0):
+            line0 = line_list0[i]
+            line1 = line_list1[i]
+
+            line0_length = line0.get_length()
+            line1_length = line1.get_length()
+
+            length_sum += (line0_length + line1_length)/2.0
+
+            xy_offset_dist.append(line0.offset_dist)
+            uv_offset_dist.append(line1.offset_dist)
+
+            if ADAPTIVE_SAMPLING == True:
+                # 曲率に応じて、XY面とUV面で共通の媒介変数により分割する
+                x, y, u, v = generate_adaptive_arc_length_points(line0, line1, TOL_ADAPTIVE_SAMPLING, DIST_ADAPTIVE_MIN, DIST_ADAPTIVE_MAX)
+            else:
+                n = int(max(line0_length, line1_length)/ dl)
+                if n < 2:
+                    n = 2
+
+                x, y = generate_arc_length_points(line0, n)
+                u, v = generate_arc_length_points(line1, n)
+
+            if not(i == 0):
+                if FILET_INTERPOLATE == True:
+                    # 始点と終点以外は、フィレット補完する
+                    x_last, y_last, u_last, v_last = path.get_last_point(2)
+                    l0_x = [x_last[-2], x_last[-1]]
+                    l0_y = [y_last[-2], y_last[-1]]
+                    l1_x = [x[0], x[1]]
+                    l1_y = [y[0], y[1]]
+
+                    l0_u = [u_last[-2], u_last[-1]]
+                    l0_v = [v_last[-2], v_last[-1]]
+                    l1_u = [u[0], u[1]]
+                    l1_v = [v[0], v[1]]
+
+                    x_f, y_f = generate_offset_interporate_point(l0_x, l0_y, l1_x, l1_y, xy_offset_dist[-1], xy_offset_dist[-2])
+                    u_f, v_f = generate_offset_interporate_point(l0_u, l0_v, l1_u, l1_v, uv_offset_dist[-1], uv_offset_dist[-2])
+
+                    if (not(len(x_f) == 0)) and (not(len(u_f) == 0)):
+                        segments.append(ToolpathSegment("fillet", i, x_f, y_f, u_f, v_f, z_xy, z_uv, z_mach))
+                        path.append(x_f, y_f, u_f, v_f)
+                    else:
+                        x[0] = x_last[-1]
+                        y[0] = y_last[-1]
+                        u[0] = u_last[-1]
+                        v[0] = v_last[-1]
+            else:
+                # カット開始点と最初の線の間を補完する
+                x_last, y_last, u_last, v_last = path.get_last_point(1)
+                x_p, y_p, u_p, v_p = self.get_connector(x_last[-1], y_last[-1], u_last[-1], v_last[-1], x[0], y[0], u[0], v[0], dl)
+                if not(len(x_p) == 0):
+                    segments.append(ToolpathSegment("connector", i, x_p, y_p, u_p, v_p, z_xy, z_uv, z_mach))
+                    path.append(x_p, y_p, u_p, v_p)
+
+            segment = ToolpathSegment("line", i, x, y, u, v, z_xy, z_uv, z_mach)
+            segment.arc = self.get_arc(line0, line1, z_xy, z_uv, z_mach)
+            segments.append(segment)
+            path.append(x, y, u, v)
+
+            i += 1
+
+        # 最後の線とカット終了点の間を補完する
+        x_last, y_last, u_last, v_last = path.get_last_point(1)
+        x_p, y_p, u_p, v_p = self.get_connector(x_last[-1], y_last[-1], u_last[-1], v_last[-1], ex, ey, ex, ey, dl)
+        if not(len(x_p) == 0):
+            segments.append(ToolpathSegment("connector", i, x_p, y_p, u_p, v_p, z_xy, z_uv, z_mach))
+
+        return Toolpath(segments, length_sum)
+
+
+    def get_arc(self, line0, line1, z_xy, z_uv, z_mach):
+        """XY面とUV面の線がともに円弧(ArcObject)で、始点の角度と中心角が一致する場合に、駆動面上の円弧の中心と回転方向を求める
+
+        make_offset_pathは、XY面とUV面の座標の線形結合であるため、同じ角度で媒介変数表示される2つの円弧は、
+        駆動面上でも円弧となり、その中心は2つの円弧の中心をmake_offset_pathで変換した点となる。
+
+        Args:
+            line0 (LineObject): XY面の線
+            line1 (LineObject): UV面の線
+            z_xy (float): xy平面とxy駆動面側のCNC駆動面間の距離
+            z_uv (float): uv平面とuv駆動面側のCNC駆動面間の距離
+            z_mach (float): CNC駆動面間の距離
+
+        Returns:
+            list: [XY駆動面の円弧の中心x, 中心y, UV駆動面の円弧の中心u, 中心v, 回転方向(1:反時計回り, -1:時計回り)]。円弧とならない場合はNone
+        """
+        if not((line0.line_type == "arc") and (line1.line_type == "arc")):
+            return None
+        
+        # 始点の角度の差を、-pi~piにラッピングして比較する
+        d_theta = (line0.theta - line1.theta + np.pi)%(2*np.pi) - np.pi
+        if (np.abs(d_theta) > DIST_ARC_ANGLE) or (np.abs(line0.sweep - line1.sweep) > DIST_ARC_ANGLE):
+            return None
+        
+        xc_m, yc_m, uc_m, vc_m = make_offset_path([line0.xc], [line0.yc], [line1.xc], [line1.yc], z_xy, z_uv, z_mach)
+        return [xc_m[0], yc_m[0], uc_m[0], vc_m[0], int(np.sign(line0.sweep))]
+
+
+    def get_connector(self, x0, y0, u0, v0, x1, y1, u1, v1, dl):
+        """2点間が分割距離dlより離れている場合に、2点間を直線で補完した点列を作成する
+
+        Args:
+            x0 (float): 補完開始点のx座標
+            y0 (float): 補完開始点のy座標
+            u0 (float): 補完開始点のu座標
+            v0 (float): 補完開始点のv座標
+            x1 (float): 補完終了点のx座標
+            y1 (float): 補完終了点のy座標
+            u1 (float): 補完終了点のu座標
+            v1 (float): 補完終了点のv座標
+            dl (float): 分割距離
+
+        Returns:
+            numpy.array: 補完点列のx座標。補完しない場合は空の配列
+            numpy.array: 補完点列のy座標。補完しない場合は空の配列
+            numpy.array: 補完点列のu座標。補完しない場合は空の配列
+            numpy.array: 補完点列のv座標。補完しない場合は空の配列
+        """
+        norm_line2line0 = norm(x0, y0, x1, y1)
+        norm_line2line1 = norm(u0, v0, u1, v1)
+
+        if norm_line2line0 > dl  or  norm_line2line1 > dl:
+            n_interp_line2line = int(max(norm_line2line0, norm_line2line1) / dl)
+
+            if n_interp_line2line < 2:
+                n_interp_line2line = 2
+
+            x_p, y_p = refine_line([x0, x1], [y0, y1], n_interp_line2line)
+            u_p, v_p = refine_line([u0, u1], [v0, v1], n_interp_line2line)
+            return x_p, y_p, u_p, v_p
+
+        else:
+            return np.array([]), np.array([]), np.array([]), np.array([])
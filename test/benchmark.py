@@ -0,0 +1,411 @@
+# -*- coding: utf-8 -*-
+"""CAM処理の計算時間を計測するベンチマーク
+
+翼型（NACA4桁）の座標点列を用いて、各処理の計算時間と、従来の計算方法との差を出力する。
+
+実行方法::
+
+    python benchmark.py
+
+"""
+
+# 外部ライブラリ
+import os
+import sys
+import time
+import tempfile
+import tracemalloc
+import numpy as np
+import ezdxf
+from concurrent.futures import ProcessPoolExecutor
+
+# 内部ライブラリ
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+from cam_generic_lib import *
+from line_object import *
+from section import *
+
+
+def naca4(code, chord, n):
+    """NACA4桁翼型の座標点列を作成する（後縁→上面→前縁→下面→後縁）
+
+    Args:
+        code (str): 翼型番号（例："2412"）
+        chord (float): 翼弦長
+        n (int): 上下面それぞれの点数
+
+    Returns:
+        numpy.array: x座標点列
+        numpy.array: y座標点列
+    """
+    m = int(code[0])/100.0
+    p = int(code[1])/10.0
+    t = int(code[2:])/100.0
+    beta = np.linspace(0, np.pi, n)
+    xc = (1 - np.cos(beta))/2.0
+    yt = 5*t*(0.2969*np.sqrt(xc) - 0.1260*xc - 0.3516*xc**2 + 0.2843*xc**3 - 0.1036*xc**4)
+    # 対称翼の場合、キャンバーはゼロ
+    if p == 0:
+        yc = np.zeros(n)
+    else:
+        yc = np.where(xc < p, m/p**2*(2*p*xc - xc**2), m/(1-p)**2*((1-2*p) + 2*p*xc - xc**2))
+    x = np.concatenate([xc[::-1], xc[1:]])*chord
+    y = np.concatenate([(yc + yt)[::-1], (yc - yt)[1:]])*chord
+    return x, y
+
+
+def measure(func, *args, repeat = 3):
+    """funcの実行時間の最小値[s]と戻り値を出力する"""
+    t_min = np.inf
+    for i in range(repeat):
+        t = time.perf_counter()
+        ret = func(*args)
+        t_min = min(t_min, time.perf_counter() - t)
+    return t_min, ret
+
+
+def bench_spline_length():
+    """get_spline_length_arrayのガウス・ルジャンドル求積と、quadによる適応積分を比較する"""
+    print("[get_spline_length_array]")
+    for n in [200, 1000, 4000]:
+        x, y = naca4("2412", 1000, n)
+        t_quad, l_quad = measure(get_spline_length_array_quad, x, y, repeat = 1)
+        for n_gauss in [3, 5, 8]:
+            t_gl, l_gl = measure(get_spline_length_array, x, y, n_gauss)
+            print("  N=%5d  n_gauss=%d  quad: %8.4f s  gauss: %8.5f s  x%6.1f  max error: %.2e mm"
+                  %(len(x), n_gauss, t_quad, t_gl, t_quad/t_gl, np.max(np.abs(l_quad - l_gl))))
+
+
+def bench_line_cache():
+    """LineObjectのcacheの有無で、線長計算と等間隔分割を繰り返したときの計算時間を比較する"""
+    print("[LineObject cache]")
+    x, y = naca4("2412", 1000, 1000)
+    line = LineObject(x, y, 0, False)
+    line.set_offset_dist(0.5)
+    # cacheの取得回数は、Section.get_cache_countで集計する
+    section = Section("X-Y")
+    section.line_list = [line]
+    n_repeat = 20
+    
+    def run_nocache():
+        for i in range(n_repeat):
+            line.calc_length_array_nocache()
+            # cacheを毎回無効化して計算させる
+            line.update_version()
+            generate_arc_length_points(line, 2000)
+            
+    def run_cache():
+        for i in range(n_repeat):
+            line.get_length()
+            generate_arc_length_points(line, 2000)
+    
+    t_nocache, ret = measure(run_nocache, repeat = 1)
+    line.cache_hit = 0
+    line.cache_miss = 0
+    line.update_version()
+    t_cache, ret = measure(run_cache, repeat = 1)
+    cache_hit, cache_miss = section.get_cache_count()
+    print("  repeat=%d  no cache: %8.4f s  cache: %8.5f s  x%6.1f  hit: %d  miss: %d  hit rate: %5.1f %%"
+          %(n_repeat, t_nocache, t_cache, t_nocache/t_cache, cache_hit, cache_miss, 100.0*cache_hit/max(cache_hit + cache_miss, 1)))
+
+
+def bench_offset_line():
+    """50本の線からなる図面に対して、オフセット距離を変更したときの計算時間を計測する"""
+    print("[offset_line]")
+    line_list = []
+    for i in range(50):
+        x, y = naca4("2412", 1000, 400)
+        line_list.append(LineObject(x, y, i, False))
+        
+    def run_offset():
+        for line in line_list:
+            line.set_offset_dist(0.5)
+            
+    t_offset, ret = measure(run_offset)
+    print("  lines=%d  N=%d  offset: %8.5f s"%(len(line_list), len(x), t_offset))
+
+
+def bench_self_collision():
+    """オフセットした翼型に対して、get_cross_segmentsによる自己交差除去と、総当たりによる自己交差除去を比較する"""
+    print("[remove_self_collision]")
+    
+    def run_bruteforce(x, y):
+        # 従来の実装：すべての線分のペアをcross_judgeで判定し、自己交差がなくなるまで繰り返す
+        detection = False
+        self_col = True
+        while self_col == True:
+            x, y = remove_same_point(x, y)
+            new_x = [x[0]]
+            new_y = [y[0]]
+            self_col = False
+            i = 1
+            while i < len(x):
+                j = i+1
+                p1 = [x[i-1], y[i-1]]
+                p2 = [x[i], y[i]]
+                while j < len(x)-3:
+                    if cross_judge(p1, p2, [x[j], y[j]], [x[j+1], y[j+1]]) == True:
+                        self_col = True
+                        i = j+1
+                    j += 1
+                new_x.append(x[i])
+                new_y.append(y[i])
+                i += 1
+            x = np.array(new_x)
+            y = np.array(new_y)
+            if self_col == True:
+                detection = True
+        return x, y, detection
+    
+    for n in [200, 1000, 2000]:
+        x, y = naca4("0006", 200, n)
+        # 後縁付近で自己交差が発生するように、薄翼を内側にオフセットする
+        x, y = offset_line(x, y, 1.0, "cubic")
+        t_bf, ret_bf = measure(run_bruteforce, x, y, repeat = 1)
+        t_kn, ret_kn = measure(remove_self_collision, x, y)
+        same = np.array_equal(ret_bf[0], ret_kn[0]) and np.array_equal(ret_bf[1], ret_kn[1])
+        print("  N=%5d  bruteforce: %8.4f s  kernel: %8.5f s  x%6.1f  detection: %s  same: %s"
+              %(len(x), t_bf, t_kn, t_bf/t_kn, ret_kn[2], same))
+
+
+def bench_line_collision():
+    """隣接する2本の線に対して、get_cross_segmentsによる交差除去と、総当たりによる交差除去を比較する"""
+    print("[remove_collision]")
+    
+    def run_bruteforce(x1, y1, x2, y2):
+        # 従来の実装：すべての線分のペアをcross_judgeで判定し、最初に見つかった交点で交差を解消する
+        x1, y1 = remove_same_point(x1, y1)
+        x2, y2 = remove_same_point(x2, y2)
+        i = 1
+        while i < len(x1):
+            p1 = [x1[i-1], y1[i-1]]
+            p2 = [x1[i], y1[i]]
+            j = 1
+            while j < len(x2):
+                p3 = [x2[j-1], y2[j-1]]
+                p4 = [x2[j], y2[j]]
+                if cross_judge(p1, p2, p3, p4) == True:
+                    cx, cy = get_cross_point_from_point(p1[0], p1[1], p3[0], p3[1], p2[0], p2[1], p4[0], p4[1])
+                    return np.append(x1[:i], cx), np.append(y1[:i], cy), np.insert(x2[j:], 0, cx), np.insert(y2[j:], 0, cy), True
+                j += 1
+            i += 1
+        return x1, y1, x2, y2, False
+    
+    for n in [200, 1000, 2000]:
+        x, y = naca4("2412", 200, n)
+        # 上面と下面に分割してそれぞれ内側にオフセットし、前縁で交差させる
+        x1, y1 = offset_line(x[:n], y[:n], 1.0, "cubic")
+        x2, y2 = offset_line(x[n-1:], y[n-1:], 1.0, "cubic")
+        t_bf, ret_bf = measure(run_bruteforce, x1, y1, x2, y2, repeat = 1)
+        t_kn, ret_kn = measure(remove_collision, x1, y1, x2, y2)
+        same = all([np.array_equal(a, b) for a, b in zip(ret_bf[:4], ret_kn[:4])])
+        print("  N=%5d  bruteforce: %8.4f s  kernel: %8.5f s  x%6.1f  detection: %s  same: %s"
+              %(len(x1) + len(x2), t_bf, t_kn, t_bf/t_kn, ret_kn[4], same))
+
+
+def bench_drawing_collision():
+    """多数の線からなる図面に対して、全線分同士の交差判定(Section.detect_line_collisionと同じ処理)の計算時間を計測する"""
+    print("[drawing collision]")
+    for n_line in [50, 200, 500]:
+        # 翼型をn_line本の線に分割し、それぞれ内側にオフセットする
+        x, y = naca4("0006", 200, 20*n_line)
+        seg_list = []
+        for i in range(n_line):
+            st = i*len(x)//n_line
+            ed = (i + 1)*len(x)//n_line + 1
+            x_o, y_o = offset_line(x[st:ed], y[st:ed], 1.0, "cubic")
+            seg_list.append(get_segments(x_o, y_o))
+        seg = np.concatenate(seg_list, 0)
+        t_cross, ret = measure(get_cross_segments, seg)
+        print("  lines=%4d  segments=%6d  time: %8.5f s  crossings: %d"%(n_line, len(seg), t_cross, len(ret[0])))
+
+
+def bench_g_code_line_str():
+    """gen_g_code_line_strで、速度指令値の解釈方法ごとにGコード文字列を作成する計算時間を計測する"""
+    print("[gen_g_code_line_str]")
+    for n in [10000, 50000]:
+        x, y = naca4("2412", 200, n)
+        u = x*0.8 + 10
+        v = y*0.8
+        for cnc_cs_def in ["XY", "XYU", "InvertTime", "Faster"]:
+            t_code, code_str = measure(gen_g_code_line_str, x, y, u, v, 0, 0, 0, 0, 20, 16, cnc_cs_def)
+            print("  N=%6d  %-10s  time: %8.5f s  bytes: %d"%(len(x), cnc_cs_def, t_code, len(code_str)))
+
+
+def bench_arc_fitting():
+    """gen_g_code_arc_strによる円弧補完で、Gコードの行数がどれだけ削減されるかと、その計算時間を計測する"""
+    print("[gen_g_code_arc_str]")
+    # uv平面の円弧中心の名称が空欄の場合は円弧を出力しないため、名称を指定した書式を用いる
+    arc_format = make_g_code_line_format("XY", is_arc = True, center_str = ("I", "J", "K", "L"))
+    for n in [1000, 5000]:
+        x, y = naca4("2412", 200, n)
+        u = x*0.8 + 10
+        v = y*0.8
+        t_line, line_str = measure(gen_g_code_line_str, x, y, u, v, 0, 0, 0, 0, 20, 16, "XY")
+        for tol in [0.01, 0.001]:
+            t_arc, arc_str = measure(gen_g_code_arc_str, x, y, u, v, 0, 0, 0, 0, 20, 16, "XY", tol, None, arc_format)
+            print("  N=%6d  tol=%.3f  G01: %6d lines %8.5f s  arc: %6d lines %8.5f s"
+                  %(len(x), tol, line_str.count("\n"), t_line, arc_str.count("\n"), t_arc))
+
+
+def bench_simplify_path():
+    """simplify_pathによる点列の間引きで、点数がどれだけ削減されるかと、その計算時間を計測する"""
+    print("[simplify_path]")
+    for n in [1000, 5000]:
+        x, y = naca4("2412", 200, n)
+        u = x*0.8 + 10
+        v = y*0.8
+        for tol in [0.01, 0.001]:
+            t_dp, index = measure(simplify_path, x, y, u, v, tol)
+            print("  N=%6d  tol=%.3f  points: %6d -> %6d  time: %8.5f s"%(len(x), tol, len(x), len(index), t_dp))
+
+
+def bench_resample():
+    """分割距離を変えてパスチェックを繰り返す場合を想定し、分割点数を変えて等間隔分割したときの計算時間を計測する
+
+    初回は線長計算とArcLengthCurveの作成を含み、2回目以降はcacheしたArcLengthCurveの評価のみとなる。
+    """
+    print("[resample with ArcLengthCurve]")
+    x, y = naca4("2412", 1000, 2000)
+    line = LineObject(x, y, 0, False)
+    line.set_offset_dist(0.5)
+    
+    def run_resample():
+        for n in range(1000, 6000, 250):
+            generate_arc_length_points(line, n)
+    
+    t_first, ret = measure(generate_arc_length_points, line, 500, repeat = 1)
+    t_resample, ret = measure(run_resample, repeat = 1)
+    print("  first (length + curve): %8.4f s  20 resamples: %8.5f s  (%8.5f s/resample)"%(t_first, t_resample, t_resample/20))
+
+
+def make_airfoil_dxf(n_spline, n_point):
+    """フィット点のみのスプライン（翼型）を並べたdxfファイルを一時ファイルとして作成する
+
+    Args:
+        n_spline (int): スプラインの本数
+        n_point (int): 翼型の上下面それぞれの点数
+
+    Returns:
+        str: 作成したdxfファイルのパス
+    """
+    dwg = ezdxf.new()
+    msp = dwg.modelspace()
+    i = 0
+    while i < n_spline:
+        x, y = naca4("2412", 200, n_point)
+        msp.add_spline(np.array([x, y + i*50]).T)
+        i += 1
+    fd, filename = tempfile.mkstemp(suffix = ".dxf")
+    os.close(fd)
+    dwg.saveas(filename)
+    return filename
+
+
+def bench_geometry_cache():
+    """dxfファイルの読み込み（解析＋リファイン）と、保存した読み込み結果からの読み込みの計算時間を計測する
+
+    フィット点のみのスプライン（翼型）を並べたdxfファイルを作成し、リファインして読み込む。
+    """
+    print("[geometry cache]")
+    for n_spline in [10, 50]:
+        filename = make_airfoil_dxf(n_spline, 100)
+
+        key = get_geometry_cache_key(filename, True)
+        cache_path = os.path.join(get_geometry_cache_dir(), key + ".npz")
+        t_load, line_list = measure(load_dxf_lines, filename, True, repeat = 1)
+        t_save, ret = measure(save_geometry_cache, key, line_list, repeat = 1)
+        t_key, ret = measure(get_geometry_cache_key, filename, True)
+        t_hit, ret = measure(load_geometry_cache, key)
+        print("  splines=%4d  dxf load: %8.4f s  save: %8.5f s  cache load: %8.5f s (key %8.5f s)  size: %7d byte"
+              %(n_spline, t_load, t_save, t_hit + t_key, t_key, os.path.getsize(cache_path)))
+        os.remove(cache_path)
+        os.remove(filename)
+
+
+def bench_concurrent_load():
+    """XY面とUV面のdxfファイルを、順に読み込んだ場合と、load_dxf_lines_concurrentで並列に読み込んだ場合の計算時間を計測する
+
+    保存した読み込み結果を使用しないように、計測ごとに新しいdxfファイルを作成する。
+    プロセスプールは、起動済み(GUIで2回目以降の読み込み)の場合と、読み込みごとに起動する場合を計測する。
+    """
+    print("[concurrent XY/UV load]")
+    executor = ProcessPoolExecutor(max_workers = 2)
+    # プロセスを起動しておく
+    executor.submit(len, []).result()
+    executor.submit(len, []).result()
+    for n_spline in [20, 80]:
+        filename_list = [make_airfoil_dxf(n_spline, 100), make_airfoil_dxf(n_spline, 100)]
+        t_seq, ret = measure(lambda: [load_dxf_lines(filename, True) for filename in filename_list], repeat = 1)
+        t_warm, ret = measure(load_dxf_lines_concurrent, filename_list, True, executor, repeat = 1)
+        remove_benchmark_cache(filename_list)
+        t_cold, ret = measure(load_dxf_lines_concurrent, filename_list, True, repeat = 1)
+        remove_benchmark_cache(filename_list)
+        print("  splines=%4d x 2  sequential: %8.4f s  concurrent(warm pool): %8.4f s  concurrent(new pool): %8.4f s"
+              %(n_spline, t_seq, t_warm, t_cold))
+        for filename in filename_list:
+            os.remove(filename)
+    executor.shutdown()
+
+
+def remove_benchmark_cache(filename_list):
+    """ベンチマーク用のdxfファイルの読み込み結果を削除する"""
+    for filename in filename_list:
+        cache_path = os.path.join(get_geometry_cache_dir(), get_geometry_cache_key(filename, True) + ".npz")
+        if os.path.isfile(cache_path):
+            os.remove(cache_path)
+
+
+def bench_stream_load():
+    """オブジェクト数が多いdxfファイルを、load_dxf_linesとload_dxf_lines_streamで読み込んだ場合の計算時間とメモリ使用量を計測する
+
+    板材を並べた図面を想定し、線分・円弧・スプラインを多数並べたdxfファイルを作成する。
+    メモリ使用量は、tracemallocで計測した読み込み中のピーク値とする（計算時間は、tracemallocを無効にして計測する）。
+    """
+    print("[stream load]")
+    for n_part in [1000, 5000]:
+        dwg = ezdxf.new()
+        msp = dwg.modelspace()
+        i = 0
+        while i < n_part:
+            x0 = (i%100)*30.0
+            y0 = (i//100)*30.0
+            msp.add_line((x0, y0), (x0 + 20, y0))
+            msp.add_line((x0 + 20, y0), (x0 + 20, y0 + 10))
+            msp.add_arc((x0 + 10, y0 + 10), 10, 0, 180)
+            msp.add_spline([(x0, y0 + 10), (x0 + 2, y0 + 5), (x0 + 1, y0 + 2), (x0, y0)])
+            i += 1
+        fd, filename = tempfile.mkstemp(suffix = ".dxf")
+        os.close(fd)
+        dwg.saveas(filename)
+        del dwg, msp
+
+        result = []
+        for load_func in [load_dxf_lines, load_dxf_lines_stream]:
+            t_load, line_list = measure(load_func, filename, False, repeat = 1)
+            del line_list
+            tracemalloc.start()
+            line_list = load_func(filename, False)
+            size, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            result.append((t_load, peak/1024/1024, len(line_list)))
+            del line_list
+        print("  entities=%6d (%5.1f MB)  document: %7.3f s %7.1f MB  stream: %7.3f s %7.1f MB  lines: %d"
+              %(n_part*4, os.path.getsize(filename)/1024/1024, result[0][0], result[0][1], result[1][0], result[1][1], result[1][2]))
+        os.remove(filename)
+
+
+if __name__ == "__main__":
+    bench_spline_length()
+    bench_line_cache()
+    bench_offset_line()
+    bench_self_collision()
+    bench_line_collision()
+    bench_drawing_collision()
+    bench_g_code_line_str()
+    bench_arc_fitting()
+    bench_simplify_path()
+    bench_resample()
+    bench_geometry_cache()
+    bench_concurrent_load()
+    bench_stream_load()